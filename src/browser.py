@@ -1,38 +1,67 @@
+import functools
+import os
+import time
 import tkinter
 import tkinter.font
-
-from common.constants import VSTEP
-from css_parser.base_selector import BaseCSSSelector
+from typing import Iterable
+
+from common.background_loader import BackgroundLoader, LoadTask
+from common.bfcache import BackForwardCache, CachedPage, estimate_page_size
+from common.constants import HSTEP, INITIAL_HEIGHT, INITIAL_WIDTH, VSTEP
+from common.display_list_differ import DisplayListDiffer
+from common.dom_mutations import NO_DAMAGE, RELAYOUT, REPAINT, DOMMutations
+from common.font_cache import FONTS, get_font, get_font_key
+from common.memory import MemoryProfiler, MemoryReport
+from common.perf_hud import PerfHUD, PerfStats, format_ms
+from common.sampling_profiler import pipeline_stage
+from common.prefetcher import PREFETCH_DELAY_MS, Prefetcher, ResponseCache
+from common.page_snapshot import PageSnapshot, PageSnapshotStore, snapshot_key
 from draw_commands.DrawInstruction import DrawInstruction
 from layout.document_layout import DocumentLayout
+from layout.find_index import FindIndex, normalize
+from layout.hit_test import find_link, hit_test, link_target, visible_links
 from layout.layout_element import LayoutElement, paint_tree
+from nodes.element_index import ElementIndex
 from nodes.html_element import HTMLElement
 from nodes.tag_element import TAGElement
-from css_parser.css_parser import CSSParser
+from css_parser.regex_css_parser import RegexCSSParser
+from css_parser.base_selector import BaseCSSSelector
+from css_parser.style import cascade_priority, style
 from parser.parser import HTMLParser, print_tree
+from parser.preload_scanner import PreloadScanner
+from common.tiled_renderer import TiledRenderer
 from common.url import URL
 
-INITIAL_WIDTH = 800
-INITIAL_HEIGHT = 600
 MIN_WIDTH = 400
 MIN_HEIGHT = 250
+OVERLAY_TAG = "overlay"  # Canvas tag of items drawn on top of the page
 
 
 SCROLL_STEP = 100
 
-DEFAULT_STYLE_SHEET = CSSParser(open("src/browser.css").read()).parse_css_file()
+# The user agent stylesheet, next to this module
+DEFAULT_STYLE_SHEET_PATH = os.path.join(os.path.dirname(__file__), "browser.css")
+
+
+@functools.cache
+def default_style_sheet() -> list[tuple[BaseCSSSelector, dict[str, str]]]:
+    """The rules of the user agent stylesheet, parsed when the first page is styled instead of at startup."""
 
-INHERITED_PROPERTIES = {
-    "font-size": "16px",
-    "font-style": "normal",
-    "font-weight": "normal",
-    "color": "black",
-}  # Style properties that are inherited by default from parent elements. Text elements can only use these properties because they cannot be selected by CSS selectors otherwise.
+    with open(DEFAULT_STYLE_SHEET_PATH, encoding="utf-8") as file:
+        return RegexCSSParser(file.read()).parse_css_file()
 
 
 class Browser:
-    def __init__(self):
-        self.window = tkinter.Tk()
+    def __init__(
+        self,
+        memory_profiler: MemoryProfiler | None = None,
+        snapshot_store: PageSnapshotStore | None = None,
+        tiled: bool = False,
+        perf_stats: PerfStats | None = None,
+        window: tkinter.Tk | None = None,
+    ):
+        # The window may already be shown, see `main`
+        self.window = window or tkinter.Tk()
 
         bi_times = tkinter.font.Font(
             family="Times", size=16, weight="normal", slant="roman"
@@ -55,89 +84,339 @@ class Browser:
             lambda e: self.handle_mouse_wheel(e.delta),
         )
         self.window.bind("<Configure>", lambda e: self.handle_resize(e.width, e.height))
+        self.window.bind("<Alt-Left>", lambda e: self.go_back())
+        self.window.bind("<Alt-Right>", lambda e: self.go_forward())
+        self.canvas.bind("<Button-1>", lambda e: self.handle_click(e.x, e.y))
+        self.window.bind("<Control-f>", lambda e: self.open_find_bar())
+        self.window.bind("<F12>", lambda e: self.toggle_hud())
+        self.window.bind("<Destroy>", lambda e: self.handle_destroy(e.widget))
+
+        # Find-in-page, the entry is shown by `open_find_bar`
+        self.find_bar = tkinter.Entry(self.window)
+        self.find_bar.bind("<KeyRelease>", lambda e: self.update_find())
+        self.find_bar.bind("<Return>", lambda e: self.find_next(1))
+        self.find_bar.bind("<Shift-Return>", lambda e: self.find_next(-1))
+        self.find_bar.bind("<Escape>", lambda e: self.close_find_bar())
+        self.find_index: FindIndex | None = None  # Built from the layout on first use
+        self.find_query = ""  # Normalized query of `find_matches`
+        self.find_matches: list[int] = []  # Offsets of the matches in `find_index.text`
+        self.find_current: int | None = None  # Position of the selected match
 
         self.width = INITIAL_WIDTH
         self.height = INITIAL_HEIGHT
 
-        self.display_list: list[
-            DrawInstruction
-        ]  # A list of draw commands to be executed on the canvas in order.
-
-    def load(self, url: URL):
-        """Load the URL and display its content in the browser."""
-
-        body = url.request()
-        self.root_node = HTMLParser(body).parse()
-
-        print_tree(self.root_node)
-
-        self.apply_css_to_root_node(url)
+        self.url: URL | None = None
+        self.root_node: HTMLElement | None = None
+        self.element_index: ElementIndex | None = None
+        # Changes the DOM of the current page, None while pages shown from a snapshot have no stylesheet rules
+        self.dom: DOMMutations | None = None
+        self.update_job: str | None = None  # Scheduled `update_rendering` call
+        self.document: DocumentLayout | None = None
+        self.content_height: float = 0  # Height of the laid out page
+        self.display_list: list[DrawInstruction] = (
+            []
+        )  # A list of draw commands to be executed on the canvas in order.
+
+        # Disabled by default
+        self.memory_profiler = memory_profiler or MemoryProfiler()
+        # Snapshots of previously loaded pages, disabled if None
+        self.snapshot_store = snapshot_store
+        # Keeps the canvas items of the page while scrolling, disabled if None
+        self.tiled_renderer = TiledRenderer(self.canvas) if tiled else None
+        self.differ = DisplayListDiffer(self.canvas)
+        # Timings of drawing, layout and loads, shown by the HUD
+        self.perf_stats = perf_stats or PerfStats()
+        self.hud = PerfHUD(self.canvas)
+
+        # Fetches the targets of visible links while the browser is idle
+        self.prefetcher = Prefetcher(ResponseCache())
+        self.prefetch_job: str | None = None  # Scheduled `prefetch_visible_links` call
+
+        self.loader = BackgroundLoader(
+            self.window,
+            lambda task: fetch_and_style(
+                task,
+                self.memory_profiler,
+                self.snapshot_store,
+                self.width,
+                self.prefetcher,
+            ),
+            self.show_page,
+            self.show_load_error,
+        )
 
-        self.document = DocumentLayout(self.root_node, INITIAL_WIDTH)
-        self.document.layout()
+        self.history: list[URL] = []  # Visited URLs, for back and forward navigation
+        self.history_index = -1  # Position of the current page in `history`
+        self.bfcache = BackForwardCache()
 
-        print_tree(self.document)
+    def load(self, url: URL):
+        """
+        Navigate to the URL. Pages after the current page in the history are dropped, like in any browser.
+        """
+
+        self.cache_current_page()
+
+        del self.history[self.history_index + 1 :]
+        self.history.append(url)
+        self.history_index += 1
+
+        self.open(url)
+
+    def go_back(self):
+        """Navigate to the previous page in the history."""
+
+        if self.history_index > 0:
+            self.cache_current_page()
+            self.history_index -= 1
+            self.open(self.history[self.history_index], from_history=True)
+
+    def go_forward(self):
+        """Navigate to the next page in the history."""
+
+        if self.history_index < len(self.history) - 1:
+            self.cache_current_page()
+            self.history_index += 1
+            self.open(self.history[self.history_index], from_history=True)
+
+    def open(self, url: URL, from_history: bool = False):
+        """
+        Show the page of the URL. Back and forward navigations (`from_history`) restore the page from the
+        back/forward cache if possible, other navigations always load the page again and drop its cached copy.
+        Pages that are not restored are loaded. Fetching, parsing and styling run on a worker thread so the window stays responsive.
+        The page is laid out and displayed once the styled tree arrives on the Tk thread (see `show_page`).
+        A load that is still running is cancelled.
+        """
+
+        # Taken in any case, a cached copy is stale once the page is loaded again
+        cached = self.bfcache.take(str(url))
+        if cached is not None and from_history:
+            self.loader.cancel()
+            self.restore_page(url, cached)
+            return
+
+        self.loader.start(url)
+        self.window.title(f"Loading {url} ...")
+        self.draw()
 
-        self.display_list: list[DrawInstruction] = []
-        paint_tree(self.document, self.display_list)
+    def cache_current_page(self):
+        """Put the currently displayed page into the back/forward cache before navigating away from it."""
+
+        if self.url is None or self.root_node is None:
+            return
+        assert self.element_index is not None, "Element index is None."
+
+        size = estimate_page_size(self.root_node, self.document, self.display_list)
+        self.bfcache.put(
+            str(self.url),
+            CachedPage(
+                self.root_node,
+                self.element_index,
+                self.document,
+                self.display_list,
+                self.content_height,
+                self.scroll,
+                self.width,
+                size,
+                self.dom,
+            ),
+        )
 
+    def restore_page(self, url: URL, cached: CachedPage):
+        """Show a page from the back/forward cache without fetching, parsing or styling it again."""
+
+        self.url = url
+        self.root_node = cached.root_node
+        self.element_index = cached.element_index
+        self.dom = cached.dom
+        self.document = cached.document
+        self.display_list = cached.display_list
+        self.content_height = cached.content_height
+        self.scroll = cached.scroll
+        self.window.title(str(url))
+
+        damage = self.dom.take_damage() if self.dom is not None else NO_DAMAGE
+        if cached.width != self.width or damage != NO_DAMAGE:
+            # The window was resized or the DOM changed since the page was cached
+            self.relayout(self.width)
+
+        self.reset_find()
+        self.draw()
+        self.schedule_prefetch()
+
+    def show_page(self, url: URL, page: "LoadedPage"):
+        """Lay out and display a styled HTML tree. Called on the Tk thread when a load has finished."""
+
+        self.url = url
+        self.root_node = page.root_node
+        self.element_index = page.element_index
+        self.dom = (
+            DOMMutations(page.element_index, page.css_rules, self.schedule_update)
+            if page.css_rules is not None
+            else None
+        )
+        self.scroll = 0
+        self.window.title(str(url))
+        self.perf_stats.record("network", page.network_time)
+
+        if page.snapshot is not None and page.width == self.width:
+            # The page is unchanged since the snapshot was taken, no layout needed
+            self.document = None
+            self.display_list = page.snapshot.display_list(get_font)
+            self.content_height = page.snapshot.content_height
+        else:
+            self.relayout(self.width, page.memory_report)
+
+            print_tree(self.document)
+
+            if self.snapshot_store is not None and page.snapshot_key is not None:
+                if page.width == self.width:
+                    key = page.snapshot_key
+                else:
+                    key = snapshot_key(page.source, self.width)  # Resized while loading
+                self.snapshot_store.save(
+                    key,
+                    self.root_node,
+                    self.content_height,
+                    self.display_list,
+                    get_font_key,
+                )
+
+        self.reset_find()
         self.draw()
+        self.schedule_prefetch()
 
-    def apply_css_to_root_node(self, base_url: URL):
-        """Apply CSS styles to the root node of the HTML tree."""
+        if page.memory_report is not None and self.document is not None:
+            self.memory_profiler.measure_trees(
+                page.memory_report,
+                tree_to_list(self.root_node, []),
+                tree_to_list(self.document, []),
+                self.display_list,
+            )
+            self.memory_profiler.finish_load(page.memory_report)
 
-        css_rules = DEFAULT_STYLE_SHEET.copy()
+    def relayout(self, width: int, memory_report: MemoryReport | None = None):
+        """Lay out the current page for the width and rebuild the display list."""
 
-        links = [
-            node.attributes["href"]
-            for node in tree_to_list(self.root_node, [])
-            if isinstance(node, TAGElement)
-            and node.tag_name == "link"
-            and node.attributes.get("rel") == "stylesheet"
-            and "href" in node.attributes
-        ]  # Find all <link rel="stylesheet" href="..."> elements in the HTML tree.
+        assert self.root_node is not None, "Root node is None."
 
-        for link in links:
-            style_sheet_url = base_url.resolve(link)
-            try:
-                body = style_sheet_url.request()
-            except Exception as e:
-                print(f"Failed to load stylesheet {link}: {e}")
-                continue
+        start = time.perf_counter()
+        with (
+            pipeline_stage("layout"),
+            self.memory_profiler.stage(memory_report, "layout"),
+        ):
+            self.document = DocumentLayout(self.root_node, width)
+            self.document.layout()
+            self.content_height = self.document.height
 
-            css_rules.extend(CSSParser(body).parse_css_file())
+        with (
+            pipeline_stage("paint"),
+            self.memory_profiler.stage(memory_report, "paint"),
+        ):
+            self.display_list: list[DrawInstruction] = []
+            paint_tree(self.document, self.display_list)
+        self.perf_stats.record("layout", (time.perf_counter() - start) * 1000)
 
-        style(self.root_node, sorted(css_rules, key=cascade_priority))
+    def show_load_error(self, url: URL, error: Exception):
+        """Report a failed load. Called on the Tk thread. The previously displayed page is kept."""
+
+        print(f"Failed to load {url}: {error}")
+        self.window.title(f"Failed to load {url}")
+        self.draw()
 
+    @pipeline_stage("draw")
     def draw(self):
         """Draw the content of the display_list that is currently in view on the canvas."""
 
-        self.canvas.delete("all")
-
-        for cmd in self.display_list:
-            # Skip draw commmands that are not in the current view
-            if cmd.top > self.scroll + self.height:
-                continue
-
-            if cmd.bottom < self.scroll:
-                continue
-
-            cmd.execute(self.scroll, self.canvas)
+        start = time.perf_counter()
+        self.canvas.delete(OVERLAY_TAG)
+        if self.tiled_renderer is not None:
+            self.tiled_renderer.render(self.display_list, self.scroll, self.height)
+        else:
+            # Only the canvas items of commands that changed since the last frame are updated
+            self.differ.render(self.display_list, self.scroll, self.height)
+
+        if self.find_index is not None and self.find_matches:
+            for cmd in self.find_index.highlights(
+                self.find_matches,
+                len(self.find_query),
+                self.find_current,
+                self.scroll,
+                self.scroll + self.height,
+            ):
+                item = cmd.execute(self.scroll, self.canvas)
+                self.canvas.addtag_withtag(OVERLAY_TAG, item)
+
+        if self.find_query:
+            current = 0 if self.find_current is None else self.find_current + 1
+            self.canvas.create_text(
+                self.width - HSTEP,
+                self.height - VSTEP,
+                text=f"{current} of {len(self.find_matches)}",
+                anchor="se",
+                fill="gray",
+                tags=OVERLAY_TAG,
+            )
+
+        if self.loader.is_loading:
+            self.canvas.create_text(
+                self.width - HSTEP,
+                VSTEP,
+                text="Loading...",
+                anchor="ne",
+                fill="gray",
+                tags=OVERLAY_TAG,
+            )
+
+        self.perf_stats.record("draw", (time.perf_counter() - start) * 1000)
+        if self.hud.visible:
+            self.hud.draw(self.hud_lines())
+
+    def toggle_hud(self):
+        self.hud.toggle()
+        if self.hud.visible:
+            self.hud.draw(self.hud_lines())
+
+    def hud_lines(self) -> list[str]:
+        """The stats shown by the performance HUD."""
+
+        top, bottom = self.scroll, self.scroll + self.height
+        visible = sum(
+            1 for cmd in self.display_list if cmd.top <= bottom and cmd.bottom >= top
+        )
+        draw = self.perf_stats.histograms.get("draw")
+        lines = [
+            f"draw      {format_ms(self.perf_stats.last('draw'))}"
+            f" (p90 {format_ms(draw.percentile(90) if draw else None)})",
+            f"commands  {visible} of {len(self.display_list)} visible",
+            f"layout    {format_ms(self.perf_stats.last('layout'))}",
+            f"network   {format_ms(self.perf_stats.last('network'))}",
+            f"fonts     {len(FONTS)} cached",
+        ]
+        if self.tiled_renderer is None:
+            lines.append(f"diff      {self.differ.diff_size} canvas items changed")
+        else:
+            lines.append(f"tiles     {self.tiled_renderer.tiles_drawn} drawn")
+        return lines
 
     def scroll_up(self, scroll_step: int = SCROLL_STEP):
         self.scroll -= scroll_step
         self.scroll = max(self.scroll, 0)  # Prevent scrolling above the top
         self.draw()
+        self.schedule_prefetch()
 
     def scroll_down(self, scroll_step: int = SCROLL_STEP):
+        if self.root_node is None:
+            return  # Nothing to scroll while the first page is still loading
+
         self.scroll += scroll_step
         max_y = max(
-            self.document.height + 2 * VSTEP - self.height,
+            self.content_height + 2 * VSTEP - self.height,
             0,
             # self.display_list[-1].bottom - self.height, 0
         )  # Calculate maximum scrolling that still allows for viewing content
         self.scroll = min(self.scroll, max_y)
         self.draw()
+        self.schedule_prefetch()
 
     def handle_mouse_wheel(self, delta: int):
         """Handle mouse wheel scrolling. Supports Windows."""
@@ -153,61 +432,326 @@ class Browser:
         if self.width == width and self.height == height:
             return  # No need to re-layout if the size hasn't changed e.g., when the windows is dragged.
 
-        assert self.root_node is not None, "Root node is None."
-
-        if self.width != width:
+        width_changed = self.root_node is not None and self.width != width
+        if width_changed:
             # Re-layout the text if the width has changed
-            self.document = DocumentLayout(self.root_node, width)
-            self.document.layout()
-
-            self.display_list: list[DrawInstruction] = []
-            paint_tree(self.document, self.display_list)
-            # self.display_list = BlockLayout(self.root_node, width).display_list
+            self.relayout(width)
 
         self.width = width
         self.height = height
 
+        if width_changed:
+            self.reset_find()  # The matches moved
         self.draw()
+        self.schedule_prefetch()
+
+    def handle_destroy(self, widget: tkinter.Misc):
+        """Stop the prefetches once the window is closed, so their worker threads don't keep the process alive."""
+
+        # The window's bindings also apply to its children, which are destroyed with it
+        if widget is self.window:
+            self.prefetcher.close()
+
+    def handle_click(self, x: int, y: int):
+        """Follow the link at the canvas coordinates, if any."""
+
+        if self.root_node is None or self.url is None or self.loader.is_loading:
+            return
+
+        if self.document is None:
+            # Pages shown from a snapshot have no layout tree to hit test yet
+            self.relayout(self.width)
+
+        assert self.document is not None, "Page is not laid out."
+        href = find_link(hit_test(self.document, x, y + self.scroll))
+        target = link_target(self.url, href) if href is not None else None
+        if target is not None:
+            self.load(target)
+
+    def open_find_bar(self):
+        self.find_bar.place(relx=1.0, y=0, anchor="ne")
+        self.find_bar.focus_set()
+        self.find_bar.select_range(0, tkinter.END)
+
+    def close_find_bar(self):
+        self.find_bar.delete(0, tkinter.END)
+        self.find_bar.place_forget()
+        self.canvas.focus_set()
+        self.update_find()
+
+    def update_find(self):
+        """
+        Search the page for the text of the find bar, called on every keystroke.
+        While the query is extended, only the previous matches are checked. The first match in or below the view is selected.
+        """
+
+        query = normalize(self.find_bar.get())
+        if query == self.find_query:
+            return  # E.g. a key that does not edit the text, like Shift
+
+        if not query or self.root_node is None:
+            self.find_query = ""
+            self.find_matches = []
+            self.find_current = None
+            self.draw()
+            return
+
+        if self.find_index is None:
+            if self.document is None:
+                # Pages shown from a snapshot have no layout tree to search yet
+                self.relayout(self.width)
+            assert self.document is not None, "Page is not laid out."
+            self.find_index = FindIndex.from_layout(self.document)
+
+        previous = self.find_matches if self.find_query else None
+        self.find_matches = self.find_index.search(query, self.find_query, previous)
+        self.find_query = query
+        self.find_current = self.find_index.first_match_below(
+            self.find_matches, self.scroll
+        )
+        if self.find_current is None and self.find_matches:
+            self.find_current = 0  # Wrap around to the top of the page
 
+        self.scroll_to_match()
 
-def style(node: HTMLElement, rules: list[tuple[BaseCSSSelector, dict[str, str]]]):
-    """Recursively set styles (`node.style: dict[str, str]`) on the HTML tree node and its children."""
+    def find_next(self, step: int):
+        """Select the next (step 1) or previous (step -1) match, wrapping around at the end of the page."""
 
-    node.style = {}
+        if not self.find_matches:
+            return
 
-    for prop, default_value in INHERITED_PROPERTIES.items():
-        if node.parent:
-            node.style[prop] = node.parent.style[prop]
-        else:
-            node.style[prop] = default_value
-
-    # Apply CSS rules based on rules from a CSS file.
-    # CSS rules may be the User Agent styles or styles from a fetched stylesheet (last take precedence).
-    for selector, body in rules:
-        if not selector.matches(node):
-            continue
-        for prop, value in body.items():
-            node.style[prop] = value
-
-    # If the node is a TAGElement and has a "style" attribute, parse it and set the styles.
-    if isinstance(node, TAGElement) and "style" in node.attributes:
-        pairs = CSSParser(node.attributes["style"]).body()
-
-        for prop, value in pairs.items():
-            node.style[prop] = value
-
-    # Resolve percentage font sizes to pixel values before inheriting.
-    if node.style["font-size"].endswith("%"):
-        if node.parent:
-            parent_font_size = node.parent.style["font-size"]
+        current = -step if self.find_current is None else self.find_current
+        self.find_current = (current + step) % len(self.find_matches)
+        self.scroll_to_match()
+
+    def scroll_to_match(self):
+        """Scroll the selected match into view, if it is not already visible."""
+
+        if self.find_index is not None and self.find_current is not None:
+            top = self.find_index.match_top(self.find_matches[self.find_current])
+            if not self.scroll <= top < self.scroll + self.height - 2 * VSTEP:
+                max_y = max(self.content_height + 2 * VSTEP - self.height, 0)
+                self.scroll = min(max(top - self.height / 3, 0), max_y)
+                self.schedule_prefetch()
+
+        self.draw()
+
+    def reset_find(self):
+        """Drop the find index of the previous layout and search the new one again."""
+
+        self.find_index = None
+        self.find_query = ""
+        self.find_matches = []
+        self.find_current = None
+        if self.find_bar.get():
+            self.update_find()
+
+    def schedule_update(self):
+        """Update the rendering once the current DOM mutations are done, i.e. when Tk is idle."""
+
+        if self.update_job is None:
+            self.update_job = self.window.after_idle(self.update_rendering)
+
+    def update_rendering(self):
+        """Lay out or repaint the page as far as needed after DOM mutations, see `DOMMutations.take_damage`."""
+
+        self.update_job = None
+        if self.dom is None:
+            return
+
+        damage = self.dom.take_damage()
+        if damage == RELAYOUT:
+            self.relayout(self.width)
+            self.reset_find()
+        elif damage == REPAINT:
+            assert self.document is not None, "Page is not laid out."
+            self.display_list = []
+            paint_tree(self.document, self.display_list)
         else:
-            parent_font_size = INHERITED_PROPERTIES["font-size"]
-        node_pct = float(node.style["font-size"][:-1]) / 100
-        parent_px = float(parent_font_size[:-2])
-        node.style["font-size"] = f"{node_pct * parent_px}px"
+            return
 
-    for child in node.children:
-        style(child, rules)
+        self.draw()
+
+    def schedule_prefetch(self):
+        """Prefetch the visible links once the browser has been idle for PREFETCH_DELAY_MS."""
+
+        if self.prefetch_job is not None:
+            self.window.after_cancel(self.prefetch_job)
+        self.prefetch_job = self.window.after(
+            PREFETCH_DELAY_MS, self.prefetch_visible_links
+        )
+
+    def prefetch_visible_links(self):
+        self.prefetch_job = None
+
+        if self.document is None or self.url is None or self.loader.is_loading:
+            return
+
+        urls = []
+        for href in visible_links(
+            self.document, self.scroll, self.scroll + self.height, []
+        ):
+            target = link_target(self.url, href)
+            if target is not None:
+                urls.append(target)
+
+        self.prefetcher.prefetch(urls)
+
+
+class LoadedPage:
+    """Result of `fetch_and_style`, handed from the worker thread to the Tk thread."""
+
+    def __init__(
+        self,
+        source: Iterable[str],
+        width: int,
+        root_node: HTMLElement,
+        element_index: ElementIndex,
+        memory_report: MemoryReport | None = None,
+        snapshot_key: str | None = None,
+        snapshot: PageSnapshot | None = None,
+        css_rules: list[tuple[BaseCSSSelector, dict[str, str]]] | None = None,
+        network_time: float = 0,
+    ):
+        self.source = (
+            source  # HTML source of the page in chunks, see `URL.request_chunks`
+        )
+        self.width = width  # Viewport width when the load started
+        self.root_node = root_node
+        self.element_index = element_index
+        self.memory_report = memory_report
+        self.snapshot_key = snapshot_key  # Set if snapshots are enabled
+        self.snapshot = snapshot  # Set if the page was restored from a snapshot
+        # Rules the page was styled with in cascade order, None if the page was restored from a snapshot
+        self.css_rules = css_rules
+        self.network_time = network_time  # Milliseconds spent fetching the page
+
+
+def fetch_and_style(
+    task: LoadTask,
+    memory_profiler: MemoryProfiler,
+    snapshot_store: PageSnapshotStore | None,
+    width: int,
+    prefetcher: Prefetcher | None = None,
+) -> LoadedPage:
+    """
+    Fetch, parse and style the page of a load task. Runs on the worker thread of the BackgroundLoader,
+    so it must not touch any Tk object (this includes fonts, which are only needed for layout).
+    If there is a snapshot of the unchanged page for the width, parsing and styling are skipped.
+    Pages prefetched by the prefetcher are not fetched again.
+    """
+
+    memory_report = memory_profiler.begin_load(str(task.url))
+
+    # Stylesheets are resolved against the URL the page was loaded from, after redirects
+    prefetched = prefetcher.take(task.url) if prefetcher is not None else None
+    start = time.perf_counter()
+    if prefetched is not None:
+        base_url, content = prefetched
+        chunks: Iterable[str] = [content]
+    else:
+        with pipeline_stage("fetch"):
+            base_url, chunks = task.url.load()
+    # Local files are read while parsing, so only HTTP responses take time here
+    network_time = (time.perf_counter() - start) * 1000
+    task.check_cancelled()
+
+    key = None
+    if snapshot_store is not None:
+        key = snapshot_key(chunks, width)
+        snapshot = snapshot_store.load(key)
+        if snapshot is not None:
+            return LoadedPage(
+                chunks,
+                width,
+                snapshot.root_node,
+                snapshot.element_index,
+                snapshot_key=key,
+                snapshot=snapshot,
+                network_time=network_time,
+            )
+
+    # Stylesheets start loading while the rest of the page is parsed
+    preload_scanner = PreloadScanner(base_url)
+    try:
+        with pipeline_stage("parse"), memory_profiler.stage(memory_report, "parse"):
+            # Local files are decoded and parsed chunk by chunk. Text nodes reference spans of mostly-text chunks instead
+            # of copies, see `SPAN_MIN_COVERAGE`
+            parser = HTMLParser(on_tag=preload_scanner.scan, text_spans=True)
+            for chunk in chunks:
+                parser.feed(chunk)
+                task.check_cancelled()
+            root_node = parser.close()
+
+        print_tree(root_node)
+
+        task.check_cancelled()
+        with pipeline_stage("style"), memory_profiler.stage(memory_report, "style"):
+            css_rules = apply_css_to_root_node(
+                root_node, parser.element_index, base_url, task, preload_scanner
+            )
+    finally:
+        preload_scanner.close()
+
+    return LoadedPage(
+        chunks,
+        width,
+        root_node,
+        parser.element_index,
+        memory_report,
+        key,
+        css_rules=css_rules,
+        network_time=network_time,
+    )
+
+
+def apply_css_to_root_node(
+    root_node: HTMLElement,
+    element_index: ElementIndex,
+    base_url: URL,
+    task: LoadTask | None = None,
+    preload_scanner: PreloadScanner | None = None,
+) -> list[tuple[BaseCSSSelector, dict[str, str]]]:
+    """
+    Apply CSS styles to the root node of the HTML tree. Stylesheets already requested by the
+    preload scanner of the page are not fetched again. Returns the rules in cascade order.
+    """
+
+    css_rules = default_style_sheet().copy()
+
+    links = [
+        node.attributes["href"]
+        for node in tree_to_list(root_node, [])
+        if isinstance(node, TAGElement)
+        and node.tag_name == "link"
+        and node.attributes.get("rel") == "stylesheet"
+        and "href" in node.attributes
+    ]  # Find all <link rel="stylesheet" href="..."> elements in the HTML tree.
+
+    scanner = preload_scanner or PreloadScanner(base_url)
+    try:
+        # Start the requests not found by the scanner, so all stylesheets are fetched concurrently
+        for link in links:
+            scanner.preload(link)
+
+        for link in links:
+            if task:
+                task.check_cancelled()
+
+            try:
+                body = scanner.result(link)
+            except Exception as e:
+                print(f"Failed to load stylesheet {link}: {e}")
+                continue
+
+            css_rules.extend(RegexCSSParser(body).parse_css_file())
+    finally:
+        if preload_scanner is None:
+            scanner.close()
+
+    rules = sorted(css_rules, key=cascade_priority)
+    style(root_node, rules, element_index)
+    return rules
 
 
 def tree_to_list(
@@ -217,10 +761,3 @@ def tree_to_list(
     for child in tree.children:
         tree_to_list(child, list)
     return list
-
-
-def cascade_priority(rule: tuple[BaseCSSSelector, dict[str, str]]) -> int:
-    """Calculate the cascade priority of a CSS rule based on its selector."""
-
-    selector, _ = rule
-    return selector.priority
@@ -0,0 +1,136 @@
+import asyncio
+import functools
+import socket
+
+from common.constants import DEFAULT_TIMEOUT, MAX_CONNECTIONS_PER_HOST
+from common.dns_cache import (
+    DNS_CACHE,
+    FALLBACK_DELAY,
+    AddressInfo,
+    DNSCache,
+    addresses_or_raise,
+)
+from common.http_response import MAX_HEADER_SIZE, HTTPResponse, parse_head
+
+# `readuntil` gives up on headers larger than the stream limit
+STREAM_LIMIT = MAX_HEADER_SIZE
+
+
+class HostLimiter:
+    """
+    Limits the number of concurrent connections to each host. Must only be used by the tasks
+    of a single event loop, since the semaphores are bound to the loop that first waits on them.
+    """
+
+    def __init__(self, per_host: int = MAX_CONNECTIONS_PER_HOST):
+        self.per_host = per_host
+        self.semaphores: dict[tuple[str, int], asyncio.Semaphore] = {}
+
+    def semaphore(self, host: str, port: int) -> asyncio.Semaphore:
+        key = (host, port)
+        if key not in self.semaphores:
+            self.semaphores[key] = asyncio.Semaphore(self.per_host)
+        return self.semaphores[key]
+
+
+async def read_response_async(reader: asyncio.StreamReader) -> HTTPResponse:
+    """Read an HTTP/1.0 response from the stream. The asyncio counterpart of `read_response`."""
+
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise ValueError("Response headers are too large")
+    except asyncio.IncompleteReadError:
+        raise ConnectionError("Connection closed before the end of the headers")
+
+    version, status, reason, headers = parse_head(head[:-4])
+
+    if "content-length" in headers:
+        length = int(headers["content-length"])
+        try:
+            body = await reader.readexactly(length)
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionError(
+                f"Connection closed after {len(e.partial)} of {length} body bytes"
+            )
+    else:
+        body = await reader.read()
+
+    return HTTPResponse(version, status, reason, headers, body)
+
+
+async def resolve_async(
+    host: str, port: int, cache: DNSCache | None = None
+) -> list[AddressInfo]:
+    """
+    Like `DNSCache.resolve` with the shared DNS cache (unless another cache is given), for the event loop.
+    Only lookups missing from the cache run the blocking resolver in the default executor, like `loop.getaddrinfo`.
+    """
+
+    cache = cache or DNS_CACHE
+    result = cache.cached(host, port)
+    if result is None:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, functools.partial(cache.lookup, host, port)
+        )
+    return addresses_or_raise(result)
+
+
+async def connect_async(
+    addresses: list[AddressInfo], fallback_delay: float = FALLBACK_DELAY
+) -> socket.socket:
+    """
+    The asyncio counterpart of `dns_cache.connect` ("Happy Eyeballs"): connects with non-blocking sockets on the
+    event loop, starting an attempt on the next address every `fallback_delay` seconds until one succeeds.
+    The sockets of the other attempts are closed, also when the connect is cancelled (e.g. by a timeout).
+    """
+
+    if not addresses:
+        raise OSError("No addresses to connect to")
+
+    loop = asyncio.get_running_loop()
+
+    async def attempt(address: AddressInfo) -> socket.socket:
+        family, type, proto, _, sockaddr = address
+        sock = socket.socket(family, type, proto)
+        try:
+            sock.setblocking(False)
+            await loop.sock_connect(sock, sockaddr)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    remaining = list(addresses)
+    pending: set[asyncio.Task[socket.socket]] = set()
+    errors: list[BaseException] = []
+    connected: list[socket.socket] = []
+    try:
+        while remaining or pending:
+            if remaining:
+                pending.add(asyncio.create_task(attempt(remaining.pop(0))))
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=fallback_delay if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    connected.append(task.result())
+                else:
+                    errors.append(error)
+            if connected:
+                return connected.pop(0)
+    finally:
+        for task in pending:
+            task.cancel()
+        # Attempts that connected before they were cancelled return their socket
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, socket.socket):
+                connected.append(result)
+        for sock in connected:
+            sock.close()
+
+    raise errors[-1]
@@ -0,0 +1,125 @@
+import queue
+import threading
+from typing import Any, Callable
+
+from common.url import URL
+
+POLL_INTERVAL_MS = 16  # How often the Tk thread checks the result queue while a load is running (~60 Hz)
+
+
+class LoadCancelledError(Exception):
+    """Raised inside a load task when the load was cancelled because a newer load has started."""
+
+
+class LoadTask:
+    """
+    Handle passed to the function running on the worker thread.
+    The function should call `check_cancelled()` between pipeline stages so that superseded loads stop early.
+    """
+
+    def __init__(self, url: URL):
+        self.url = url
+        self.cancelled = threading.Event()
+
+    def check_cancelled(self) -> None:
+        """Raise a LoadCancelledError if this load has been cancelled."""
+
+        if self.cancelled.is_set():
+            raise LoadCancelledError(f"Load of {self.url} was cancelled.")
+
+
+class BackgroundLoader:
+    """
+    Runs page loads (fetch, parse, style) on a worker thread and hands the results back to the Tk thread.
+
+    Tkinter is not thread-safe, so the worker never touches any widget. Results are put into a thread-safe queue
+    which is polled on the Tk thread with `window.after`. Only the result of the most recent load is delivered,
+    results of cancelled (superseded) loads are dropped.
+    """
+
+    def __init__(
+        self,
+        window: Any,
+        run: Callable[[LoadTask], Any],
+        on_done: Callable[[URL, Any], None],
+        on_error: Callable[[URL, Exception], None],
+    ):
+        """
+        `run` is executed on the worker thread and returns the load result.
+        `on_done` and `on_error` are executed on the Tk thread.
+        """
+
+        self.window = window
+        self.run = run
+        self.on_done = on_done
+        self.on_error = on_error
+
+        self.results: queue.Queue[tuple[LoadTask, Any, Exception | None]] = (
+            queue.Queue()
+        )
+        self.current: LoadTask | None = None  # The load whose result will be delivered
+        self.polling = False
+
+    @property
+    def is_loading(self) -> bool:
+        return self.current is not None
+
+    def start(self, url: URL) -> LoadTask:
+        """Start loading the URL on a new worker thread. A load that is still running gets cancelled."""
+
+        self.cancel()
+
+        task = LoadTask(url)
+        self.current = task
+
+        worker = threading.Thread(
+            target=self.work, args=(task,), name=f"load {url}", daemon=True
+        )  # Daemon thread so a hanging network request does not keep the process alive on exit
+        worker.start()
+
+        if not self.polling:
+            self.polling = True
+            self.window.after(POLL_INTERVAL_MS, self.poll)
+
+        return task
+
+    def cancel(self) -> None:
+        """Cancel the current load, if any. Its result will be discarded."""
+
+        if self.current is not None:
+            self.current.cancelled.set()
+            self.current = None
+
+    def work(self, task: LoadTask) -> None:
+        """Runs on the worker thread."""
+
+        try:
+            result = self.run(task)
+        except Exception as e:
+            self.results.put((task, None, e))
+        else:
+            self.results.put((task, result, None))
+
+    def poll(self) -> None:
+        """Runs on the Tk thread. Delivers finished loads and reschedules itself while a load is running."""
+
+        while True:
+            try:
+                task, result, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if task is not self.current or task.cancelled.is_set():
+                continue  # Superseded by a newer load
+
+            self.current = None
+
+            if error is None:
+                self.on_done(task.url, result)
+            elif not isinstance(error, LoadCancelledError):
+                self.on_error(task.url, error)
+
+        if self.current is not None:
+            self.window.after(POLL_INTERVAL_MS, self.poll)
+        else:
+            self.polling = False
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+from common.dom_mutations import DOMMutations
+from draw_commands.DrawInstruction import DrawInstruction
+from layout.block_layout import BlockLayout
+from layout.document_layout import DocumentLayout
+from layout.layout_element import LayoutElement
+from nodes.element_index import ElementIndex
+from nodes.html_element import HTMLElement
+from nodes.text_element import TextElement
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # Memory budget of the back/forward cache
+
+# Memory per object of a page, measured with `deep_sizeof` on text-heavy and tag-heavy pages, see `estimate_page_size`
+NODE_BYTES = 450  # A DOM node with its attributes, computed style and entries in the element index
+LAYOUT_BYTES = 800  # A layout object
+WORD_BYTES = 130  # A laid out word, i.e. an entry of the display list of a BlockLayout
+COMMAND_BYTES = 250  # A draw command
+
+
+class CachedPage:
+    """Everything needed to show a page again without fetching, parsing, styling and laying it out."""
+
+    def __init__(
+        self,
+        root_node: HTMLElement,
+        element_index: ElementIndex,
+        document: DocumentLayout | None,
+        display_list: list[DrawInstruction],
+        content_height: float,
+        scroll: float,
+        width: int,
+        size: int,
+        dom: DOMMutations | None = None,
+    ):
+        self.root_node = root_node
+        self.element_index = element_index
+        self.document = document  # DocumentLayout laid out for `width`, None if the page came from a snapshot
+        self.display_list = display_list
+        self.content_height = content_height
+        self.scroll = scroll
+        self.width = width
+        self.size = size  # Estimated memory in bytes, see `estimate_page_size`
+        self.dom = (
+            dom  # Mutation API of the page, None if the page came from a snapshot
+        )
+
+
+def estimate_page_size(
+    root_node: HTMLElement,
+    document: DocumentLayout | None,
+    display_list: list[DrawInstruction],
+) -> int:
+    """
+    Estimate the memory used by the DOM tree, element index, layout tree and display list of a page from the number
+    of their objects and characters. Runs on the Tk thread at every navigation, so unlike `deep_sizeof`, which takes
+    seconds on large pages, the objects are only counted.
+    """
+
+    size = len(display_list) * COMMAND_BYTES
+
+    nodes = [root_node]
+    while nodes:
+        node = nodes.pop()
+        size += NODE_BYTES
+        if isinstance(node, TextElement):
+            size += node.length
+        nodes.extend(node.children)
+
+    layouts: list[LayoutElement] = [document] if document is not None else []
+    while layouts:
+        layout = layouts.pop()
+        size += LAYOUT_BYTES
+        if isinstance(layout, BlockLayout):
+            size += len(layout.display_list) * WORD_BYTES
+        layouts.extend(layout.children)
+
+    return size
+
+
+class BackForwardCache:
+    """
+    A bounded cache of recently left pages, keyed by URL, for instant back/forward navigation.
+    When the estimated memory of all cached pages exceeds `max_bytes`, the least recently used pages are evicted.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.pages: OrderedDict[str, CachedPage] = (
+            OrderedDict()
+        )  # Least recently used first
+        self.total_bytes = 0
+
+    def put(self, url: str, page: CachedPage) -> None:
+        """Cache a page. Pages larger than the whole budget are not cached."""
+
+        self.take(url)  # Replace an older version of the page
+
+        if page.size > self.max_bytes:
+            return
+
+        self.pages[url] = page
+        self.total_bytes += page.size
+
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.pages.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def take(self, url: str) -> CachedPage | None:
+        """Remove and return the cached page of the URL. Returns None if the page is not cached."""
+
+        page = self.pages.pop(url, None)
+        if page is not None:
+            self.total_bytes -= page.size
+        return page
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.pages
+
+    def __len__(self) -> int:
+        return len(self.pages)
@@ -1 +1,9 @@
 HSTEP, VSTEP = 13, 18
+
+# Size of the window when the browser starts
+INITIAL_WIDTH = 800
+INITIAL_HEIGHT = 600
+
+# Seconds for connecting, sending the request and reading the response
+DEFAULT_TIMEOUT = 30.0
+MAX_CONNECTIONS_PER_HOST = 6  # Like most browsers
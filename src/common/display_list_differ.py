@@ -0,0 +1,128 @@
+from tkinter import Canvas
+
+from draw_commands.DrawInstruction import DrawInstruction
+
+DIFF_TAG = "diffed"  # Canvas tag of all items drawn by the DisplayListDiffer
+
+
+class DisplayListDiffer:
+    """
+    Draws the visible part of a display list by updating the canvas items of the previous frame instead of
+    recreating all of them. Commands are matched with the previously drawn commands by their content (`key`),
+    then by their content except coordinates (`identity`), so unchanged items stay, moved items get new coordinates
+    (e.g. words that wrapped differently after a resize) and only the rest is created or deleted.
+    Scrolling moves all items at once. The size of the diff of the last frame is kept in `created`, `moved` and `deleted`.
+    """
+
+    def __init__(self, canvas: Canvas):
+        self.canvas = canvas
+        self.items: list[tuple[int, DrawInstruction]] = []  # Drawn items in paint order
+        # Scroll position the canvas items are currently drawn for
+        self.offset: float = 0
+
+        self.created = 0
+        self.moved = 0
+        self.deleted = 0
+        self.kept = 0  # Items left unchanged by the last frame
+
+    def render(
+        self, display_list: list[DrawInstruction], scroll: float, height: float
+    ) -> None:
+        """Show the commands of the display list between `scroll` and `scroll + height`."""
+
+        if scroll != self.offset:
+            self.canvas.move(DIFF_TAG, 0, self.offset - scroll)
+            self.offset = scroll
+
+        visible = [
+            cmd
+            for cmd in display_list
+            if cmd.top <= scroll + height and cmd.bottom >= scroll
+        ]
+
+        # Previous items by content and by content without coordinates, last painted first so `pop` returns the first
+        by_key: dict[tuple, list[int]] = {}
+        by_identity: dict[tuple, list[int]] = {}
+        for item, cmd in reversed(self.items):
+            by_key.setdefault(cmd.key(), []).append(item)
+        reused: set[int] = set()
+
+        new_items: list[int | None] = []
+        unmatched: list[int] = []
+        for i, cmd in enumerate(visible):
+            candidates = by_key.get(cmd.key())
+            if candidates:
+                item = candidates.pop()
+                reused.add(item)
+                new_items.append(item)
+            else:
+                new_items.append(None)
+                unmatched.append(i)
+        self.kept = len(reused)
+
+        for item, cmd in reversed(self.items):
+            if item not in reused:
+                by_identity.setdefault(cmd.identity(), []).append(item)
+
+        self.moved = 0
+        for i in unmatched:
+            cmd = visible[i]
+            candidates = by_identity.get(cmd.identity())
+            if candidates:
+                item = candidates.pop()
+                cmd.move(item, self.offset, self.canvas)
+                reused.add(item)
+                new_items[i] = item
+                self.moved += 1
+
+        stale = [item for item, _ in self.items if item not in reused]
+        if stale:
+            self.canvas.delete(*stale)
+        self.deleted = len(stale)
+
+        # Created items are stacked on top, so those before a reused item are moved down to their place in paint order.
+        # Reused items stacked below an earlier reused item (their order changed) are raised to their place as well.
+        rank = {item: i for i, (item, _) in enumerate(self.items)}
+        last_reused = max(
+            (i for i, item in enumerate(new_items) if item is not None), default=-1
+        )
+        self.created = 0
+        previous: int | None = None
+        max_rank = -1
+        for i, cmd in enumerate(visible):
+            item = new_items[i]
+            if item is None:
+                item = cmd.execute(self.offset, self.canvas)
+                if i < last_reused:
+                    self.restack(item, previous)
+                self.canvas.addtag_withtag(DIFF_TAG, item)
+                new_items[i] = item
+                self.created += 1
+            elif rank[item] < max_rank:
+                self.restack(item, previous)
+            else:
+                max_rank = rank[item]
+            previous = item
+
+        self.items = list(zip(new_items, visible))  # type: ignore
+
+    def restack(self, item: int, previous: int | None) -> None:
+        """Stack the item right above the previous item in paint order, or below all items if it is the first."""
+
+        if previous is None:
+            self.canvas.tag_lower(item, DIFF_TAG)
+        else:
+            self.canvas.tag_raise(item, previous)
+
+    @property
+    def diff_size(self) -> int:
+        """Number of canvas operations of the last frame, not counting the single move of a scroll."""
+
+        return self.created + self.moved + self.deleted
+
+    def clear(self) -> None:
+        """Delete all canvas items, e.g. before drawing with another renderer."""
+
+        self.canvas.delete(DIFF_TAG)
+        self.items = []
+        self.offset = 0
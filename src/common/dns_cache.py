@@ -0,0 +1,191 @@
+import errno
+import os
+import selectors
+import socket
+import threading
+import time
+from typing import Callable
+
+# getaddrinfo does not report the TTL of the DNS records, so all entries live for the same time
+DEFAULT_TTL = 60.0
+NEGATIVE_TTL = 10.0  # Seconds failed lookups are cached
+# Seconds before trying the next address, as recommended by RFC 8305
+FALLBACK_DELAY = 0.25
+
+# (family, type, proto, canonname, sockaddr) as returned by getaddrinfo
+AddressInfo = tuple[int, int, int, str, tuple]
+
+
+class DNSCache:
+    """
+    Caches the results of `getaddrinfo` by host and port, so a page and its stylesheets only look up their host once.
+    Failed lookups are cached as well (for a shorter time). Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        resolver: Callable[..., list[AddressInfo]] = socket.getaddrinfo,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        # (host, port) -> (expiry time, addresses or the error of the lookup)
+        self.entries: dict[
+            tuple[str, int], tuple[float, list[AddressInfo] | OSError]
+        ] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> list[AddressInfo]:
+        """Return the TCP addresses of the host, ordered for connecting (see `interleave`). Raises the OSError of a failed lookup."""
+
+        result = self.cached(host, port)
+        if result is None:
+            result = self.lookup(host, port)
+        return addresses_or_raise(result)
+
+    def cached(self, host: str, port: int) -> list[AddressInfo] | OSError | None:
+        """The result of an unexpired earlier lookup (counted as a hit), or None (counted as a miss)."""
+
+        with self.lock:
+            entry = self.entries.get((host, port))
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def lookup(self, host: str, port: int) -> list[AddressInfo] | OSError:
+        """Look up the host with the resolver and cache the addresses or the error."""
+
+        # Looked up without holding the lock, so slow lookups don't block requests to other hosts
+        try:
+            result: list[AddressInfo] | OSError = interleave(
+                self.resolver(host, port, type=socket.SOCK_STREAM)
+            )
+            expiry = self.clock() + self.ttl
+        except OSError as e:
+            result = e
+            expiry = self.clock() + self.negative_ttl
+
+        with self.lock:
+            self.entries[(host, port)] = (expiry, result)
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def addresses_or_raise(result: list[AddressInfo] | OSError) -> list[AddressInfo]:
+    """
+    Return the addresses of a lookup result, or raise its error. Cached errors are raised as a new exception
+    each time, raising the cached instance again would add to its traceback on every lookup.
+    """
+
+    if isinstance(result, OSError):
+        raise type(result)(*result.args)
+    return result
+
+
+def interleave(addresses: list[AddressInfo]) -> list[AddressInfo]:
+    """Alternate between address families, starting with the family of the first address (RFC 8305, section 4)."""
+
+    families: dict[int, list[AddressInfo]] = {}
+    for address in addresses:
+        families.setdefault(address[0], []).append(address)
+
+    ordered: list[AddressInfo] = []
+    queues = list(families.values())
+    while queues:
+        ordered.extend(queue.pop(0) for queue in queues)
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def connect(
+    addresses: list[AddressInfo],
+    timeout: float | None = None,
+    fallback_delay: float = FALLBACK_DELAY,
+) -> socket.socket:
+    """
+    Connect to the first address that accepts the connection ("Happy Eyeballs"). If an attempt has not succeeded
+    after `fallback_delay`, the next address is tried while the earlier attempts continue. Returns a blocking socket.
+    """
+
+    if not addresses:
+        raise OSError("No addresses to connect to")
+
+    pending = list(addresses)
+    attempts: list[socket.socket] = []
+    errors: list[OSError] = []
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    with selectors.DefaultSelector() as selector:
+        try:
+            while pending or attempts:
+                if pending:
+                    family, type, proto, _, sockaddr = pending.pop(0)
+                    sock = socket.socket(family, type, proto)
+                    sock.setblocking(False)
+                    error = sock.connect_ex(sockaddr)
+                    if error == 0:
+                        attempts.append(sock)
+                        return finish_connect(sock, attempts, timeout)
+                    if error not in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        sock.close()
+                        errors.append(OSError(error, os.strerror(error)))
+                        continue
+                    selector.register(sock, selectors.EVENT_WRITE)
+                    attempts.append(sock)
+
+                wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if pending:
+                    wait = fallback_delay if wait is None else min(wait, fallback_delay)
+
+                for key, _ in selector.select(wait):
+                    sock = key.fileobj  # type: ignore
+                    selector.unregister(sock)
+                    error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if error == 0:
+                        return finish_connect(sock, attempts, timeout)
+                    attempts.remove(sock)
+                    sock.close()
+                    errors.append(OSError(error, os.strerror(error)))
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("Timed out connecting")
+        except BaseException:
+            for sock in attempts:
+                sock.close()
+            raise
+
+    raise errors[-1]
+
+
+def finish_connect(
+    sock: socket.socket, attempts: list[socket.socket], timeout: float | None
+) -> socket.socket:
+    """Close the attempts other than the connected socket and make it blocking."""
+
+    for other in attempts:
+        if other is not sock:
+            other.close()
+    sock.settimeout(timeout)
+    return sock
+
+
+def create_connection(
+    host: str, port: int, cache: DNSCache | None = None, timeout: float | None = None
+) -> socket.socket:
+    """Connect to the host, using the shared DNS cache unless another cache is given."""
+
+    return connect((cache or DNS_CACHE).resolve(host, port), timeout)
+
+
+DNS_CACHE = DNSCache()  # Shared by all requests
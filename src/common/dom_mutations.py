@@ -0,0 +1,170 @@
+from typing import Callable
+
+from css_parser.base_selector import BaseCSSSelector
+from css_parser.regex_css_parser import RegexCSSParser
+from css_parser.style import Restyler
+from nodes.element_index import ElementIndex
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+
+# Work needed to show the mutated document, in increasing order
+NO_DAMAGE = 0
+REPAINT = 1  # Only the display list has to be rebuilt
+RELAYOUT = 2  # The document has to be laid out and painted again
+
+# Properties that are only read when painting, so changing them does not need a new layout
+PAINT_PROPERTIES = frozenset(["background-color"])
+
+
+class DOMMutations:
+    """
+    Changes a styled document and keeps its styles up to date. Each mutation restyles only the nodes it
+    invalidates: the node itself, its descendants if a descendant selector checks a changed class or ID on its ancestors,
+    and the descendants whose inherited values changed. It also records the damage, i.e. whether the page has to be
+    laid out again or only repainted. `on_damage` is called when the damage grows, e.g. to schedule an update.
+    """
+
+    def __init__(
+        self,
+        element_index: ElementIndex,
+        rules: list[tuple[BaseCSSSelector, dict[str, str]]],
+        on_damage: Callable[[], None] | None = None,
+    ):
+        self.element_index = element_index
+        self.restyler = Restyler(rules)
+        self.on_damage = on_damage
+        self.damage = NO_DAMAGE  # Damage since the last `take_damage`
+        self.mutations = 0  # Number of mutations
+        self.nodes_restyled = 0  # Number of nodes restyled by all mutations
+        self.last_restyled = 0  # Number of nodes restyled by the last mutation
+
+    def set_attribute(self, node: TAGElement, name: str, value: str | None):
+        """Set an attribute of the element. A value of None removes the attribute."""
+
+        old = node.attributes.get(name)
+        if old == value:
+            self.record(0)
+            return
+
+        old_keys = element_keys(node)
+        if name in ("class", "id"):
+            self.element_index.remove(node)
+
+        if value is None:
+            del node.attributes[name]
+        else:
+            node.attributes[name] = value
+
+        if name in ("class", "id"):
+            self.element_index.add(node)
+
+        if name == "style":
+            self.restyle(node, subtree=False)
+        elif name in ("class", "id"):
+            changed = old_keys ^ element_keys(node)
+            if changed & self.restyler.ancestor_keys:
+                self.restyle(node, subtree=True)
+            elif changed & self.restyler.subject_keys:
+                self.restyle(node, subtree=False)
+            else:
+                self.record(0)  # No rule checks the changed class names or ID
+        else:
+            self.record(0)  # Other attributes are not used by selectors
+
+    def set_inline_style(self, node: TAGElement, prop: str, value: str | None):
+        """Set a property of the `style` attribute of the element. A value of None removes the property."""
+
+        declarations = RegexCSSParser(node.attributes.get("style", "")).body()
+        if value is None:
+            declarations.pop(prop, None)
+        else:
+            declarations[prop] = value
+
+        style = "; ".join(f"{key}: {val}" for key, val in declarations.items())
+        self.set_attribute(node, "style", style or None)
+
+    def insert_child(
+        self, parent: TAGElement, child: HTMLElement, index: int | None = None
+    ):
+        """Insert a detached node (with its subtree) as a child of the parent, at the end if `index` is None."""
+
+        assert child.parent is None, "Node is already in a document."
+
+        child.parent = parent
+        if index is None:
+            parent.children.append(child)
+        else:
+            parent.children.insert(index, child)
+
+        for node in subtree(child):
+            if isinstance(node, TAGElement):
+                self.element_index.add(node)
+
+        self.restyle(child, subtree=True)
+        self.add_damage(RELAYOUT)
+
+    def remove_child(self, parent: TAGElement, child: HTMLElement):
+        """Remove a child (with its subtree) from the parent. No other node needs a new style."""
+
+        parent.children.remove(child)
+        child.parent = None
+
+        for node in subtree(child):
+            if isinstance(node, TAGElement):
+                self.element_index.remove(node)
+
+        self.record(0)
+        self.add_damage(RELAYOUT)
+
+    def set_text(self, node: TextElement, text: str):
+        node.text = text
+        self.record(0)
+        self.add_damage(RELAYOUT)
+
+    def restyle(self, node: HTMLElement, subtree: bool):
+        self.restyler.changed_properties.clear()
+        self.record(self.restyler.restyle(node, subtree))
+
+        changed = self.restyler.changed_properties
+        if changed - PAINT_PROPERTIES:
+            self.add_damage(RELAYOUT)
+        elif changed:
+            self.add_damage(REPAINT)
+
+    def record(self, restyled: int):
+        self.mutations += 1
+        self.nodes_restyled += restyled
+        self.last_restyled = restyled
+
+    def add_damage(self, damage: int):
+        if damage > self.damage:
+            self.damage = damage
+            if self.on_damage is not None:
+                self.on_damage()
+
+    def take_damage(self) -> int:
+        """Return and reset the damage of the mutations since the last call."""
+
+        damage, self.damage = self.damage, NO_DAMAGE
+        return damage
+
+
+def element_keys(node: TAGElement) -> set[tuple[str, str]]:
+    """The `("class", name)` and `("id", name)` keys of the element, see `BaseCSSSelector.keys`."""
+
+    keys = {("class", class_name) for class_name in node.classes}
+    element_id = node.attributes.get("id")
+    if element_id:
+        keys.add(("id", element_id))
+    return keys
+
+
+def subtree(node: HTMLElement) -> list[HTMLElement]:
+    nodes = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children)
+    return nodes
@@ -8,6 +8,10 @@ FONTS: Dict[
     Tuple[tkinter.font.Font, tkinter.Label],
 ] = {}
 
+FONT_KEYS: Dict[int, Tuple[int, str, str, bool]] = (
+    {}
+)  # Reverse lookup from id() of a cached font to its key in FONTS
+
 
 def get_font(
     size: int,
@@ -29,5 +33,12 @@ def get_font(
         )
         label = tkinter.Label(font=font)
         FONTS[key] = (font, label)
+        FONT_KEYS[id(font)] = key
 
     return FONTS[key][0]
+
+
+def get_font_key(font: tkinter.font.Font) -> Tuple[int, str, str, bool]:
+    """Returns the `(size, weight, slant, underline)` arguments a font was created with by `get_font`."""
+
+    return FONT_KEYS[id(font)]
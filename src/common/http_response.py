@@ -0,0 +1,119 @@
+import codecs
+import re
+import socket
+
+RECEIVE_SIZE = 64 * 1024  # Bytes requested per `recv` call
+MAX_HEADER_SIZE = 64 * 1024
+DEFAULT_CHARSET = "utf-8"
+META_PRESCAN_SIZE = (
+    1024  # Bytes of the body searched for a <meta> charset, as in the HTML spec
+)
+
+CHARSET_PARAMETER = re.compile(rb"""charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+META_TAG = re.compile(rb"<meta\b[^>]*>", re.IGNORECASE)
+
+
+class HTTPResponse:
+    """Status line, headers (with casefolded names) and raw body of an HTTP response."""
+
+    def __init__(
+        self,
+        version: str,
+        status: int,
+        reason: str,
+        headers: dict[str, str],
+        body: bytes | bytearray,
+    ):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def charset(self) -> str:
+        """
+        The character encoding of the body: the charset of the Content-Type header, else the charset of a
+        `<meta charset>` or `<meta http-equiv="Content-Type">` tag at the start of the body, else UTF-8.
+        """
+
+        match = CHARSET_PARAMETER.search(
+            self.headers.get("content-type", "").encode("latin-1")
+        )
+        if match is None:
+            for meta in META_TAG.finditer(self.body, 0, META_PRESCAN_SIZE):
+                match = CHARSET_PARAMETER.search(meta.group())
+                if match is not None:
+                    break
+
+        if match is None:
+            return DEFAULT_CHARSET
+
+        charset = match.group(1).decode("ascii")
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            return DEFAULT_CHARSET
+
+    def text(self) -> str:
+        """Decode the body once, using `charset`. Invalid bytes are replaced."""
+
+        return self.body.decode(self.charset(), errors="replace")
+
+
+def parse_head(head: bytes) -> tuple[str, int, str, dict[str, str]]:
+    """
+    Parse the status line and headers (without the blank line ending them).
+    Returns the HTTP version, status code, reason phrase and headers.
+    """
+
+    lines = head.decode("latin-1").split("\r\n")
+
+    version, status, *reason = lines[0].split(" ", 2)
+
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+        name, value = line.split(":", 1)
+        headers[name.casefold()] = value.strip()
+
+    return version, int(status), reason[0] if reason else "", headers
+
+
+def read_response(sock: socket.socket) -> HTTPResponse:
+    """
+    Read an HTTP/1.0 response from the socket. Headers are parsed from a bytes buffer. If the response
+    has a Content-Length, the body is received directly into a preallocated buffer, otherwise it is read
+    until the server closes the connection.
+    """
+
+    buffer = bytearray()
+    while (end := buffer.find(b"\r\n\r\n")) == -1:
+        if len(buffer) > MAX_HEADER_SIZE:
+            raise ValueError("Response headers are too large")
+        data = sock.recv(RECEIVE_SIZE)
+        if not data:
+            raise ConnectionError("Connection closed before the end of the headers")
+        buffer += data
+
+    version, status, reason, headers = parse_head(bytes(buffer[:end]))
+    start = buffer[end + 4 :]
+
+    if "content-length" in headers:
+        body = bytearray(int(headers["content-length"]))
+        received = min(len(start), len(body))
+        body[:received] = start[:received]
+
+        with memoryview(body) as view:
+            while received < len(body):
+                count = sock.recv_into(view[received:])
+                if count == 0:
+                    raise ConnectionError(
+                        f"Connection closed after {received} of {len(body)} body bytes"
+                    )
+                received += count
+    else:
+        chunks = [bytes(start)]
+        while data := sock.recv(RECEIVE_SIZE):
+            chunks.append(data)
+        body = b"".join(chunks)
+
+    return HTTPResponse(version, status, reason, headers, body)
@@ -0,0 +1,199 @@
+import json
+import sys
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from types import FunctionType, MethodType, ModuleType
+from typing import Iterable, Iterator
+
+SKIPPED_TYPES = (type, ModuleType, FunctionType, MethodType)
+ATOMIC_TYPES = (str, bytes, int, float, bool)
+
+
+def walk_objects(
+    roots: Iterable[object], exclude: Iterable[object] = ()
+) -> Iterator[object]:
+    """
+    Yield every object reachable from `roots` once. Objects in `exclude` (and objects only reachable through them) are skipped.
+
+    Follows containers (dict, list, tuple, set), instance `__dict__`s and `__slots__`. Classes, modules, functions and
+    Tk objects (e.g. the cached fonts referenced by draw commands) are skipped since they are shared by all pages.
+    """
+
+    seen: set[int] = {id(obj) for obj in exclude}
+    stack = list(roots)
+
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, SKIPPED_TYPES) or type(obj).__module__.startswith("tkinter"):
+            continue
+
+        yield obj
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, ATOMIC_TYPES):
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    stack.append(getattr(obj, slot, None))
+
+
+def deep_sizeof(roots: Iterable[object], exclude: Iterable[object] = ()) -> int:
+    """Estimate the memory (in bytes) used by the objects reachable from `roots`, counting every object once. See `walk_objects`."""
+
+    return sum(sys.getsizeof(obj) for obj in walk_objects(roots, exclude))
+
+
+def measure_tree(roots: Iterable[object], exclude: Iterable[object] = ()) -> dict:
+    """Return the deep size and the number of objects per type (e.g. `{"TextElement": 120, "tuple": 40, ...}`) reachable from `roots`."""
+
+    size = 0
+    counts: Counter[str] = Counter()
+    for obj in walk_objects(roots, exclude):
+        size += sys.getsizeof(obj)
+        counts[type(obj).__name__] += 1
+
+    return {"bytes": size, "objects": dict(counts.most_common())}
+
+
+class MemoryReport:
+    """Memory measurements of one page load, filled by the MemoryProfiler."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.stages: list[dict] = []  # One entry per pipeline stage, in order
+        self.trees: dict[str, dict] = {}  # See `MemoryProfiler.measure_trees`
+
+    def to_json(self) -> dict:
+        return {"url": self.url, "stages": self.stages, "trees": self.trees}
+
+
+class MemoryProfiler:
+    """
+    Memory profiling mode of the browser. Takes tracemalloc snapshots around the stages of a page load
+    (parse, style, layout, paint), measures the resulting trees and prints the report or dumps it as JSON.
+
+    When disabled, all methods do nothing, so the browser can call them unconditionally.
+    """
+
+    def __init__(
+        self, enabled: bool = False, report_path: str | None = None, top: int = 10
+    ):
+        self.enabled = enabled
+        self.report_path = (
+            report_path  # JSON file to write the reports to, printed to stdout if None
+        )
+        self.top = top  # Number of allocation sites reported per stage
+        self.reports: list[MemoryReport] = []
+
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin_load(self, url: str) -> MemoryReport | None:
+        """Start the report of a page load. Returns None when profiling is disabled."""
+
+        if not self.enabled:
+            return None
+        return MemoryReport(url)
+
+    @contextmanager
+    def stage(self, report: MemoryReport | None, name: str) -> Iterator[None]:
+        """Record the memory allocated by the code in the `with` block as stage `name` of the report."""
+
+        if report is None:
+            yield
+            return
+
+        before = self.snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        yield
+
+        _, peak = tracemalloc.get_traced_memory()
+        after = self.snapshot()
+
+        stats = after.compare_to(before, "lineno")
+        report.stages.append(
+            {
+                "stage": name,
+                "allocated_bytes": sum(stat.size_diff for stat in stats),
+                "allocated_blocks": sum(stat.count_diff for stat in stats),
+                "peak_bytes": peak - current_before,
+                "top": [
+                    {
+                        "location": str(stat.traceback[0]),
+                        "size_diff": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in stats[: self.top]
+                ],
+            }
+        )
+
+    def snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+
+    def measure_trees(
+        self,
+        report: MemoryReport | None,
+        dom_nodes: list[object],
+        layout_elements: list[object],
+        display_list: list[object],
+    ) -> None:
+        """
+        Record object counts and deep sizes of the DOM tree, the computed styles, the layout tree, the line tuples
+        (`BlockLayout.display_list`) and the draw commands. Every object is attributed to exactly one of them.
+        """
+
+        if report is None:
+            return
+
+        styles = [getattr(node, "style") for node in dom_nodes]
+        lines = [getattr(layout, "display_list", []) for layout in layout_elements]
+
+        report.trees = {
+            "dom": measure_tree(dom_nodes, exclude=styles),
+            "styles": measure_tree(styles),
+            "layout": measure_tree(layout_elements, exclude=dom_nodes + lines),
+            "lines": measure_tree(lines, exclude=dom_nodes),
+            "draw_commands": measure_tree(display_list, exclude=dom_nodes),
+        }
+
+    def finish_load(self, report: MemoryReport | None) -> None:
+        """Add the report of a finished load and print or dump all reports."""
+
+        if report is None:
+            return
+
+        self.reports.append(report)
+
+        if self.report_path is None:
+            self.print_report(report)
+        else:
+            with open(self.report_path, "w", encoding="utf-8") as file:
+                json.dump([r.to_json() for r in self.reports], file, indent=2)
+
+    def print_report(self, report: MemoryReport) -> None:
+        print(f"Memory report for {report.url}")
+        for stage in report.stages:
+            print(
+                f"  {stage['stage']:<8} {stage['allocated_bytes'] / 1024:>10.1f} KB allocated, {stage['peak_bytes'] / 1024:>10.1f} KB peak"
+            )
+        for name, tree in report.trees.items():
+            objects = ", ".join(
+                f"{count} {type_name}"
+                for type_name, count in list(tree["objects"].items())[:4]
+            )
+            print(f"  {name:<14} {tree['bytes'] / 1024:>10.1f} KB ({objects})")
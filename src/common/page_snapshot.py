@@ -0,0 +1,442 @@
+import hashlib
+import mmap
+import os
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from draw_commands.DrawInstruction import DrawInstruction
+from draw_commands.DrawRect import DrawRect
+from draw_commands.DrawText import DrawText
+from nodes.computed_style import ComputedStyle, InheritedStyle
+from nodes.element_index import ElementIndex
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+
+FORMAT_VERSION = 1
+MAGIC = b"BESN"
+
+# All integers are little-endian. See `write_snapshot` for the layout of the file.
+HEADER = struct.Struct("<4sHHIIIIIIId")
+# kind, parent, name or text, attribute start, attribute count, style start, style count, inherited style
+NODE = struct.Struct("<BiIIHIHI")
+PAIR = struct.Struct("<II")  # key string, value string
+INHERITED = struct.Struct("<IIII")  # one string per INHERITED_PROPERTIES entry
+# kind, left, top, right, bottom, text, color, font size, bold, italic, underline
+COMMAND = struct.Struct("<BddddIIhBBB")
+OFFSET = struct.Struct("<I")
+
+TAG_NODE, TEXT_NODE = 0, 1
+TEXT_COMMAND, RECT_COMMAND = 0, 1
+
+# (size, weight, slant, underline) as used by `get_font`
+FontKey = tuple[int, str, str, bool]
+
+
+class PageSnapshot:
+    """A styled DOM tree and display list read from a snapshot file."""
+
+    def __init__(
+        self,
+        root_node: HTMLElement,
+        element_index: ElementIndex,
+        content_height: float,
+        commands: list[tuple],
+    ):
+        self.root_node = root_node
+        self.element_index = element_index
+        self.content_height = content_height  # Height of the laid out document
+        self.commands = commands  # Raw draw commands, see `display_list`
+
+    def display_list(self, get_font: Callable[..., object]) -> list[DrawInstruction]:
+        """Create the draw commands. Must run on the Tk thread because it creates fonts."""
+
+        display_list: list[DrawInstruction] = []
+        for kind, left, top, right, bottom, text, color, font_key in self.commands:
+            if kind == RECT_COMMAND:
+                display_list.append(DrawRect(left, top, right, bottom, color))
+            else:
+                size, weight, slant, underline = font_key
+                font = get_font(
+                    size=size, weight=weight, slant=slant, underline=underline
+                )
+                display_list.append(DrawText(text, left, top, font, color))  # type: ignore
+        return display_list
+
+
+def snapshot_key(source: Iterable[str], width: int) -> str:
+    """Key of the snapshot of a page: a hash of its source (in chunks, see `URL.request_chunks`) and the viewport width it was laid out for."""
+
+    digest = hashlib.sha256()
+    for chunk in source:
+        digest.update(chunk.encode("utf-8"))
+    digest.update(f"\0{width}\0{FORMAT_VERSION}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class StringTable:
+    """Assigns every distinct string an index, so each string is stored only once in the file."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def id(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+
+def snapshot_commands(
+    display_list: list[DrawInstruction], font_key: Callable[[object], FontKey]
+) -> list[tuple]:
+    """
+    The draw commands as plain tuples of strings and numbers, in the format of `PageSnapshot.commands`.
+    Runs on the Tk thread, which owns the fonts, so the snapshot can be written on another thread.
+    """
+
+    commands: list[tuple] = []
+    for cmd in display_list:
+        if isinstance(cmd, DrawText):
+            commands.append(
+                (
+                    TEXT_COMMAND,
+                    cmd.left,
+                    cmd.top,
+                    0,
+                    cmd.bottom,
+                    cmd.text,
+                    cmd.color,
+                    font_key(cmd.font),
+                )
+            )
+        elif isinstance(cmd, DrawRect):
+            commands.append(
+                (
+                    RECT_COMMAND,
+                    cmd.left,
+                    cmd.top,
+                    cmd.right,
+                    cmd.bottom,
+                    "",
+                    cmd.color,
+                    None,
+                )
+            )
+        else:
+            raise TypeError(f"Cannot snapshot draw command {cmd!r}")
+    return commands
+
+
+def write_snapshot(
+    path: str,
+    root_node: HTMLElement,
+    content_height: float,
+    commands: list[tuple],
+) -> None:
+    """
+    Write the styled DOM tree and the draw commands (see `snapshot_commands`) to a snapshot file.
+
+    The file consists of a header, a string table (offsets followed by a UTF-8 blob) and flat arrays of fixed-size
+    records: attribute pairs, own style pairs, interned inherited styles, nodes in document order (children reference
+    their parent by position) and draw commands. Strings are referenced by their position in the string table.
+    """
+
+    strings = StringTable()
+    nodes = bytearray()
+    attributes = bytearray()
+    styles = bytearray()
+    inherited_styles = bytearray()
+    inherited_ids: dict[int, int] = {}  # id(InheritedStyle) -> position
+    command_records = bytearray()
+    counts = {"nodes": 0, "attributes": 0, "styles": 0, "inherited": 0}
+
+    def inherited_id(inherited: InheritedStyle) -> int:
+        if id(inherited) not in inherited_ids:
+            inherited_ids[id(inherited)] = counts["inherited"]
+            counts["inherited"] += 1
+            inherited_styles.extend(
+                INHERITED.pack(*(strings.id(value) for value in inherited.values))
+            )
+        return inherited_ids[id(inherited)]
+
+    # Iterative pre-order traversal so deep documents don't hit the recursion limit
+    stack: list[tuple[HTMLElement, int]] = [(root_node, -1)]
+    while stack:
+        node, parent = stack.pop()
+        position = counts["nodes"]
+        counts["nodes"] += 1
+
+        if isinstance(node, TAGElement):
+            assert isinstance(node.style, ComputedStyle), "Node is not styled."
+            own = node.style.own or {}
+            nodes.extend(
+                NODE.pack(
+                    TAG_NODE,
+                    parent,
+                    strings.id(node.tag_name),
+                    counts["attributes"],
+                    len(node.attributes),
+                    counts["styles"],
+                    len(own),
+                    inherited_id(node.style.inherited),
+                )
+            )
+            for key, value in node.attributes.items():
+                attributes.extend(PAIR.pack(strings.id(key), strings.id(value)))
+            for prop, value in own.items():
+                styles.extend(PAIR.pack(strings.id(prop), strings.id(value)))
+            counts["attributes"] += len(node.attributes)
+            counts["styles"] += len(own)
+        else:
+            assert isinstance(node, TextElement), f"Unknown node {node!r}"
+            assert isinstance(node.style, InheritedStyle), "Node is not styled."
+            nodes.extend(
+                NODE.pack(
+                    TEXT_NODE,
+                    parent,
+                    strings.id(node.text),
+                    0,
+                    0,
+                    0,
+                    0,
+                    inherited_id(node.style),
+                )
+            )
+
+        stack.extend((child, position) for child in reversed(node.children))
+
+    for kind, left, top, right, bottom, text, color, font_key in commands:
+        size, weight, slant, underline = font_key or (0, "normal", "roman", False)
+        command_records.extend(
+            COMMAND.pack(
+                kind,
+                left,
+                top,
+                right,
+                bottom,
+                strings.id(text) if kind == TEXT_COMMAND else 0,
+                strings.id(color),
+                size,
+                weight == "bold",
+                slant == "italic",
+                underline,
+            )
+        )
+
+    encoded = [string.encode("utf-8") for string in strings.strings]
+    offsets = bytearray()
+    offset = 0
+    for data in encoded:
+        offsets.extend(OFFSET.pack(offset))
+        offset += len(data)
+    offsets.extend(OFFSET.pack(offset))
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(encoded),
+        offset,
+        counts["nodes"],
+        counts["attributes"],
+        counts["styles"],
+        counts["inherited"],
+        len(commands),
+        content_height,
+    )
+
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        for section in [header, offsets, *encoded]:
+            file.write(section)
+        for section in [attributes, styles, inherited_styles, nodes, command_records]:
+            file.write(section)
+    os.replace(temporary_path, path)  # Readers never see a partially written file
+
+
+def read_snapshot(path: str) -> PageSnapshot:
+    """
+    Read a snapshot file written by `write_snapshot`. The file is memory-mapped and the records are decoded
+    directly from the mapping. Raises a ValueError if the file is not a snapshot of the current format version.
+    """
+
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return decode_snapshot(memoryview(data))
+            except (ValueError, IndexError, struct.error) as e:
+                # Only the message is kept: the traceback references views of the mapping, which prevent closing it
+                error = str(e)
+
+    raise ValueError(f"Invalid snapshot: {error}")
+
+
+def decode_snapshot(data: memoryview) -> PageSnapshot:
+    if len(data) < HEADER.size or bytes(data[:4]) != MAGIC:
+        raise ValueError("Not a snapshot.")
+
+    (
+        _magic,
+        version,
+        _,
+        string_count,
+        blob_size,
+        node_count,
+        attribute_count,
+        style_count,
+        inherited_count,
+        command_count,
+        content_height,
+    ) = HEADER.unpack_from(data, 0)
+
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Snapshot format version {version} is not supported.")
+
+    position = HEADER.size
+
+    def section(record: struct.Struct, count: int) -> memoryview:
+        nonlocal position
+        start, position = position, position + record.size * count
+        return data[start:position]
+
+    offsets = [
+        offset for (offset,) in OFFSET.iter_unpack(section(OFFSET, string_count + 1))
+    ]
+    blob = bytes(data[position : position + blob_size])
+    position += blob_size
+    strings = [
+        blob[offsets[i] : offsets[i + 1]].decode("utf-8") for i in range(string_count)
+    ]
+
+    pairs = [
+        (strings[key], strings[value])
+        for key, value in PAIR.iter_unpack(section(PAIR, attribute_count))
+    ]
+    style_pairs = [
+        (strings[key], strings[value])
+        for key, value in PAIR.iter_unpack(section(PAIR, style_count))
+    ]
+    inherited_styles = [
+        InheritedStyle.intern(tuple(strings[i] for i in values))
+        for values in INHERITED.iter_unpack(section(INHERITED, inherited_count))
+    ]
+
+    node_records = section(NODE, node_count)
+    nodes: list[HTMLElement] = []
+    element_index = ElementIndex()
+
+    for (
+        kind,
+        parent,
+        name,
+        attr_start,
+        attr_count,
+        style_start,
+        own_count,
+        inherited,
+    ) in NODE.iter_unpack(node_records):
+        parent_node = nodes[parent] if parent >= 0 else None
+
+        if kind == TAG_NODE:
+            node = TAGElement(
+                strings[name],
+                parent_node,
+                dict(pairs[attr_start : attr_start + attr_count]),
+            )
+            computed = ComputedStyle(inherited_styles[inherited])
+            if own_count:
+                computed.own = dict(style_pairs[style_start : style_start + own_count])
+            node.style = computed
+            element_index.add(node)
+        else:
+            assert parent_node is not None, "Text node without parent."
+            node = TextElement(strings[name], parent_node)
+            node.style = inherited_styles[inherited]
+
+        if parent_node is not None:
+            parent_node.children.append(node)
+        nodes.append(node)
+
+    if not nodes:
+        raise ValueError("Snapshot contains no nodes.")
+
+    commands = [
+        (
+            kind,
+            left,
+            top,
+            right,
+            bottom,
+            strings[text],
+            strings[color],
+            (
+                size,
+                "bold" if bold else "normal",
+                "italic" if italic else "roman",
+                bool(underline),
+            ),
+        )
+        for kind, left, top, right, bottom, text, color, size, bold, italic, underline in COMMAND.iter_unpack(
+            section(COMMAND, command_count)
+        )
+    ]
+
+    return PageSnapshot(nodes[0], element_index, content_height, commands)
+
+
+class PageSnapshotStore:
+    """
+    A directory of page snapshots, keyed by `snapshot_key`. Loading an unchanged page from its snapshot skips parsing,
+    styling and layout. Note that only the page source is part of the key, changed external stylesheets are not detected.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # Writes the snapshots off the Tk thread, one at a time. Pending writes finish before the process exits
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="snapshot writer")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.snapshot")
+
+    def load(self, key: str) -> PageSnapshot | None:
+        """Return the snapshot for the key or None if there is no usable snapshot."""
+
+        try:
+            return read_snapshot(self.path(key))
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Ignoring snapshot {key}: {e}")
+            return None
+
+    def save(
+        self,
+        key: str,
+        root_node: HTMLElement,
+        content_height: float,
+        display_list: list[DrawInstruction],
+        font_key: Callable[[object], FontKey],
+    ) -> Future[None]:
+        """
+        Write the snapshot of a laid out page on the writer thread. Only the draw commands are converted on the
+        calling thread (see `snapshot_commands`), the DOM tree is not changed after loading.
+        """
+
+        commands = snapshot_commands(display_list, font_key)
+        return self.writer.submit(self.write, key, root_node, content_height, commands)
+
+    def write(
+        self,
+        key: str,
+        root_node: HTMLElement,
+        content_height: float,
+        commands: list[tuple],
+    ) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            write_snapshot(self.path(key), root_node, content_height, commands)
+        except OSError as e:
+            print(f"Failed to write snapshot {key}: {e}")
@@ -0,0 +1,131 @@
+import bisect
+import json
+import math
+from collections import deque
+from tkinter import Canvas
+
+HUD_TAG = "hud"  # Canvas tag of the items of the performance HUD
+HISTORY_SIZE = 500  # Number of recent samples kept per metric
+# Upper bounds (in milliseconds) of the histogram buckets, the last bucket counts everything above
+BUCKETS_MS = (1, 2, 4, 8, 16, 33, 50, 100, 250, 500, 1000)
+HUD_WIDTH = 260
+HUD_LINE_HEIGHT = 16
+HUD_MARGIN = 8
+
+
+class RollingHistogram:
+    """The last `size` samples of a metric in milliseconds, with their percentiles and bucket counts."""
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self.samples: deque[float] = deque(maxlen=size)
+        self.total = 0  # Number of samples ever added, including the dropped ones
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+        self.total += 1
+
+    @property
+    def last(self) -> float | None:
+        return self.samples[-1] if self.samples else None
+
+    def percentile(self, p: float) -> float | None:
+        """The smallest sample that at least `p` percent of the samples are less than or equal to."""
+
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = math.ceil(len(ordered) * p / 100) - 1
+        return ordered[min(max(index, 0), len(ordered) - 1)]
+
+    def buckets(self) -> list[int]:
+        """Number of samples per bucket of BUCKETS_MS, plus one bucket for the samples above the last bound."""
+
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for value in self.samples:
+            counts[bisect.bisect_left(BUCKETS_MS, value)] += 1
+        return counts
+
+    def to_json(self) -> dict:
+        return {
+            "total": self.total,
+            "samples": len(self.samples),
+            "last": self.last,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.samples, default=None),
+            "buckets_ms": list(BUCKETS_MS),
+            "counts": self.buckets(),
+        }
+
+
+class PerfStats:
+    """Rolling histograms of the timings (in milliseconds) of the browser, by name, e.g. "draw" or "layout"."""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.history_size = history_size
+        self.histograms: dict[str, RollingHistogram] = {}
+
+    def record(self, name: str, milliseconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.history_size)
+        histogram.add(milliseconds)
+
+    def last(self, name: str) -> float | None:
+        histogram = self.histograms.get(name)
+        return histogram.last if histogram is not None else None
+
+    def to_json(self) -> dict:
+        return {name: hist.to_json() for name, hist in self.histograms.items()}
+
+    def dump(self, path: str) -> None:
+        """Write the histograms as JSON."""
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_json(), file, indent=2)
+
+
+class PerfHUD:
+    """
+    Overlay in the top left corner of the canvas showing live performance stats, toggled with `toggle`.
+    The browser passes the lines to show to `draw` after every frame. When hidden, nothing is drawn.
+    """
+
+    def __init__(self, canvas: Canvas):
+        self.canvas = canvas
+        self.visible = False
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+        if not self.visible:
+            self.canvas.delete(HUD_TAG)
+
+    def draw(self, lines: list[str]) -> None:
+        self.canvas.delete(HUD_TAG)
+        if not self.visible:
+            return
+
+        self.canvas.create_rectangle(
+            HUD_MARGIN,
+            HUD_MARGIN,
+            HUD_MARGIN + HUD_WIDTH,
+            HUD_MARGIN * 2 + HUD_LINE_HEIGHT * len(lines),
+            fill="black",
+            outline="",
+            tags=HUD_TAG,
+        )
+        for i, line in enumerate(lines):
+            self.canvas.create_text(
+                HUD_MARGIN * 2,
+                HUD_MARGIN * 1.5 + HUD_LINE_HEIGHT * i,
+                text=line,
+                anchor="nw",
+                fill="lime",
+                font=("Courier", 10),
+                tags=HUD_TAG,
+            )
+
+
+def format_ms(milliseconds: float | None) -> str:
+    return "-" if milliseconds is None else f"{milliseconds:.1f} ms"
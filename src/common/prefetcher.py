@@ -0,0 +1,147 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from common.url import URL
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # Memory budget of the prefetched responses
+MAX_PREFETCHED_LINKS = 5  # Number of visible links prefetched at a time
+PREFETCH_DELAY_MS = 500  # Time without scrolling or loading before prefetching starts
+# Seconds a prefetched response may be used, so links clicked long after they were prefetched are fetched again
+MAX_AGE = 60.0
+
+
+class ResponseCache:
+    """
+    Prefetched page contents, keyed by URL. Each response is used at most once (see `take`) and only for `max_age`
+    seconds, so neither a reload nor a late click shows stale content. When the contents exceed `max_bytes`,
+    the least recently added are evicted. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        # URL -> (URL the content was loaded from, content, size in bytes, expiry time); least recently added first
+        self.responses: OrderedDict[str, tuple[URL, str, int, float]] = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, url: URL, final_url: URL, content: str) -> None:
+        """Cache the content of the URL. Contents larger than the whole budget are not cached."""
+
+        size = sys.getsizeof(content)
+        with self.lock:
+            self.discard(str(url))
+            if size > self.max_bytes:
+                return
+
+            self.responses[str(url)] = (
+                final_url,
+                content,
+                size,
+                self.clock() + self.max_age,
+            )
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes:
+                _, (_, _, evicted, _) = self.responses.popitem(last=False)
+                self.total_bytes -= evicted
+
+    def take(self, url: URL) -> tuple[URL, str] | None:
+        """
+        Remove and return the URL the content was loaded from and the content,
+        or None if the URL is not cached or its response expired.
+        """
+
+        with self.lock:
+            entry = self.discard(str(url))
+            if entry is None or entry[3] <= self.clock():
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            final_url, content, _, _ = entry
+            return final_url, content
+
+    def discard(self, key: str) -> tuple[URL, str, int, float] | None:
+        entry = self.responses.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+        return entry
+
+    def __contains__(self, url: URL) -> bool:
+        """Whether an unexpired response of the URL is cached, expired ones are prefetched again."""
+
+        entry = self.responses.get(str(url))
+        return entry is not None and entry[3] > self.clock()
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+
+class Prefetcher:
+    """Fetches link targets in the background into a ResponseCache, so following a link needs no network round trip."""
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        max_links: int = MAX_PREFETCHED_LINKS,
+        max_workers: int = 2,
+    ):
+        self.cache = cache
+        self.max_links = max_links
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="prefetcher")
+        self.requests: dict[str, Future[None]] = {}  # URL -> running or queued fetch
+
+    def prefetch(self, urls: list[URL]) -> None:
+        """
+        Start fetching the first `max_links` HTTP(S) URLs that are neither cached nor already being fetched.
+        Queued fetches of other URLs are cancelled, e.g. links that were scrolled out of view.
+        """
+
+        wanted = [url for url in urls if url.scheme in ("http", "https")][
+            : self.max_links
+        ]
+        keys = {str(url) for url in wanted}
+
+        for key, future in list(self.requests.items()):
+            if future.done() or (key not in keys and future.cancel()):
+                del self.requests[key]
+
+        for url in wanted:
+            if str(url) not in self.requests and url not in self.cache:
+                self.requests[str(url)] = self.executor.submit(self.fetch, url)
+
+    def take(self, url: URL) -> tuple[URL, str] | None:
+        """
+        Return the prefetched URL the content was loaded from and the content, see `ResponseCache.take`.
+        Waits if the URL is currently being fetched. Must not be called on the Tk thread.
+        """
+
+        future = self.requests.get(str(url))
+        if future is not None and not future.cancel():
+            future.result()
+
+        return self.cache.take(url)
+
+    def fetch(self, url: URL) -> None:
+        try:
+            final_url, chunks = url.load()
+        except Exception:
+            return  # The link is loaded normally when it is followed
+
+        self.cache.put(url, final_url, "".join(chunks))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,183 @@
+import bisect
+from collections import OrderedDict
+from tkinter import Canvas
+
+from draw_commands.DrawInstruction import DrawInstruction
+from draw_commands.DrawText import DrawText
+
+TILE_HEIGHT = 512  # Height of a tile in page pixels
+# Memory budget of the canvas items of all cached tiles
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Estimated memory of a canvas item, text items additionally use one byte per character
+ITEM_BYTES = 256
+TILE_TAG = "tile"  # Canvas tag of all items drawn by the TiledRenderer
+
+
+class Tile:
+    """The draw commands of one horizontal band of the page and, while the tile is cached, their canvas items."""
+
+    def __init__(self, commands: list[DrawInstruction], ranks: list[int]):
+        self.commands = commands  # Commands whose top is inside the band
+        self.ranks = ranks  # Positions of the commands in the display list, ascending
+        # The commands may extend below the band
+        self.bottom = max(cmd.bottom for cmd in commands)
+        self.items: list[int] = []  # Canvas items, empty if the tile is not cached
+        self.size = sum(
+            ITEM_BYTES + (len(cmd.text) if isinstance(cmd, DrawText) else 0)
+            for cmd in commands
+        )
+
+    def keys(self) -> list[tuple]:
+        return [cmd.key() for cmd in self.commands]
+
+
+class TiledRenderer:
+    """
+    Renders a display list as fixed-height tiles of canvas items that stay on the canvas while scrolling.
+    Scrolling moves the existing items instead of creating new ones. Only tiles coming into view are drawn.
+    Cached tiles are evicted (least recently visible first) when their estimated memory exceeds `max_bytes`.
+    When the display list changes, only tiles whose commands changed are drawn again.
+    """
+
+    def __init__(
+        self,
+        canvas: Canvas,
+        tile_height: int = TILE_HEIGHT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.canvas = canvas
+        self.tile_height = tile_height
+        self.max_bytes = max_bytes
+        self.display_list: list[DrawInstruction] | None = None
+        self.tiles: dict[int, Tile] = {}  # Tile index -> tile, empty bands have no tile
+        # Number of tiles the commands of a tile extend below it, so tiles above the view that reach into it are drawn
+        self.overhang = 0
+        # Indices of the tiles with canvas items, least recently visible first
+        self.cached: OrderedDict[int, None] = OrderedDict()
+        self.cached_bytes = 0
+        # Scroll position the canvas items are currently drawn for
+        self.offset: float = 0
+        # Number of tiles drawn (not reused) by the last `render` call
+        self.tiles_drawn = 0
+
+    def render(
+        self, display_list: list[DrawInstruction], scroll: float, height: float
+    ) -> None:
+        """Show the part of the display list between `scroll` and `scroll + height`."""
+
+        if display_list is not self.display_list:
+            self.set_display_list(display_list)
+
+        if scroll != self.offset:
+            self.canvas.move(TILE_TAG, 0, self.offset - scroll)
+            self.offset = scroll
+
+        self.tiles_drawn = 0
+        first = max(int(scroll // self.tile_height) - self.overhang, 0)
+        last = int((scroll + height) // self.tile_height)
+        for index in range(first, last + 1):
+            tile = self.tiles.get(index)
+            if tile is None or tile.bottom < scroll:
+                continue
+
+            if not tile.items:
+                self.draw_tile(tile)
+                self.cached_bytes += tile.size
+                self.tiles_drawn += 1
+            self.cached[index] = None
+            self.cached.move_to_end(index)
+
+        self.evict(first, last)
+
+    def set_display_list(self, display_list: list[DrawInstruction]) -> None:
+        """Split the display list into tiles. Cached tiles with unchanged commands keep their canvas items."""
+
+        commands: dict[int, list[DrawInstruction]] = {}
+        ranks: dict[int, list[int]] = {}
+        for rank, cmd in enumerate(display_list):
+            index = int(cmd.top // self.tile_height)
+            commands.setdefault(index, []).append(cmd)
+            ranks.setdefault(index, []).append(rank)
+
+        tiles = {
+            index: Tile(tile_commands, ranks[index])
+            for index, tile_commands in commands.items()
+        }
+
+        for index in list(self.cached):
+            old = self.tiles[index]
+            new = tiles.get(index)
+            if new is not None and new.keys() == old.keys():
+                new.items = old.items
+            else:
+                self.delete_tile(index, old)
+
+        self.display_list = display_list
+        self.tiles = tiles
+        self.overhang = max(
+            (
+                int(tile.bottom // self.tile_height) - index
+                for index, tile in tiles.items()
+            ),
+            default=0,
+        )
+
+    def draw_tile(self, tile: Tile) -> None:
+        """
+        Create the canvas items of the tile in display list order. New items are stacked on top, so those painted
+        before items of other cached tiles (e.g. a tile above the view drawn after the tiles below it, whose
+        background may reach into them) are moved down to their place in paint order, like `DisplayListDiffer.restack`.
+        """
+
+        drawn = sorted(
+            (rank, item)
+            for index in self.cached
+            for rank, item in zip(self.tiles[index].ranks, self.tiles[index].items)
+        )
+        drawn_ranks = [rank for rank, _ in drawn]
+
+        previous: tuple[int, int] | None = None  # Rank and item of the last new item
+        for rank, cmd in zip(tile.ranks, tile.commands):
+            item = cmd.execute(self.offset, self.canvas)
+            position = bisect.bisect(drawn_ranks, rank)
+            if position < len(drawn):
+                # The item below it in paint order is the last new item or the last drawn item painted before it
+                below = drawn[position - 1] if position else None
+                if previous is not None and (below is None or previous[0] > below[0]):
+                    below = previous
+                if below is None:
+                    self.canvas.tag_lower(item, TILE_TAG)
+                else:
+                    self.canvas.tag_raise(item, below[1])
+            self.canvas.addtag_withtag(TILE_TAG, item)
+            tile.items.append(item)
+            previous = (rank, item)
+
+    def delete_tile(self, index: int, tile: Tile) -> None:
+        if tile.items:
+            self.canvas.delete(*tile.items)
+            tile.items = []
+        self.cached.pop(index, None)
+        self.cached_bytes -= tile.size
+
+    def evict(self, first_visible: int, last_visible: int) -> None:
+        """Delete the least recently visible tiles until the cached tiles fit into the memory budget."""
+
+        for index in list(self.cached):
+            if self.cached_bytes <= self.max_bytes:
+                break
+            if first_visible <= index <= last_visible:
+                continue  # Tiles in view are never evicted
+            self.delete_tile(index, self.tiles[index])
+
+    def clear(self) -> None:
+        """Delete all canvas items, e.g. before drawing without tiles."""
+
+        self.canvas.delete(TILE_TAG)
+        for tile in self.tiles.values():
+            tile.items = []
+        self.cached.clear()
+        self.cached_bytes = 0
+        self.display_list = None
+        self.tiles = {}
+        self.overhang = 0
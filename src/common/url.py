@@ -1,4 +1,55 @@
-import socket
+import codecs
+import mmap
+import os
+import ssl
+import threading
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from common.constants import DEFAULT_TIMEOUT, MAX_CONNECTIONS_PER_HOST
+from common.dns_cache import create_connection
+from common.http_response import HTTPResponse, read_response
+
+# asyncio is only imported by the asyncio variants of the requests, it takes longer to import than the rest of this module
+if TYPE_CHECKING:
+    from common.async_fetch import HostLimiter
+
+CHUNK_SIZE = 256 * 1024  # Bytes decoded at a time when reading local files
+MAX_REDIRECTS = 10
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+PERMANENT_REDIRECT_STATUSES = {301, 308}
+
+
+class FileChunks:
+    """
+    The decoded content of a local file as an iterable of strings of at most `chunk_size` characters.
+    The file is memory-mapped and decoded incrementally, so the whole content is never held in memory at once.
+    Every iteration reads the file again.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[str]:
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return  # Empty files cannot be mapped
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+
+                # Multi-byte characters split between two chunks are kept by the decoder until the next chunk
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                for start in range(0, size, self.chunk_size):
+                    text = decoder.decode(data[start : start + self.chunk_size])
+                    if text:
+                        yield text
+
+                text = decoder.decode(b"", final=True)
+                if text:
+                    yield text
 
 
 class URL:
@@ -32,10 +83,17 @@ class URL:
             self.host, port = self.host.split(":", 1)
             self.port = int(port)
 
+    def __str__(self) -> str:
+        if self.scheme == "file":
+            return f"file://{self.path}"
+
+        return f"{self.scheme}://{self.host}:{self.port}{self.path}"
+
     def request(self) -> str:
         """
         Sends a GET request for http/https URLs or reads a local file for file URLs.
         Returns the content as a string. For http/https URLs, the content is the response body (without headers).
+        Redirects are followed, see `fetch`.
         """
 
         if self.scheme == "file":
@@ -43,49 +101,142 @@ class URL:
             with open(self.path, "r", encoding="utf-8") as file:
                 return file.read()
 
-        # Request
+        _, response = self.fetch()
+        return response_text(response)
+
+    def fetch(self) -> tuple["URL", HTTPResponse]:
+        """
+        Send GET requests, following up to MAX_REDIRECTS redirects. Permanent redirects are remembered,
+        so later requests for their URLs go straight to the target. Returns the final URL and its response.
+        """
 
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        url = PERMANENT_REDIRECTS.lookup(self)
+        for _ in range(MAX_REDIRECTS + 1):
+            response = url.send_request()
+            target = redirect_target(url, response)
+            if target is None:
+                return url, response
+            url = target
 
-        s.connect((self.host, self.port))
+        raise ValueError(f"Too many redirects requesting {self}")
 
-        if self.scheme == "https":
-            import ssl
+    def send_request(self, timeout: float = DEFAULT_TIMEOUT) -> HTTPResponse:
+        """
+        Send a single GET request for an http/https URL and return the response.
+        The timeout applies to connecting and to every send and read on the socket.
+        """
+
+        # Request
 
+        s = create_connection(self.host, self.port, timeout=timeout)
+
+        if self.scheme == "https":
             ctx = ssl.create_default_context()
             s = ctx.wrap_socket(s, server_hostname=self.host)
 
-        request = f"GET {self.path} HTTP/1.0\r\n"
-        request += f"Host: {self.host}\r\n"
-        request += "\r\n"
+        try:
+            request = f"GET {self.path} HTTP/1.0\r\n"
+            request += f"Host: {self.host}\r\n"
+            request += "\r\n"
 
-        s.send(request.encode("utf-8"))
+            s.send(request.encode("utf-8"))
 
-        # Response
+            # Response
 
-        response = s.makefile("r", encoding="utf-8", newline="\r\n")
+            return read_response(s)
+        finally:
+            s.close()
 
-        statusline = response.readline()
-        version, status_code, reason = statusline.split(" ", 2)  # type: ignore
+    async def request_async(
+        self,
+        limiter: "HostLimiter | None" = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> str:
+        """
+        The asyncio variant of `request`, so many resources can be fetched concurrently from one thread.
+        If a HostLimiter is given, each request waits until a connection to its host is available.
+        The timeout applies to connecting, sending the request and reading the response, not to waiting for the limiter.
+        HTTPS connections use `ssl_context`, or the default context if None.
+        """
 
-        headers = {}
-        while True:
-            line = response.readline()
-            if line == "\r\n":
-                break
-            name, value = line.split(":", 1)
-            headers[name.casefold()] = value.strip()
+        import asyncio
 
-        assert (
-            "transfer-encoding" not in headers
-        ), "Chunked transfer encoding is not supported"
-        assert "content-encoding" not in headers, "Content encoding is not supported"
+        if self.scheme == "file":
+            return await asyncio.to_thread(self.request)
+
+        url = PERMANENT_REDIRECTS.lookup(self)
+        for _ in range(MAX_REDIRECTS + 1):
+            if limiter is None:
+                response = await url.send_request_async(timeout, ssl_context)
+            else:
+                async with limiter.semaphore(url.host, url.port):
+                    response = await url.send_request_async(timeout, ssl_context)
+
+            target = redirect_target(url, response)
+            if target is None:
+                return response_text(response)
+            url = target
+
+        raise ValueError(f"Too many redirects requesting {self}")
+
+    async def send_request_async(
+        self, timeout: float, ssl_context: ssl.SSLContext | None
+    ) -> HTTPResponse:
+        import asyncio
+
+        from common.async_fetch import (
+            STREAM_LIMIT,
+            connect_async,
+            read_response_async,
+            resolve_async,
+        )
+
+        async with asyncio.timeout(timeout):
+            # Resolved with the shared DNS cache and connected on the event loop, see `create_connection`
+            sock = await connect_async(await resolve_async(self.host, self.port))
+            if self.scheme == "https":
+                reader, writer = await asyncio.open_connection(
+                    sock=sock,
+                    ssl=ssl_context or ssl.create_default_context(),
+                    server_hostname=self.host,
+                    limit=STREAM_LIMIT,
+                )
+            else:
+                reader, writer = await asyncio.open_connection(
+                    sock=sock, limit=STREAM_LIMIT
+                )
+
+            try:
+                request = f"GET {self.path} HTTP/1.0\r\n"
+                request += f"Host: {self.host}\r\n"
+                request += "\r\n"
+
+                writer.write(request.encode("utf-8"))
+                await writer.drain()
+
+                return await read_response_async(reader)
+            finally:
+                writer.close()
+
+    def load(self) -> tuple["URL", Iterable[str]]:
+        """
+        Like `request`, but returns the URL the content was loaded from (the target of any redirects) and the content
+        as an iterable of strings that can be iterated more than once. Local files are read in chunks (see FileChunks),
+        so parsing can start before the whole file is decoded.
+        """
+
+        if self.scheme == "file":
+            return self, FileChunks(self.path)
 
-        content = response.read()
+        url, response = self.fetch()
+        return url, [response_text(response)]
 
-        s.close()
+    def request_chunks(self) -> Iterable[str]:
+        """The content of the URL in chunks, see `load`."""
 
-        return content
+        _, chunks = self.load()
+        return chunks
 
     def resolve(self, url: str):
         """
@@ -112,13 +263,98 @@ class URL:
                 _, url = url.split("/", 1)
                 if "/" in dir:
                     dir, _ = dir.rsplit("/", 1)
-                url = url[3:]
 
             url = f"{dir}/{url}"
 
         if url.startswith("//"):
             # Protocol-relative URL (scheme-relative)
             return URL(f"{self.scheme}:{url}")
+        elif self.scheme == "file":
+            return URL(f"file://{url}")
         else:
             # Relative path (path-relative)
             return URL(f"{self.scheme}://{self.host}:{str(self.port)}{url}")
+
+
+def response_text(response: HTTPResponse) -> str:
+    """The decoded body of the response to a request of `URL.request` or `URL.request_async`."""
+
+    assert (
+        "transfer-encoding" not in response.headers
+    ), "Chunked transfer encoding is not supported"
+    assert (
+        "content-encoding" not in response.headers
+    ), "Content encoding is not supported"
+
+    return response.text()
+
+
+async def request_all(
+    urls: Iterable[URL],
+    per_host: int = MAX_CONNECTIONS_PER_HOST,
+    timeout: float = DEFAULT_TIMEOUT,
+    ssl_context: ssl.SSLContext | None = None,
+) -> list[str | Exception]:
+    """
+    Fetch the URLs concurrently with at most `per_host` connections per host. Returns the content of each URL
+    in the order of `urls`, or the exception raised by its request. See `URL.request_async`.
+    """
+
+    import asyncio
+
+    from common.async_fetch import HostLimiter
+
+    limiter = HostLimiter(per_host)
+    return await asyncio.gather(
+        *(url.request_async(limiter, timeout, ssl_context) for url in urls),
+        return_exceptions=True,
+    )
+
+
+def redirect_target(url: URL, response: HTTPResponse) -> URL | None:
+    """
+    The URL the response redirects to (its Location header resolved against `url`), or None if it is not a redirect.
+    Permanent redirects are remembered in PERMANENT_REDIRECTS.
+    """
+
+    if response.status not in REDIRECT_STATUSES or "location" not in response.headers:
+        return None
+
+    target = url.resolve(response.headers["location"])
+    assert target.scheme != "file", "Redirects to local files are not allowed"
+
+    if response.status in PERMANENT_REDIRECT_STATUSES:
+        PERMANENT_REDIRECTS.remember(url, target)
+    return target
+
+
+class PermanentRedirects:
+    """Remembers the targets of permanent (301 and 308) redirects. Safe to share between threads."""
+
+    def __init__(self):
+        self.targets: dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def remember(self, url: URL, target: URL):
+        with self.lock:
+            self.targets[str(url)] = str(target)
+
+    def lookup(self, url: URL) -> URL:
+        """Return the final target of the remembered redirects starting at the URL, or the URL itself."""
+
+        key = str(url)
+        with self.lock:
+            # Bounded, in case the remembered redirects form a cycle
+            for _ in range(MAX_REDIRECTS):
+                if key not in self.targets:
+                    break
+                key = self.targets[key]
+
+        return url if key == str(url) else URL(key)
+
+    def clear(self):
+        with self.lock:
+            self.targets.clear()
+
+
+PERMANENT_REDIRECTS = PermanentRedirects()  # Shared by all requests
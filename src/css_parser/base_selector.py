@@ -16,3 +16,21 @@ class BaseCSSSelector:
         This method should be implemented by subclasses.
         """
         raise NotImplementedError("Subclasses must implement this method.")
+
+    def index_key(self) -> tuple[str, str] | None:
+        """
+        Return the `("class", name)` or `("id", name)` key under which the elements this selector can match are found in an ElementIndex.
+        Returns None if the selector has to be checked against every element.
+        """
+        return None
+
+    def keys(self) -> set[tuple[str, str]]:
+        """
+        Return the `("class", name)` and `("id", name)` keys of the attributes this selector checks on the element itself.
+        A change of any other class or ID of an element cannot change whether the selector matches it.
+        """
+        return set()
+
+    def ancestor_keys(self) -> set[tuple[str, str]]:
+        """Return the keys (see `keys`) of the attributes this selector checks on the ancestors of the element."""
+        return set()
@@ -0,0 +1,25 @@
+from css_parser.base_selector import BaseCSSSelector
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+
+
+class ClassSelector(BaseCSSSelector):
+    """
+    Represents a class selector in a CSS stylesheet.
+    A class selector matches elements whose `class` attribute contains the class name.
+    For example `.note { ... }` matches `<p class="note">` and `<div class="note wide">`.
+    """
+
+    def __init__(self, class_name: str):
+        super().__init__()
+        self.class_name = class_name
+        self.priority = 10
+
+    def matches(self, element: HTMLElement) -> bool:
+        return isinstance(element, TAGElement) and self.class_name in element.classes
+
+    def index_key(self) -> tuple[str, str] | None:
+        return ("class", self.class_name)
+
+    def keys(self) -> set[tuple[str, str]]:
+        return {("class", self.class_name)}
@@ -0,0 +1,31 @@
+from typing import Sequence
+
+from css_parser.base_selector import BaseCSSSelector
+from nodes.html_element import HTMLElement
+
+
+class CompoundSelector(BaseCSSSelector):
+    """
+    Represents a compound selector, i.e. several simple selectors written without whitespace between them.
+    A compound selector matches elements that match all of its selectors.
+    For example `p.note#intro { ... }` matches `<p class="note" id="intro">` but not `<div class="note" id="intro">`.
+    """
+
+    def __init__(self, selectors: Sequence[BaseCSSSelector]):
+        super().__init__()
+        self.selectors = selectors
+        self.priority = sum(s.priority for s in selectors)
+
+    def matches(self, element: HTMLElement) -> bool:
+        return all(selector.matches(element) for selector in self.selectors)
+
+    def index_key(self) -> tuple[str, str] | None:
+        keys = [selector.index_key() for selector in self.selectors]
+        for kind in ("id", "class"):  # An ID narrows the candidates down the most
+            for key in keys:
+                if key is not None and key[0] == kind:
+                    return key
+        return None
+
+    def keys(self) -> set[tuple[str, str]]:
+        return set().union(*(selector.keys() for selector in self.selectors))
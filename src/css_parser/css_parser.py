@@ -1,5 +1,10 @@
+import re
+
 from css_parser.base_selector import BaseCSSSelector
+from css_parser.class_selector import ClassSelector
+from css_parser.compound_selector import CompoundSelector
 from css_parser.descendant_selector import DescendantSelector
+from css_parser.id_selector import IdSelector
 from css_parser.tag_selector import TagSelector
 
 
@@ -128,13 +133,12 @@ class CSSParser:
         return None  # End of file reached
 
     def selector(self) -> BaseCSSSelector:
-        """Parse a CSS selector. The function expects a tag name followed by optional descendant selectors (e.g., `div p`)."""
+        """Parse a CSS selector. The function expects a compound selector followed by optional descendant selectors (e.g., `div p`, `.nav a`, `#main p.note`)."""
 
-        selectors = [TagSelector(self.word().casefold())]
+        selectors = [self.compound_selector(self.word())]
         self.whitespace()
         while self.index < len(self.css) and self.css[self.index] != "{":
-            tag = self.word()
-            selectors.append(TagSelector(tag.casefold()))
+            selectors.append(self.compound_selector(self.word()))
             self.whitespace()
 
         if len(selectors) == 1:
@@ -142,6 +146,37 @@ class CSSParser:
         else:
             return DescendantSelector(selectors)
 
+    def compound_selector(self, word: str) -> BaseCSSSelector:
+        """
+        Turn a word of a selector into tag, class and ID selectors.
+
+        Example:
+        - `p` returns a TagSelector
+        - `.note` returns a ClassSelector
+        - `#intro` returns an IdSelector
+        - `p.note` returns a CompoundSelector of a TagSelector and a ClassSelector
+
+        Raises a ValueError if a class or ID name is empty (e.g., `p.`).
+        """
+
+        selectors: list[BaseCSSSelector] = []
+        for part in re.split(r"(?=[.#])", word):
+            if part.startswith("."):
+                if len(part) == 1:
+                    raise ValueError("Expected a class name in '{}'".format(word))
+                selectors.append(ClassSelector(part[1:]))
+            elif part.startswith("#"):
+                if len(part) == 1:
+                    raise ValueError("Expected an ID in '{}'".format(word))
+                selectors.append(IdSelector(part[1:]))
+            elif part:
+                selectors.append(TagSelector(part.casefold()))
+
+        if len(selectors) == 1:
+            return selectors[0]
+        else:
+            return CompoundSelector(selectors)
+
     def parse_css_file(self) -> list[tuple[BaseCSSSelector, dict[str, str]]]:
         """Parse an entire CSS file and return a list of tuples of selectors and their property-value pairs."""
 
@@ -23,3 +23,19 @@ class DescendantSelector(BaseCSSSelector):
                 i -= 1
             node = node.parent
         return i < 0
+
+    def index_key(self) -> tuple[str, str] | None:
+        return self.selectors[
+            -1
+        ].index_key()  # The element itself is matched by the last selector
+
+    def keys(self) -> set[tuple[str, str]]:
+        return self.selectors[-1].keys()
+
+    def ancestor_keys(self) -> set[tuple[str, str]]:
+        return set().union(
+            *(
+                selector.keys() | selector.ancestor_keys()
+                for selector in self.selectors[:-1]
+            )
+        )
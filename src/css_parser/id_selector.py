@@ -0,0 +1,28 @@
+from css_parser.base_selector import BaseCSSSelector
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+
+
+class IdSelector(BaseCSSSelector):
+    """
+    Represents an ID selector in a CSS stylesheet.
+    An ID selector matches the element whose `id` attribute equals the ID.
+    For example `#header { ... }` matches `<div id="header">`.
+    """
+
+    def __init__(self, element_id: str):
+        super().__init__()
+        self.element_id = element_id
+        self.priority = 100
+
+    def matches(self, element: HTMLElement) -> bool:
+        return (
+            isinstance(element, TAGElement)
+            and element.attributes.get("id") == self.element_id
+        )
+
+    def index_key(self) -> tuple[str, str] | None:
+        return ("id", self.element_id)
+
+    def keys(self) -> set[tuple[str, str]]:
+        return {("id", self.element_id)}
@@ -0,0 +1,104 @@
+import re
+
+from css_parser.css_parser import CSSParser
+
+WHITESPACE = re.compile(
+    r"\s*"
+)  # `\s` uses the same definition of whitespace as `str.isspace()`
+WORD = re.compile(
+    r"(?:[^\W_]|[#\-.%])+"
+)  # `[^\W_]` matches exactly the characters for which `str.isalnum()` is true
+
+PROPERTY_PAIR = re.compile(
+    r"((?:[^\W_]|[#\-.%])+)\s*:\s*((?:[^\W_]|[#\-.%])+)"
+)  # word, whitespace, colon, whitespace, word (see `CSSParser.property_pair`)
+
+DECLARATION = re.compile(
+    r"((?:[^\W_]|[#\-.%])+)\s*:\s*((?:[^\W_]|[#\-.%])+)\s*;\s*"
+)  # A complete, well-formed `property: value;` including the whitespace that follows it
+
+
+class RegexCSSParser(CSSParser):
+    """
+    Drop-in replacement for CSSParser that produces the same rules but scans with compiled regular expressions and `str.find`
+    instead of advancing `self.index` one character at a time in a Python loop.
+    This matters for large stylesheets (hundreds of KB) such as CSS frameworks.
+    """
+
+    STOP_PATTERNS: dict[tuple[str, ...], re.Pattern[str]] = (
+        {}
+    )  # Cache of compiled patterns for `ignore_until`, keyed by the characters to stop at
+
+    def whitespace(self):
+        match = WHITESPACE.match(self.css, self.index)
+        assert match is not None, "WHITESPACE matches the empty string."
+        self.index = match.end()
+
+    def word(self) -> str:
+        match = WORD.match(self.css, self.index)
+        if match is None:
+            raise ValueError("Expected a word at index {}".format(self.index))
+
+        self.index = match.end()
+        return match.group()
+
+    def property_pair(self) -> tuple[str, str]:
+        match = PROPERTY_PAIR.match(self.css, self.index)
+        if match is None:
+            return (
+                super().property_pair()
+            )  # Raises the ValueError at the same index as CSSParser
+
+        self.index = match.end()
+        return match.group(1).casefold(), match.group(2)
+
+    def body(self) -> dict[str, str]:
+        pairs: dict[str, str] = {}
+        css = self.css
+        while self.index < len(css) and css[self.index] != "}":
+            match = DECLARATION.match(css, self.index)
+            if match is not None:
+                # Fast path: one regex match for a well-formed declaration
+                pairs[match.group(1).casefold()] = match.group(2)
+                self.index = match.end()
+                continue
+
+            # Same steps and error recovery as `CSSParser.body`
+            try:
+                prop, value = self.property_pair()
+                pairs[prop.casefold()] = value
+                self.whitespace()
+                self.literal(";")
+                self.whitespace()
+            except ValueError:
+                exception_reason = self.ignore_until([";", "}"])
+                if exception_reason == ";":
+                    self.literal(";")
+                    self.whitespace()
+                else:
+                    break
+        return pairs
+
+    def ignore_until(self, chars: list[str]) -> str | None:
+        if len(chars) == 1:
+            found = self.css.find(chars[0], self.index)
+            if found == -1:
+                self.index = len(self.css)
+                return None  # End of file reached
+
+            self.index = found
+            return chars[0]
+
+        key = tuple(chars)
+        pattern = self.STOP_PATTERNS.get(key)
+        if pattern is None:
+            pattern = re.compile("[" + "".join(re.escape(char) for char in chars) + "]")
+            self.STOP_PATTERNS[key] = pattern
+
+        match = pattern.search(self.css, self.index)
+        if match is None:
+            self.index = len(self.css)
+            return None  # End of file reached
+
+        self.index = match.start()
+        return match.group()
@@ -0,0 +1,204 @@
+from css_parser.base_selector import BaseCSSSelector
+from css_parser.regex_css_parser import RegexCSSParser
+from nodes.computed_style import ROOT_INHERITED_STYLE, ComputedStyle, InheritedStyle
+from nodes.element_index import ElementIndex
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+
+
+def style(
+    node: HTMLElement,
+    rules: list[tuple[BaseCSSSelector, dict[str, str]]],
+    element_index: ElementIndex | None = None,
+):
+    """
+    Recursively set styles (`node.style`, see ComputedStyle) on the HTML tree node and its children.
+    If the ElementIndex of the document is given, rules with class and ID selectors are matched by looking up
+    their elements in the index instead of checking them against every node.
+    """
+
+    if element_index is None:
+        scanned_rules, indexed_matches = list(range(len(rules))), {}
+    else:
+        scanned_rules, indexed_matches = match_indexed_rules(rules, element_index)
+
+    style_tree(node, rules, scanned_rules, indexed_matches)
+
+
+def match_indexed_rules(
+    rules: list[tuple[BaseCSSSelector, dict[str, str]]], element_index: ElementIndex
+) -> tuple[list[int], dict[int, list[int]]]:
+    """
+    Split the rules into rules that have to be checked against every node and rules whose elements can be looked up in the element index.
+    Returns the positions (in `rules`) of the former and, for the latter, the positions of the matching rules keyed by `id()` of the element.
+    """
+
+    scanned_rules: list[int] = []
+    indexed_matches: dict[int, list[int]] = {}
+
+    for i, (selector, _) in enumerate(rules):
+        key = selector.index_key()
+        if key is None:
+            scanned_rules.append(i)
+            continue
+
+        # The full selector is still checked, e.g. `div .note` has to check the ancestors
+        for element in element_index.lookup(key):
+            if selector.matches(element):
+                indexed_matches.setdefault(id(element), []).append(i)
+
+    return scanned_rules, indexed_matches
+
+
+def style_tree(
+    node: HTMLElement,
+    rules: list[tuple[BaseCSSSelector, dict[str, str]]],
+    scanned_rules: list[int],
+    indexed_matches: dict[int, list[int]],
+):
+    """Recursive part of `style`. See `match_indexed_rules` for `scanned_rules` and `indexed_matches`."""
+
+    if node.parent:
+        parent_style = node.parent.style
+        assert isinstance(parent_style, ComputedStyle), "Parent is not styled."
+        inherited = parent_style.inherited
+    else:
+        inherited = ROOT_INHERITED_STYLE
+
+    if not isinstance(node, TAGElement):
+        # Text elements cannot be selected by CSS selectors and have no style attribute,
+        # so they share the inherited values of their parent.
+        node.style = inherited
+        return
+
+    matching = [i for i in scanned_rules if rules[i][0].matches(node)]
+    if id(node) in indexed_matches:
+        matching = sorted(matching + indexed_matches[id(node)])  # Keep cascade order
+
+    node.style = compute_style(node, inherited, rules, matching)
+
+    for child in node.children:
+        style_tree(child, rules, scanned_rules, indexed_matches)
+
+
+def compute_style(
+    node: TAGElement,
+    inherited: InheritedStyle,
+    rules: list[tuple[BaseCSSSelector, dict[str, str]]],
+    matching: list[int],
+) -> ComputedStyle:
+    """Compute the style of an element from the inherited values and the positions (in `rules`) of the matching rules, in cascade order."""
+
+    computed = ComputedStyle(inherited)
+
+    # Apply CSS rules based on rules from a CSS file.
+    # CSS rules may be the User Agent styles or styles from a fetched stylesheet (last take precedence).
+    for i in matching:
+        for prop, value in rules[i][1].items():
+            computed[prop] = value
+
+    # If the node has a "style" attribute, parse it and set the styles.
+    if "style" in node.attributes:
+        pairs = RegexCSSParser(node.attributes["style"]).body()
+
+        for prop, value in pairs.items():
+            computed[prop] = value
+
+    # Resolve percentage font sizes to pixel values before inheriting.
+    if computed["font-size"].endswith("%"):
+        parent_font_size = inherited["font-size"]
+        node_pct = float(computed["font-size"][:-1]) / 100
+        parent_px = float(parent_font_size[:-2])
+        computed["font-size"] = f"{node_pct * parent_px}px"
+
+    return computed
+
+
+class Restyler:
+    """
+    Recomputes the styles of parts of an already styled tree, e.g. after DOM mutations (see DOMMutations),
+    instead of running `style` over the whole tree again. Rules with class and ID selectors are looked up
+    by the class names and ID of each restyled element.
+    """
+
+    def __init__(self, rules: list[tuple[BaseCSSSelector, dict[str, str]]]):
+        self.rules = rules  # Sorted by cascade priority, as passed to `style`
+        self.scanned_rules: list[int] = []  # Rules checked against every element
+        self.keyed_rules: dict[tuple[str, str], list[int]] = {}  # Index key -> rules
+        # Keys of the classes and IDs that rules check on an element itself or on its ancestors
+        self.subject_keys: set[tuple[str, str]] = set()
+        self.ancestor_keys: set[tuple[str, str]] = set()
+
+        for i, (selector, _) in enumerate(rules):
+            key = selector.index_key()
+            if key is None:
+                self.scanned_rules.append(i)
+            else:
+                self.keyed_rules.setdefault(key, []).append(i)
+            self.subject_keys |= selector.keys()
+            self.ancestor_keys |= selector.ancestor_keys()
+
+        self.changed_properties: set[str] = (
+            set()
+        )  # Properties changed by `restyle` calls
+
+    def matching_rules(self, node: TAGElement) -> list[int]:
+        """The positions of the rules matching the element, in cascade order."""
+
+        candidates = set(self.scanned_rules)
+        for class_name in node.classes:
+            candidates.update(self.keyed_rules.get(("class", class_name), ()))
+        element_id = node.attributes.get("id")
+        if element_id:
+            candidates.update(self.keyed_rules.get(("id", element_id), ()))
+
+        return [i for i in sorted(candidates) if self.rules[i][0].matches(node)]
+
+    def restyle(self, node: HTMLElement, subtree: bool = False) -> int:
+        """
+        Recompute the style of the node, and of its whole subtree if `subtree` is set. Descendants are also restyled
+        as long as the inherited values passed down to them change. Returns the number of restyled nodes.
+        """
+
+        count = 0
+        stack = [(node, subtree)]
+        while stack:
+            node, subtree = stack.pop()
+            count += 1
+
+            if node.parent:
+                parent_style = node.parent.style
+                assert isinstance(parent_style, ComputedStyle), "Parent is not styled."
+                inherited = parent_style.inherited
+            else:
+                inherited = ROOT_INHERITED_STYLE
+
+            old = node.style
+            if isinstance(node, TAGElement):
+                new = compute_style(
+                    node, inherited, self.rules, self.matching_rules(node)
+                )
+                node.style = new
+                old_inherited = (
+                    old.inherited if isinstance(old, ComputedStyle) else None
+                )
+                descend = subtree or new.inherited is not old_inherited
+            else:
+                node.style = new = inherited
+                descend = False
+
+            self.changed_properties.update(
+                prop for prop in set(old) | set(new) if old.get(prop) != new.get(prop)
+            )
+
+            if descend:
+                stack.extend((child, subtree) for child in node.children)
+
+        return count
+
+
+def cascade_priority(rule: tuple[BaseCSSSelector, dict[str, str]]) -> int:
+    """Calculate the cascade priority of a CSS rule based on its selector."""
+
+    selector, _ = rule
+    return selector.priority
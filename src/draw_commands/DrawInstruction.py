@@ -9,8 +9,24 @@ class DrawInstruction:
         self.bottom: float
         pass
 
-    def execute(self, scroll: float, canvas: Canvas) -> None:
+    def execute(self, scroll: float, canvas: Canvas) -> int:
         """
         Execute the draw command. This method should be overridden by subclasses to perform the actual drawing.
+        Returns the id of the created canvas item.
         """
         raise NotImplementedError("Subclasses must implement this method.")
+
+    def key(self) -> tuple:
+        """The content of the command. Commands with equal keys draw the same thing."""
+
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def identity(self) -> tuple:
+        """The content of the command except its coordinates. Commands with equal identities draw the same thing in different places."""
+
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def move(self, item: int, scroll: float, canvas: Canvas) -> None:
+        """Move a canvas item drawn by a command with the same identity to the coordinates of this command."""
+
+        raise NotImplementedError("Subclasses must implement this method.")
@@ -0,0 +1,45 @@
+from tkinter import Canvas
+from draw_commands.DrawInstruction import DrawInstruction
+
+
+class DrawOutline(DrawInstruction):
+    """Draws the outline of a rectangle on the canvas, e.g. to highlight text without covering it."""
+
+    def __init__(
+        self, x1: float, y1: float, x2: float, y2: float, color: str, thickness: int
+    ):
+        self.left = x1
+        self.top = y1
+        self.right = x2
+        self.bottom = y2
+        self.color = color
+        self.thickness = thickness
+
+    def execute(self, scroll: float, canvas: Canvas) -> int:
+        return canvas.create_rectangle(
+            self.left,
+            self.top - scroll,
+            self.right,
+            self.bottom - scroll,
+            width=self.thickness,
+            outline=self.color,
+        )
+
+    def key(self) -> tuple:
+        return (
+            "outline",
+            self.left,
+            self.top,
+            self.right,
+            self.bottom,
+            self.color,
+            self.thickness,
+        )
+
+    def identity(self) -> tuple:
+        return ("outline", self.color, self.thickness)
+
+    def move(self, item: int, scroll: float, canvas: Canvas) -> None:
+        canvas.coords(
+            item, self.left, self.top - scroll, self.right, self.bottom - scroll
+        )
@@ -12,8 +12,8 @@ class DrawRect(DrawInstruction):
         self.bottom = y2
         self.color = color
 
-    def execute(self, scroll: float, canvas: Canvas) -> None:
-        canvas.create_rectangle(
+    def execute(self, scroll: float, canvas: Canvas) -> int:
+        return canvas.create_rectangle(
             self.left,
             self.top - scroll,
             self.right,
@@ -21,3 +21,14 @@ class DrawRect(DrawInstruction):
             width=0,  # Hides default one-pixel black border
             fill=self.color,
         )
+
+    def key(self) -> tuple:
+        return ("rect", self.left, self.top, self.right, self.bottom, self.color)
+
+    def identity(self) -> tuple:
+        return ("rect", self.color)
+
+    def move(self, item: int, scroll: float, canvas: Canvas) -> None:
+        canvas.coords(
+            item, self.left, self.top - scroll, self.right, self.bottom - scroll
+        )
@@ -14,8 +14,8 @@ class DrawText(DrawInstruction):
         self.bottom = y + font.metrics("linespace")
         self.color = color
 
-    def execute(self, scroll: float, canvas: Canvas) -> None:
-        canvas.create_text(
+    def execute(self, scroll: float, canvas: Canvas) -> int:
+        return canvas.create_text(
             self.left,
             self.top - scroll,
             text=self.text,
@@ -23,3 +23,13 @@ class DrawText(DrawInstruction):
             anchor="nw",
             fill=self.color,
         )
+
+    def key(self) -> tuple:
+        # Fonts are shared through the font cache, so equal fonts are the same object
+        return ("text", self.left, self.top, self.text, id(self.font), self.color)
+
+    def identity(self) -> tuple:
+        return ("text", self.text, id(self.font), self.color)
+
+    def move(self, item: int, scroll: float, canvas: Canvas) -> None:
+        canvas.coords(item, self.left, self.top - scroll)
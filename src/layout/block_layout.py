@@ -1,3 +1,4 @@
+from itertools import repeat
 from tkinter.font import Font
 from typing import List, Tuple
 
@@ -6,6 +7,13 @@ from draw_commands.DrawRect import DrawRect
 from draw_commands.DrawText import DrawText
 from draw_commands.DrawInstruction import DrawInstruction
 from layout.layout_element import LayoutElement
+from layout.line_breaker import (
+    VECTORIZE_MIN_WORDS,
+    break_lines,
+    line_baselines,
+    numpy,
+    vectorized,
+)
 from nodes.tag_element import TAGElement
 from nodes.html_element import HTMLElement
 from nodes.text_element import TextElement
@@ -63,9 +71,8 @@ class BlockLayout(LayoutElement):
     ):
         super().__init__(node, parent, previous_sibling)
 
-        self.display_list: list[tuple[float, float, str, Font, str]] = (
-            []
-        )  # A list of tuples containing (x, y, text, font, color) for painting
+        # A list of tuples containing (x, y, text, font, color, text node) for painting and hit testing
+        self.display_list: list[tuple[float, float, str, Font, str, TextElement]] = []
         self.width = width
 
     def paint(self) -> list[DrawInstruction]:
@@ -78,7 +85,7 @@ class BlockLayout(LayoutElement):
             cmds.append(rect)
 
         if self.layout_mode() == "inline":
-            for x, y, word, font, color in self.display_list:
+            for x, y, word, font, color, _node in self.display_list:
                 cmds.append(DrawText(word, x, y, font, color))
 
         return cmds
@@ -100,9 +107,8 @@ class BlockLayout(LayoutElement):
         elif mode == "inline":
             self.cursor_x, self.cursor_y = 0, 0
 
-            self.line: List[Tuple[float, str, Font, str]] = (
-                []
-            )  # List of tuples (x, word, font, color)
+            # List of tuples (x, word, font, color, text node)
+            self.line: List[Tuple[float, str, Font, str, TextElement]] = []
 
             self.recursive(self.node)
 
@@ -157,8 +163,11 @@ class BlockLayout(LayoutElement):
         """Recursively processes the (root) node and its children for layout."""
 
         if isinstance(node, TextElement):
-            for word in node.text.split():
-                self.word(word, node)
+            if vectorized() and len(node.words) >= VECTORIZE_MIN_WORDS:
+                self.words(node)
+            else:
+                for word in node.words:
+                    self.word(word, node)
         elif isinstance(node, TAGElement):
             if node.tag_name == "br":
                 self.flush()
@@ -169,6 +178,87 @@ class BlockLayout(LayoutElement):
     def word(self, word: str, text_node: TextElement):
         """Add a word to the current line, wrapping to the next line if necessary."""
 
+        font, color = self.text_font(text_node)
+
+        w = font.measure(word)
+
+        screen_x_position_after_word = self.cursor_x + w
+        max_width = self.width
+
+        if screen_x_position_after_word > max_width:
+            self.flush()
+
+        self.line.append((self.cursor_x, word, font, color, text_node))
+        self.cursor_x += w + font.measure(" ")
+
+    def words(self, text_node: TextElement):
+        """
+        Add all words of a long text node at once, like calling `word` for each of them.
+        The lines are broken with NumPy (see `break_lines`). The lines between the first and the last one
+        contain only words of this node, so they go to the display list directly, without `flush`.
+        """
+
+        np = numpy()
+        font, color = self.text_font(text_node)
+        words = text_node.words
+
+        # Each distinct word is measured once
+        measured: dict[str, int] = {}
+        widths = np.fromiter(
+            (
+                (
+                    measured[word]
+                    if word in measured
+                    else measured.setdefault(word, font.measure(word))
+                )
+                for word in words
+            ),
+            dtype=np.int64,
+            count=len(words),
+        )
+        breaks, xs = break_lines(
+            widths, font.measure(" "), self.width, self.cursor_x, not self.line
+        )
+
+        # The current line continues up to the first break
+        first_end = breaks[0] if breaks else len(words)
+        for i in range(first_end):
+            self.line.append((int(xs[i]), words[i], font, color, text_node))
+        if not breaks:
+            self.cursor_x = int(xs[-1] + widths[-1]) + font.measure(" ")
+            return
+        self.flush()
+
+        # Full lines
+        last = breaks[-1]
+        baselines = line_baselines(
+            self.cursor_y,
+            font.metrics("ascent"),
+            font.metrics("descent"),
+            len(breaks) - 1,
+        )
+        ys = (self.y + baselines[:-1]) - font.metrics("ascent")
+        word_ys = np.repeat(ys, np.diff(breaks))
+        self.display_list.extend(
+            zip(
+                (self.x + xs[first_end:last]).tolist(),
+                word_ys.tolist(),
+                words[first_end:last],
+                repeat(font),
+                repeat(color),
+                repeat(text_node),
+            )
+        )
+        self.cursor_y = float(baselines[-1])
+
+        # The last line stays open for the following text
+        for i in range(last, len(words)):
+            self.line.append((int(xs[i]), words[i], font, color, text_node))
+        self.cursor_x = int(xs[-1] + widths[-1]) + font.measure(" ")
+
+    def text_font(self, text_node: TextElement) -> tuple[Font, str]:
+        """The font and color of the words of a text node."""
+
         weight = text_node.style["font-weight"]
         style = text_node.style["font-style"]
         if style == "normal":
@@ -192,17 +282,7 @@ class BlockLayout(LayoutElement):
             slant=style,  # type: ignore
             underline=underline,
         )
-
-        w = font.measure(word)
-
-        screen_x_position_after_word = self.cursor_x + w
-        max_width = self.width
-
-        if screen_x_position_after_word > max_width:
-            self.flush()
-
-        self.line.append((self.cursor_x, word, font, color))
-        self.cursor_x += w + font.measure(" ")
+        return font, color
 
     def flush(self):
         """
@@ -215,17 +295,17 @@ class BlockLayout(LayoutElement):
         if not self.line:
             return
 
-        metrics = [font.metrics() for _x, _word, font, _color in self.line]
+        metrics = [font.metrics() for _x, _word, font, _color, _node in self.line]
         max_ascent = max([metric["ascent"] for metric in metrics])
 
         baseline = self.cursor_y + 1.25 * max_ascent
 
-        for rel_x, word, font, color in self.line:
+        for rel_x, word, font, color, node in self.line:
             assert self.x is not None, "BlockLayout x coordinate is not set."
             assert self.y is not None, "BlockLayout y coordinate is not set."
             x: float = self.x + rel_x
             y: float = self.y + baseline - font.metrics("ascent")
-            self.display_list.append((x, y, word, font, color))
+            self.display_list.append((x, y, word, font, color, node))
 
         max_descent = max([metric["descent"] for metric in metrics])
         self.cursor_y = baseline + 1.25 * max_descent
@@ -0,0 +1,143 @@
+import re
+from bisect import bisect_left, bisect_right
+from tkinter.font import Font
+
+from draw_commands.DrawOutline import DrawOutline
+from layout.block_layout import BlockLayout
+from layout.layout_element import LayoutElement
+
+MATCH_COLOR = "gold"
+CURRENT_MATCH_COLOR = "orange red"
+
+
+class FindIndex:
+    """
+    The laid out words of a page as one normalized string (casefolded, one space between words), for find-in-page.
+    Offsets into the string map back to the words and their positions in the display list.
+    """
+
+    def __init__(self, words: list[tuple[float, float, str, Font]]):
+        self.words = words  # (x, y, word, font) in document order
+        self.starts: list[int] = []  # Offset of each word in `text`
+        # Blocks are stacked vertically, so the tops of the words are in ascending order
+        self.tops = [y for _x, y, _word, _font in words]
+
+        parts: list[str] = []
+        offset = 0
+        for _x, _y, word, _font in words:
+            folded = word.casefold()
+            self.starts.append(offset)
+            parts.append(folded)
+            offset += len(folded) + 1
+
+        self.text = " ".join(parts)
+
+    @classmethod
+    def from_layout(cls, document: LayoutElement) -> "FindIndex":
+        words: list[tuple[float, float, str, Font]] = []
+        stack = [document]
+        while stack:
+            layout = stack.pop()
+            if isinstance(layout, BlockLayout):
+                words.extend(
+                    (x, y, word, font) for x, y, word, font, _, _ in layout.display_list
+                )
+            stack.extend(reversed(layout.children))
+        return cls(words)
+
+    def search(
+        self, query: str, previous_query: str = "", previous: list[int] | None = None
+    ) -> list[int]:
+        """
+        Return the offsets of all matches of the query, in document order. Case and whitespace are ignored.
+        If the query extends the previous query (as when typing), only the previous matches are checked.
+        """
+
+        query = normalize(query)
+        if not query:
+            return []
+
+        if previous is not None and query.startswith(normalize(previous_query)):
+            return [start for start in previous if self.text.startswith(query, start)]
+
+        matches = []
+        start = self.text.find(query)
+        while start != -1:
+            matches.append(start)
+            start = self.text.find(query, start + 1)
+        return matches
+
+    def word_at(self, offset: int) -> int:
+        """The position (in `words`) of the word containing the offset of `text`."""
+
+        return bisect_right(self.starts, offset) - 1
+
+    def match_top(self, start: int) -> float:
+        return self.words[self.word_at(start)][1]
+
+    def first_match_below(self, matches: list[int], top: float) -> int | None:
+        """The position (in `matches`) of the first match starting at or below `top`, or None if there is none."""
+
+        first_word = bisect_left(self.tops, top)
+        if first_word == len(self.words):
+            return None
+        i = bisect_left(matches, self.starts[first_word])
+        return i if i < len(matches) else None
+
+    def highlights(
+        self,
+        matches: list[int],
+        length: int,
+        current: int | None,
+        top: float,
+        bottom: float,
+    ) -> list[DrawOutline]:
+        """
+        Draw commands outlining the matches (of a query of `length` characters) with a word between `top` and `bottom`.
+        The match at position `current` of `matches` is outlined in a different color.
+        """
+
+        cmds: list[DrawOutline] = []
+        if not matches:
+            return cmds
+
+        # Skip the matches above the view, the one before the first visible word may end in view
+        first_visible = bisect_left(self.tops, top)
+        if first_visible == len(self.words):
+            return cmds
+        i = max(bisect_left(matches, self.starts[first_visible]) - 1, 0)
+
+        for i in range(i, len(matches)):
+            start = matches[i]
+            first = self.word_at(start)
+            last = self.word_at(start + length - 1)
+            if self.words[first][1] > bottom:
+                break
+            if self.words[last][1] < top:
+                continue
+
+            color = CURRENT_MATCH_COLOR if i == current else MATCH_COLOR
+            thickness = 2 if i == current else 1
+
+            for position in range(first, last + 1):
+                x, y, word, font = self.words[position]
+                # Characters of the word covered by the match
+                begin = max(start - self.starts[position], 0)
+                end = min(start + length - self.starts[position], len(word))
+                if len(word.casefold()) != len(word):
+                    begin, end = 0, len(word)  # Casefolding changed the length
+                left = x + font.measure(word[:begin])
+                right = x + font.measure(word[:end])
+                cmds.append(
+                    DrawOutline(
+                        left, y, right, y + font.metrics("linespace"), color, thickness
+                    )
+                )
+
+        return cmds
+
+
+def normalize(query: str) -> str:
+    """Casefold the query and collapse its whitespace like the words in `FindIndex.text`."""
+
+    return re.sub(r"\s+", " ", query.casefold()).strip()
@@ -0,0 +1,87 @@
+import re
+
+from common.url import URL
+from layout.block_layout import BlockLayout
+from layout.layout_element import LayoutElement
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+
+# A scheme without "//", e.g. "mailto:" or "javascript:", such links can't be loaded
+OPAQUE_SCHEME = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:(?!//)")
+
+
+def hit_test(layout_element: LayoutElement, x: float, y: float) -> TextElement | None:
+    """Return the text node of the word at the page coordinates (x, y), or None if there is no word."""
+
+    # Blocks are stacked vertically, so only the subtrees containing y have to be searched
+    if isinstance(layout_element, BlockLayout) and not (
+        layout_element.y <= y < layout_element.y + layout_element.height
+    ):
+        return None
+
+    if isinstance(layout_element, BlockLayout):
+        for word_x, word_y, word, font, _color, node in layout_element.display_list:
+            right = word_x + font.measure(word)
+            bottom = word_y + font.metrics("linespace")
+            if word_x <= x < right and word_y <= y < bottom:
+                return node
+
+    for child in layout_element.children:
+        node = hit_test(child, x, y)
+        if node is not None:
+            return node
+
+    return None
+
+
+def find_link(node: HTMLElement | None) -> str | None:
+    """Return the `href` of the closest `<a href>` element containing the node, or None."""
+
+    while node is not None:
+        if (
+            isinstance(node, TAGElement)
+            and node.tag_name == "a"
+            and "href" in node.attributes
+        ):
+            return node.attributes["href"]
+        node = node.parent
+
+    return None
+
+
+def link_target(base: URL, href: str) -> URL | None:
+    """
+    The URL to load for a link on the page at `base`, or None if it can't be loaded: fragment-only links (e.g. "#top")
+    point into the current page, and links with unsupported schemes (e.g. "mailto:" or "ftp://") can't be fetched.
+    """
+
+    if href.startswith("#") or OPAQUE_SCHEME.match(href):
+        return None
+    try:
+        return base.resolve(href)
+    except Exception:
+        return None
+
+
+def visible_links(
+    layout_element: LayoutElement, top: float, bottom: float, links: list[str]
+) -> list[str]:
+    """Append the `href` of every link with a word between the page coordinates `top` and `bottom` to `links`, in document order, once each."""
+
+    if isinstance(layout_element, BlockLayout) and (
+        layout_element.y >= bottom or layout_element.y + layout_element.height < top
+    ):
+        return links
+
+    if isinstance(layout_element, BlockLayout):
+        for _x, word_y, _word, _font, _color, node in layout_element.display_list:
+            if top <= word_y < bottom:
+                href = find_link(node)
+                if href is not None and href not in links:
+                    links.append(href)
+
+    for child in layout_element.children:
+        visible_links(child, top, bottom, links)
+
+    return links
@@ -0,0 +1,102 @@
+import math
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+# NumPy is imported on first use by `numpy`, only type checkers import it here for the annotations
+if TYPE_CHECKING:
+    import numpy as np
+
+# Text nodes with fewer words are laid out word by word, since setting up the arrays costs more than it saves
+VECTORIZE_MIN_WORDS = 256
+
+# NumPy module, False until `numpy` tried to import it
+_numpy: ModuleType | None | bool = False
+
+
+def numpy() -> ModuleType | None:
+    """
+    The NumPy module, or None if it is not installed (it is optional, without it text is laid out word by word).
+    Imported on the first call instead of at startup, since importing it takes longer than importing the whole browser.
+    """
+
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            _numpy = None
+        else:
+            _numpy = numpy
+    return _numpy  # type: ignore
+
+
+def vectorized() -> bool:
+    return numpy() is not None
+
+
+def break_lines(
+    widths: "np.ndarray",
+    space_width: int,
+    max_width: float,
+    cursor_x: int = 0,
+    line_empty: bool = True,
+) -> tuple[list[int], "np.ndarray"]:
+    """
+    Break a run of words of one font into lines, greedily like `BlockLayout.word`: a word that does not fit
+    moves to the next line, unless it is the first word on its line. The run continues the current line at `cursor_x`.
+
+    Returns the indices of the words that start a new line (0 if even the first word does not fit on the current line)
+    and the x position of every word relative to the start of its line.
+    The widths must be integers (as measured by Tk fonts), so the prefix sums are exact.
+    """
+
+    np = numpy()
+    n = len(widths)
+    # starts[i] is the x of word i if the run started a line at 0, ends[i] where the word ends
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(widths[:-1] + space_width, out=starts[1:])
+    ends = starts + widths
+
+    # All widths are integers, so `x + ends[i] > max_width` iff `x + ends[i] > floor(max_width)`
+    limit = math.floor(max_width)
+
+    breaks: list[int] = []
+    first = 0  # First word of the current line
+    offset = cursor_x  # x of the current line, relative to `starts`
+    empty = line_empty
+    while first < n:
+        # First word that does not fit, `ends` is sorted since widths are not negative
+        i = first + int(np.searchsorted(ends[first:], limit - offset, side="right"))
+        if i == first and empty:
+            i += 1  # A word wider than the line gets a line of its own
+        if i >= n:
+            break
+
+        breaks.append(i)
+        first = i
+        offset = -int(starts[i])
+        empty = True
+
+    # Line number of every word, the continued line is line 0
+    lines = np.searchsorted(np.array(breaks, dtype=np.int64), np.arange(n), "right")
+    offsets = np.empty(len(breaks) + 1, dtype=np.int64)
+    offsets[0] = cursor_x
+    offsets[1:] = -starts[breaks]
+    return breaks, starts + offsets[lines]
+
+
+def line_baselines(
+    cursor_y: float, ascent: float, descent: float, count: int
+) -> "np.ndarray":
+    """
+    The baselines of `count` lines of one font below `cursor_y`, and the `cursor_y` after them as the last element.
+    Sums in the same order as `BlockLayout.flush`, so the positions are identical.
+    """
+
+    np = numpy()
+    steps = np.empty(2 * count + 1)
+    steps[0] = cursor_y
+    steps[1::2] = 1.25 * ascent
+    steps[2::2] = 1.25 * descent
+    positions = np.cumsum(steps)
+    return np.append(positions[1::2], positions[-1])
@@ -1,8 +1,16 @@
-import sys
+import time
+
+STARTED = time.perf_counter()  # Before the other imports, see `--startup-benchmark`
+
+import argparse
 import tkinter
 import os
-from browser import Browser
-from common.url import URL
+from typing import TYPE_CHECKING
+from common.constants import INITIAL_HEIGHT, INITIAL_WIDTH
+from common.sampling_profiler import DEFAULT_RATE, SamplingProfiler
+
+if TYPE_CHECKING:
+    from browser import Browser
 
 
 def main():
@@ -11,12 +19,120 @@ def main():
     working_directory = os.getcwd()
     path_to_example = working_directory + "/example.html"
 
-    url = sys.argv[1] if len(sys.argv) > 1 else "file://" + path_to_example
+    parser = argparse.ArgumentParser(description="A simple web browser.")
+    parser.add_argument("url", nargs="?", default="file://" + path_to_example)
+    parser.add_argument(
+        "--memory-profile",
+        nargs="?",
+        const="-",
+        metavar="REPORT.json",
+        help="Report the memory used by each stage of a page load and by the resulting trees. "
+        "Writes JSON to the given file or prints the report if no file is given.",
+    )
+    parser.add_argument(
+        "--snapshot-cache",
+        nargs="?",
+        const=os.path.join(
+            os.path.expanduser("~"), ".cache", "browser-engineering", "snapshots"
+        ),
+        metavar="DIRECTORY",
+        help="Store snapshots of the styled DOM and display list of loaded pages and show unchanged pages "
+        "from their snapshot without parsing, styling and layout.",
+    )
+    parser.add_argument(
+        "--tiled",
+        action="store_true",
+        help="Keep the drawn page on the canvas in tiles, so scrolling moves it instead of drawing it again.",
+    )
+    parser.add_argument(
+        "--perf-stats",
+        metavar="STATS.json",
+        help="Write histograms of the recent draw, layout and network times to the file on exit. "
+        "Press F12 to show the latest times on the page.",
+    )
+    parser.add_argument(
+        "--sample-profile",
+        metavar="STACKS.folded",
+        help="Sample the stacks of all threads while the browser runs and write them as folded stacks "
+        "(for flame graph tools) to the file on exit. Each stack starts with the pipeline stage it was sampled in.",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        default=DEFAULT_RATE,
+        metavar="HZ",
+        help=f"Samples per second of --sample-profile (default {DEFAULT_RATE}).",
+    )
+    parser.add_argument(
+        "--startup-benchmark",
+        action="store_true",
+        help="Print the time from starting to showing the window and to showing the page, then quit.",
+    )
+    args = parser.parse_args()
+
+    sampling_profiler = None
+    if args.sample_profile:
+        sampling_profiler = SamplingProfiler(args.sample_rate)
+        sampling_profiler.start()
+
+    # The empty window is shown first, importing the rest of the browser takes most of the startup time
+    window = tkinter.Tk()
+    window.geometry(f"{INITIAL_WIDTH}x{INITIAL_HEIGHT}")
+    window.configure(bg="white")
+    window.update()
+    window_shown = time.perf_counter()
+
+    from browser import Browser
+    from common.memory import MemoryProfiler
+    from common.page_snapshot import PageSnapshotStore
+    from common.perf_hud import PerfStats
+    from common.url import URL
+
+    memory_profiler = MemoryProfiler(
+        enabled=args.memory_profile is not None,
+        report_path=args.memory_profile if args.memory_profile != "-" else None,
+    )
+
+    snapshot_store = (
+        PageSnapshotStore(args.snapshot_cache) if args.snapshot_cache else None
+    )
 
-    Browser().load(URL(url))
+    perf_stats = PerfStats()
+
+    browser = Browser(memory_profiler, snapshot_store, args.tiled, perf_stats, window)
+    if args.startup_benchmark:
+        report_startup(browser, window_shown)
+    browser.load(URL(args.url))
 
     tkinter.mainloop()
 
+    if args.perf_stats:
+        perf_stats.dump(args.perf_stats)
+
+    if sampling_profiler is not None:
+        sampling_profiler.stop()
+        sampling_profiler.write(args.sample_profile)
+        sampling_profiler.print_summary()
+
+
+def report_startup(browser: "Browser", window_shown: float):
+    """Print the startup times once the first page is shown (or failed to load) and close the browser."""
+
+    def done(callback, url, result):
+        callback(url, result)
+        browser.window.update_idletasks()  # Paint the page
+        page_shown = time.perf_counter()
+        print(
+            f"Startup: window shown after {(window_shown - STARTED) * 1000:.1f} ms, "
+            f"page shown after {(page_shown - STARTED) * 1000:.1f} ms"
+        )
+        browser.window.destroy()
+
+    loader = browser.loader
+    on_done, on_error = loader.on_done, loader.on_error
+    loader.on_done = lambda url, page: done(on_done, url, page)
+    loader.on_error = lambda url, error: done(on_error, url, error)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+from types import MappingProxyType
+from typing import Iterator, Mapping
+
+INHERITED_PROPERTIES = {
+    "font-size": "16px",
+    "font-style": "normal",
+    "font-weight": "normal",
+    "color": "black",
+}  # Style properties that are inherited by default from parent elements. Text elements can only use these properties because they cannot be selected by CSS selectors otherwise.
+
+INHERITED_INDEX = {
+    prop: i for i, prop in enumerate(INHERITED_PROPERTIES)
+}  # Position of each inherited property in `InheritedStyle.values`
+
+EMPTY_STYLE: Mapping[str, str] = MappingProxyType(
+    {}
+)  # Style of nodes that have not been styled yet, shared by all of them
+
+
+class InheritedStyle(Mapping[str, str]):
+    """
+    An immutable, interned set of values for the INHERITED_PROPERTIES.
+
+    Most nodes inherit all of these values unchanged, so they share a single InheritedStyle object instead of each
+    holding a copy of the values. Use `InheritedStyle.intern()` and `replace()` to get instances, never the constructor.
+    Text elements use the InheritedStyle of their parent directly as their style.
+    """
+
+    __slots__ = ("values",)
+
+    INTERNED: dict[tuple[str, ...], "InheritedStyle"] = {}
+
+    def __init__(self, values: tuple[str, ...]):
+        self.values = values
+
+    @classmethod
+    def intern(cls, values: tuple[str, ...]) -> "InheritedStyle":
+        """Return the shared InheritedStyle for the values (in INHERITED_PROPERTIES order)."""
+
+        style = cls.INTERNED.get(values)
+        if style is None:
+            style = cls.INTERNED.setdefault(values, cls(values))
+        return style
+
+    def replace(self, prop: str, value: str) -> "InheritedStyle":
+        """Return the shared InheritedStyle with one value replaced. This object is not changed."""
+
+        i = INHERITED_INDEX[prop]
+        if self.values[i] == value:
+            return self
+        return InheritedStyle.intern(self.values[:i] + (value,) + self.values[i + 1 :])
+
+    def __getitem__(self, prop: str) -> str:
+        return self.values[INHERITED_INDEX[prop]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(INHERITED_PROPERTIES)
+
+    def __len__(self) -> int:
+        return len(INHERITED_PROPERTIES)
+
+    def __repr__(self) -> str:
+        return f"InheritedStyle({dict(self)})"
+
+
+ROOT_INHERITED_STYLE = InheritedStyle.intern(
+    tuple(INHERITED_PROPERTIES.values())
+)  # Inherited values of the root node
+
+
+class ComputedStyle(Mapping[str, str]):
+    """
+    The computed style of a TAGElement (`node.style`), used like a `dict[str, str]`.
+
+    Values of INHERITED_PROPERTIES are kept in a shared InheritedStyle and only copied (copy-on-write) when the node
+    overrides one of them. Only the other properties that are actually set on the node are stored in a per-node dict.
+    """
+
+    __slots__ = ("inherited", "own")
+
+    def __init__(self, inherited: InheritedStyle = ROOT_INHERITED_STYLE):
+        self.inherited = inherited
+        self.own: dict[str, str] | None = (
+            None  # Non-inherited properties, created on first write
+        )
+
+    def __getitem__(self, prop: str) -> str:
+        if prop in INHERITED_INDEX:
+            return self.inherited[prop]
+        if self.own is None:
+            raise KeyError(prop)
+        return self.own[prop]
+
+    def __setitem__(self, prop: str, value: str) -> None:
+        if prop in INHERITED_INDEX:
+            self.inherited = self.inherited.replace(prop, value)
+        elif self.own is None:
+            self.own = {prop: value}
+        else:
+            self.own[prop] = value
+
+    def __iter__(self) -> Iterator[str]:
+        yield from INHERITED_PROPERTIES
+        if self.own is not None:
+            yield from self.own
+
+    def __len__(self) -> int:
+        return len(INHERITED_PROPERTIES) + (len(self.own) if self.own else 0)
+
+    def __repr__(self) -> str:
+        return f"ComputedStyle({dict(self)})"
@@ -0,0 +1,53 @@
+from nodes.tag_element import TAGElement
+
+
+class ElementIndex:
+    """
+    Per-document lookup tables from class names and IDs to the elements that carry them.
+    The HTMLParser fills the index while it creates the elements, so class and ID selectors can find
+    their elements with a dictionary lookup instead of being checked against every node of the tree.
+    """
+
+    def __init__(self):
+        self.by_class: dict[str, list[TAGElement]] = {}
+        self.by_id: dict[str, list[TAGElement]] = (
+            {}
+        )  # A list because invalid documents may use the same ID more than once
+
+    def add(self, element: TAGElement) -> None:
+        """Add an element under its class names and ID."""
+
+        for class_name in dict.fromkeys(element.classes):  # Ignore repeated class names
+            self.by_class.setdefault(class_name, []).append(element)
+
+        element_id = element.attributes.get("id")
+        if element_id:
+            self.by_id.setdefault(element_id, []).append(element)
+
+    def remove(self, element: TAGElement) -> None:
+        """Remove an element, e.g. before it is removed from the document or its class names or ID change."""
+
+        for class_name in dict.fromkeys(element.classes):
+            self.discard(self.by_class, class_name, element)
+
+        element_id = element.attributes.get("id")
+        if element_id:
+            self.discard(self.by_id, element_id, element)
+
+    def discard(
+        self, table: dict[str, list[TAGElement]], name: str, element: TAGElement
+    ) -> None:
+        elements = table.get(name, [])
+        for i, candidate in enumerate(elements):
+            if candidate is element:
+                del elements[i]
+                break
+        if not elements:
+            table.pop(name, None)
+
+    def lookup(self, key: tuple[str, str]) -> list[TAGElement]:
+        """Return the elements for an index key as returned by `BaseCSSSelector.index_key()`."""
+
+        kind, name = key
+        table = self.by_id if kind == "id" else self.by_class
+        return table.get(name, [])
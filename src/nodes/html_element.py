@@ -1,4 +1,6 @@
-from typing import List, Union
+from typing import List, Mapping, Union
+
+from nodes.computed_style import EMPTY_STYLE
 
 
 class HTMLElement:
@@ -9,4 +11,5 @@ class HTMLElement:
     def __init__(self, parent: Union["HTMLElement", None]):
         self.parent = parent
         self.children: List["HTMLElement"] = []
-        self.style: dict[str, str] = {}
+        # Set by `style()` to a ComputedStyle (TAGElement) or an InheritedStyle (TextElement)
+        self.style: Mapping[str, str] = EMPTY_STYLE
@@ -15,5 +15,11 @@ class TAGElement(HTMLElement):
         self.tag_name = tag_name  # Only the tag name, not the full tag; e.g. 'div', 'p', etc., NEVER '/div', '/p', etc.
         self.attributes = attributes
 
+    @property
+    def classes(self) -> list[str]:
+        """The class names of the `class` attribute."""
+
+        return self.attributes.get("class", "").split()
+
     def __repr__(self) -> str:
         return f"<{self.tag_name}>"
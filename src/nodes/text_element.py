@@ -1,3 +1,5 @@
+import sys
+
 from nodes.html_element import HTMLElement
 
 
@@ -7,9 +9,58 @@ class TextElement(HTMLElement):
     It is used to handle the text content of a web page, that is "a run of characters outside a tag".
     """
 
-    def __init__(self, text: str, parent: HTMLElement):
+    def __init__(
+        self, text: str, parent: HTMLElement, start: int = 0, end: int | None = None
+    ):
+        """
+        With `start` and `end`, the node stores only the span `text[start:end]` of a source string shared with other nodes
+        (e.g. a chunk of the document, see `HTMLParser(text_spans=True)`), and the text is sliced from it on demand.
+        """
+
         super().__init__(parent)
-        self.text = text
+        self._source = text
+        self._start = start
+        self._end = len(text) if end is None else end
+        self._words: tuple[str, ...] | None = None  # Cache of `words`
+
+    @property
+    def text(self) -> str:
+        if self._start == 0 and self._end == len(self._source):
+            return self._source
+        return self._source[self._start : self._end]
+
+    @text.setter
+    def text(self, text: str):
+        self._source = text
+        self._start = 0
+        self._end = len(text)
+        self._words = None
+
+    @property
+    def length(self) -> int:
+        """Number of characters of the text, without slicing it from the source."""
+
+        return self._end - self._start
+
+    def copy_span(self):
+        """Replace the span by a copy of its text, so the shared source string no longer has to be kept alive."""
+
+        if self._start != 0 or self._end != len(self._source):
+            self._source = self._source[self._start : self._end]
+            self._start = 0
+            self._end = len(self._source)
+
+    @property
+    def words(self) -> tuple[str, ...]:
+        """
+        The words of the text, split at whitespace like `text.split()` (so whitespace is collapsed).
+        Computed on first use and cached until the text changes, so layout passes don't create new strings.
+        The words are interned, so equal words of different text nodes share one string.
+        """
+
+        if self._words is None:
+            self._words = tuple(map(sys.intern, self.text.split()))
+        return self._words
 
     def __repr__(self) -> str:
         return f'"{self.text.encode("unicode_escape").decode("utf-8")}"'
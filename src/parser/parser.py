@@ -1,83 +1,155 @@
-from typing import List
+import re
+from typing import Callable, List
 from layout.layout_element import LayoutElement
+from nodes.element_index import ElementIndex
 from nodes.tag_element import TAGElement
 from nodes.html_element import HTMLElement
 from nodes.text_element import TextElement
 
-SELF_CLOSING_TAGS = [
-    "area",
-    "base",
-    "br",
-    "col",
-    "embed",
-    "hr",
-    "img",
-    "input",
-    "link",
-    "meta",
-    "param",
-    "source",
-    "track",
-    "wbr",
-]
-
-
-class HTMLParser:
-    HEAD_TAGS = [
+SELF_CLOSING_TAGS = frozenset(
+    [
+        "area",
         "base",
-        "basefont",
-        "bgsound",
-        "noscript",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
         "link",
         "meta",
-        "title",
-        "style",
-        "script",
-    ]  # HEAD_TAGS lists the tags that you’re supposed to put into the <head> element
+        "param",
+        "source",
+        "track",
+        "wbr",
+    ]
+)
+
+DELIMITERS = re.compile("[<>]")  # Characters that end a text or tag token
+NON_SPACE = re.compile(r"\S")
+# Text nodes keep their spans of a chunk only if together they cover at least this fraction of it. Otherwise, e.g. for
+# tag-heavy chunks, their text is copied, so a few short text nodes don't keep the markup of the whole chunk alive
+SPAN_MIN_COVERAGE = 0.5
+# An attribute of a tag: its name and a double quoted, single quoted or unquoted value. Quoted values may contain spaces,
+# a missing closing quote ends the value at the end of the tag. Slashes between attributes (e.g. `<br />`) are skipped
+ATTRIBUTE = re.compile(
+    r"""([^\s/=][^\s/=]*)(?:\s*=\s*(?:"([^"]*)"?|'([^']*)'?|([^\s"']\S*)))?"""
+)
+
+# Insertion modes of the HTMLParser, they decide which tags are implied before a token
+BEFORE_HTML = "before-html"  # No element is open yet
+# Only <html> is open, e.g. before <head> or after </head> or </body>
+BEFORE_HEAD = "before-head"
+IN_HEAD = "in-head"  # <head> is open and is the innermost element
+# Any deeper element is open, e.g. <body> or <title>, no tags are implied
+IN_BODY = "in-body"
 
-    def __init__(self, html: str):
+
+class HTMLParser:
+    HEAD_TAGS = frozenset(
+        [
+            "base",
+            "basefont",
+            "bgsound",
+            "noscript",
+            "link",
+            "meta",
+            "title",
+            "style",
+            "script",
+        ]
+    )  # HEAD_TAGS lists the tags that you’re supposed to put into the <head> element
+
+    def __init__(
+        self,
+        html: str = "",
+        on_tag: Callable[[TAGElement], None] | None = None,
+        text_spans: bool = False,
+    ):
         self.html = html
+        self.on_tag = on_tag  # Called with every element as soon as its tag is parsed
+        # Text nodes reference spans of the source (or chunk) instead of copying their text, see `TextElement`
+        self.text_spans = text_spans
+        self.chunk_spans: List[TextElement] = (
+            []
+        )  # Text nodes with spans of the current chunk, see `feed`
         self.unfinished: List[TAGElement] = []
+        self.element_index = (
+            ElementIndex()
+        )  # Class and ID lookup tables of the parsed document, filled while parsing
+        self.buffer = ""  # Text or tag content read since the last `<` or `>`
+        self.in_tag = False
+        # Depends only on the open elements, updated whenever `unfinished` changes
+        self.insertion_mode = BEFORE_HTML
 
     def parse(self) -> HTMLElement:
         """Lexical and structural analysis of the HTML body. Returns the root HTML Node (most often <html>) which represents the DOM tree root."""
 
-        buffer = ""
-        in_tag = False
-
-        for char in self.html:
-            if char == "<":
-                in_tag = True
-                if buffer:
-                    self.add_text(
-                        buffer
-                    )  # Stores the text content that was before the open tag
-                buffer = ""
-            elif char == ">":
-                in_tag = False
-                self.add_tag(buffer)
-                buffer = ""
+        self.feed(self.html)
+        return self.close()
+
+    def feed(self, chunk: str):
+        """
+        Parse the next chunk of the document. The chunks may be split anywhere, even inside a tag,
+        so a document can be parsed while it is still being read. Call `close` after the last chunk.
+        """
+
+        start = 0
+        for match in DELIMITERS.finditer(chunk):
+            end = match.start()
+            if chunk[end] == "<":
+                self.in_tag = True
+                # Stores the text content that was before the open tag
+                if self.buffer:
+                    self.add_text(self.buffer + chunk[start:end])
+                elif end > start:
+                    self.add_text(chunk, start, end)
             else:
-                buffer += char
+                self.in_tag = False
+                self.add_tag(self.buffer + chunk[start:end])
+            self.buffer = ""
+            start = end + 1
+
+        # A token that continues in the next chunk
+        self.buffer += chunk[start:]
 
-        if not in_tag and buffer:
-            self.add_text(buffer)
+        if self.chunk_spans:
+            covered = sum(node._end - node._start for node in self.chunk_spans)
+            if covered < len(chunk) * SPAN_MIN_COVERAGE:
+                for node in self.chunk_spans:
+                    node.copy_span()
+            self.chunk_spans = []
+
+    def close(self) -> HTMLElement:
+        """Parse the remaining text after the last chunk. Returns the root HTML Node, see `parse`."""
+
+        if not self.in_tag and self.buffer:
+            self.add_text(self.buffer)
+        self.buffer = ""
 
         return self.finish()
 
-    def add_text(self, text: str):
+    def add_text(self, text: str, start: int = 0, end: int | None = None):
         """
-        This method creates a Text node with the given text content and adds it as a child of the
+        This method creates a Text node with the given text content (`text[start:end]`) and adds it as a child of the
         current unfinished (parent) element.
         """
 
-        if text.isspace():
+        if end is None:
+            end = len(text)
+
+        if NON_SPACE.search(text, start, end) is None:
             return  # Ignore whitespace-only text (not standard browser behavior)
 
         self.implicit_tags(None)
 
         parent = self.unfinished[-1]
-        node = TextElement(text, parent)
+        if self.text_spans:
+            node = TextElement(text, parent, start, end)
+            if start != 0 or end != len(text):
+                self.chunk_spans.append(node)
+        else:
+            node = TextElement(text[start:end], parent)
         parent.children.append(node)
 
     def add_tag(self, tag: str):
@@ -113,18 +185,26 @@ class HTMLParser:
             node = self.unfinished.pop()
             parent = self.unfinished[-1]
             parent.children.append(node)
+            self.update_insertion_mode()
         elif tag_name in SELF_CLOSING_TAGS:
             # Add the self-closing tag to the parent node directly
             parent = self.unfinished[-1]
             node = TAGElement(tag_name, parent, attributes)
+            self.element_index.add(node)
             parent.children.append(node)
+            if self.on_tag is not None:
+                self.on_tag(node)
         else:
             # Adds the new node to the unfinished list
             parent = (
                 self.unfinished[-1] if self.unfinished else None
             )  # Very first open tag has no parent
             node = TAGElement(tag_name, parent, attributes)
+            self.element_index.add(node)
             self.unfinished.append(node)
+            self.update_insertion_mode()
+            if self.on_tag is not None:
+                self.on_tag(node)
 
     def finish(self) -> HTMLElement:
         """Finishes the parsing process by closing any remaining tags in the unfinished list and returning the root node."""
@@ -136,25 +216,35 @@ class HTMLParser:
             node = self.unfinished.pop()
             parent = self.unfinished[-1]
             parent.children.append(node)
-        return self.unfinished.pop()
+        root = self.unfinished.pop()
+        self.update_insertion_mode()
+        return root
 
     def get_attributes(self, text: str) -> tuple[str, dict[str, str]]:
         """
         Parses the attributes of an HTML tag. Returns the tag name and a dictionary of attributes.
 
-        Example: `"meta charset="utf-8""` returns `("meta", {"charset": "utf-8"})`.
+        Example: `"meta charset="utf-8""` returns `("meta", {"charset": "utf-8"})`,
+        `"div class='note wide' hidden"` returns `("div", {"class": "note wide", "hidden": ""})`.
         """
 
-        parts = text.split()
+        parts = text.split(None, 1)
         tag_name = parts[0].casefold()
 
         attributes: dict[str, str] = {}
-        for attrpair in parts[1:]:
-            if "=" in attrpair:
-                key, value = attrpair.split("=", 1)
-                attributes[key.casefold()] = value.strip("\"'")
-            else:
-                attributes[attrpair.casefold()] = ""
+        if len(parts) > 1:
+            for match in ATTRIBUTE.finditer(parts[1]):
+                key, double_quoted, single_quoted, unquoted = match.groups()
+                value = next(
+                    (
+                        v
+                        for v in (double_quoted, single_quoted, unquoted)
+                        if v is not None
+                    ),
+                    "",
+                )
+                # Like browsers, the first of repeated attributes wins
+                attributes.setdefault(key.casefold(), value)
 
         return tag_name, attributes
 
@@ -162,23 +252,40 @@ class HTMLParser:
         """Handles implicit tags in the HTML structure. If the tag is not a self-closing tag, it closes the last unfinished tag."""
 
         while True:
-            open_tags = [node.tag_name for node in self.unfinished]
+            mode = self.insertion_mode
 
-            if open_tags == [] and tag_name != "html":
+            if mode == BEFORE_HTML and tag_name != "html":
                 self.add_tag("html")
-            elif open_tags == ["html"] and tag_name not in ["head", "body", "/html"]:
+            elif mode == BEFORE_HEAD and tag_name not in ("head", "body", "/html"):
                 if tag_name in self.HEAD_TAGS:
                     self.add_tag("head")
                 else:
                     self.add_tag("body")
             elif (
-                open_tags == ["html", "head"]
-                and tag_name not in ["/head"] + self.HEAD_TAGS
+                mode == IN_HEAD
+                and tag_name != "/head"
+                and tag_name not in self.HEAD_TAGS
             ):
                 self.add_tag("/head")
             else:
                 break  # Technically, the </body> and </html> tags can also be implicit. But since our finish function already closes any unfinished tags, that doesn’t need any extra code.
 
+    def update_insertion_mode(self):
+        """
+        Derive the insertion mode from the open elements. Only the depth and the second element are needed,
+        because the root is always <html> (see `implicit_tags`), so this takes constant time.
+        """
+
+        depth = len(self.unfinished)
+        if depth == 0:
+            self.insertion_mode = BEFORE_HTML
+        elif depth == 1:
+            self.insertion_mode = BEFORE_HEAD
+        elif depth == 2 and self.unfinished[1].tag_name == "head":
+            self.insertion_mode = IN_HEAD
+        else:
+            self.insertion_mode = IN_BODY
+
 
 def print_tree(
     node: HTMLElement | LayoutElement,
@@ -0,0 +1,53 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from common.constants import MAX_CONNECTIONS_PER_HOST
+from common.url import URL
+from nodes.tag_element import TAGElement
+
+
+class PreloadScanner:
+    """
+    Starts fetching the stylesheets of a page as soon as their `<link rel="stylesheet">` tag is parsed,
+    so the network time overlaps with parsing the rest of the page. Pass `scan` as the `on_tag` callback of the HTMLParser.
+    """
+
+    def __init__(self, base_url: URL, max_workers: int = MAX_CONNECTIONS_PER_HOST):
+        self.base_url = base_url
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="preload-scanner"
+        )
+        self.requests: dict[str, Future[str]] = {}  # href -> content of the resource
+
+    def scan(self, node: TAGElement):
+        if (
+            node.tag_name == "link"
+            and node.attributes.get("rel") == "stylesheet"
+            and "href" in node.attributes
+        ):
+            self.preload(node.attributes["href"])
+
+    def preload(self, href: str):
+        """Start fetching the resource, unless it is already being fetched."""
+
+        if href in self.requests:
+            return
+
+        try:
+            url = self.base_url.resolve(href)
+        except Exception as e:
+            self.requests[href] = Future()
+            self.requests[href].set_exception(e)
+            return
+
+        self.requests[href] = self.executor.submit(url.request)
+
+    def result(self, href: str) -> str:
+        """Wait for and return the content of the resource. Raises the exception of a failed request."""
+
+        self.preload(href)
+        return self.requests[href].result()
+
+    def close(self):
+        """Stop the worker threads once the running requests finish. Requests that have not started are cancelled."""
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules in src/ import each other as top-level packages (e.g. `from nodes.html_element import ...`),
+# the same way they are imported when running `python src/main.py`.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
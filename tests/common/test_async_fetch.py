@@ -0,0 +1,270 @@
+import asyncio
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import time
+import unittest
+
+from common.async_fetch import HostLimiter, connect_async, resolve_async
+from common.dns_cache import DNSCache
+from common.url import URL, request_all
+
+
+class LocalServer:
+    """
+    A local asyncio HTTP/1.0 server. Every path is answered with `body` after `delay` seconds,
+    `/stream` without a Content-Length header. Counts the concurrent connections.
+    """
+
+    def __init__(self, body: bytes, delay: float = 0):
+        self.body = body
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+
+    async def start(self, ssl_context: ssl.SSLContext | None = None) -> int:
+        self.server = await asyncio.start_server(
+            self.handle, "127.0.0.1", 0, ssl=ssl_context
+        )
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.requests += 1
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ")[1]
+            await asyncio.sleep(self.delay)
+
+            head = b"HTTP/1.0 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+            if path != b"/stream":
+                head += b"Content-Length: %d\r\n" % len(self.body)
+            writer.write(head + b"\r\n" + self.body)
+            await writer.drain()
+        finally:
+            self.active -= 1
+            writer.close()
+
+
+class TestRequestAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def test_request(self):
+        server = LocalServer("<p>Grüße</p>".encode("utf-8") * 1000)
+        port = await server.start()
+        try:
+            for path in ["/", "/stream"]:
+                content = await URL(f"http://127.0.0.1:{port}{path}").request_async()
+                self.assertEqual(content, "<p>Grüße</p>" * 1000)
+        finally:
+            await server.stop()
+
+    async def test_per_host_limit(self):
+        server = LocalServer(b"ok", delay=0.02)
+        port = await server.start()
+        try:
+            urls = [URL(f"http://127.0.0.1:{port}/{i}") for i in range(20)]
+            results = await request_all(urls, per_host=3)
+
+            self.assertEqual(results, ["ok"] * 20)
+            self.assertEqual(server.max_active, 3)
+        finally:
+            await server.stop()
+
+    async def test_timeout(self):
+        server = LocalServer(b"slow", delay=1)
+        port = await server.start()
+        try:
+            url = URL(f"http://127.0.0.1:{port}/")
+            with self.assertRaises(TimeoutError):
+                await url.request_async(timeout=0.05)
+        finally:
+            await server.stop()
+
+    async def test_timeout_excludes_waiting_for_limiter(self):
+        server = LocalServer(b"ok", delay=0.05)
+        port = await server.start()
+        try:
+            limiter = HostLimiter(1)
+            urls = [URL(f"http://127.0.0.1:{port}/{i}") for i in range(4)]
+            results = await asyncio.gather(
+                *(url.request_async(limiter, timeout=0.5) for url in urls)
+            )
+
+            self.assertEqual(results, ["ok"] * 4)
+        finally:
+            await server.stop()
+
+    async def test_errors_are_returned_in_order(self):
+        server = LocalServer(b"ok")
+        port = await server.start()
+        await server.stop()  # Nothing listens on the port anymore
+
+        other = LocalServer(b"other")
+        other_port = await other.start()
+        try:
+            results = await request_all(
+                [
+                    URL(f"http://127.0.0.1:{other_port}/"),
+                    URL(f"http://127.0.0.1:{port}/"),
+                ]
+            )
+
+            self.assertEqual(results[0], "other")
+            self.assertIsInstance(results[1], OSError)
+        finally:
+            await other.stop()
+
+    async def test_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as file:
+            file.write("<p>local</p>")
+        try:
+            self.assertEqual(
+                await URL(f"file://{file.name}").request_async(), "<p>local</p>"
+            )
+        finally:
+            os.unlink(file.name)
+
+    @unittest.skipIf(shutil.which("openssl") is None, "openssl is not installed")
+    async def test_tls(self):
+        with tempfile.TemporaryDirectory() as directory:
+            certificate = os.path.join(directory, "cert.pem")
+            key = os.path.join(directory, "key.pem")
+            subprocess.run(
+                ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+                + ["-keyout", key, "-out", certificate, "-days", "1"]
+                + ["-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"],
+                check=True,
+                capture_output=True,
+            )
+
+            server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            server_context.load_cert_chain(certificate, key)
+            client_context = ssl.create_default_context(cafile=certificate)
+
+            server = LocalServer(b"secure")
+            port = await server.start(server_context)
+            try:
+                url = URL(f"https://127.0.0.1:{port}/")
+                self.assertEqual(
+                    await url.request_async(ssl_context=client_context), "secure"
+                )
+                # The certificate is not trusted by the default context
+                with self.assertRaises(ssl.SSLError):
+                    await url.request_async()
+            finally:
+                await server.stop()
+
+
+class TestConnectAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+
+        # A port on which nothing listens
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        self.closed_port = closed.getsockname()[1]
+        closed.close()
+
+    async def asyncTearDown(self):
+        self.server.close()
+
+    def address(self, port: int) -> tuple:
+        return (
+            socket.AF_INET,
+            socket.SOCK_STREAM,
+            socket.IPPROTO_TCP,
+            "",
+            ("127.0.0.1", port),
+        )
+
+    async def test_resolve_uses_cache(self):
+        lookups = []
+
+        def resolver(host: str, port: int, type: int = 0) -> list[tuple]:
+            lookups.append(host)
+            return [self.address(port)]
+
+        cache = DNSCache(resolver)
+        for _ in range(3):
+            addresses = await resolve_async("site.test", self.port, cache)
+
+        self.assertEqual(addresses, [self.address(self.port)])
+        self.assertEqual(lookups, ["site.test"])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    async def test_falls_back_to_next_address(self):
+        sock = await connect_async(
+            [self.address(self.closed_port), self.address(self.port)]
+        )
+        try:
+            self.assertEqual(sock.getpeername(), ("127.0.0.1", self.port))
+        finally:
+            sock.close()
+
+    async def test_all_addresses_fail(self):
+        with self.assertRaises(ConnectionRefusedError):
+            await connect_async([self.address(self.closed_port)])
+
+    async def test_timeout_closes_sockets(self):
+        loop = asyncio.get_running_loop()
+        sockets = []
+
+        async def sock_connect(sock: socket.socket, address: tuple):
+            # Stands in for a connect to an address that does not answer
+            sockets.append(sock)
+            await asyncio.sleep(10)
+
+        loop.sock_connect = sock_connect  # type: ignore
+        try:
+            with self.assertRaises(TimeoutError):
+                async with asyncio.timeout(0.1):
+                    await connect_async(
+                        [self.address(self.port), self.address(self.port)],
+                        fallback_delay=0.01,
+                    )
+        finally:
+            del loop.sock_connect
+
+        self.assertEqual(len(sockets), 2)
+        self.assertTrue(all(sock.fileno() == -1 for sock in sockets))
+
+
+@unittest.skip("Performance test")
+class TestRequestAllThroughput(unittest.IsolatedAsyncioTestCase):
+
+    async def test_many_resources(self):
+        server = LocalServer(b"x" * 10_000, delay=0.01)
+        port = await server.start()
+        try:
+            urls = [URL(f"http://127.0.0.1:{port}/{i}") for i in range(300)]
+
+            start = time.perf_counter()
+            await asyncio.to_thread(lambda: [url.request() for url in urls])
+            sequential = time.perf_counter() - start
+
+            for per_host in [1, 6, 50]:
+                start = time.perf_counter()
+                await request_all(urls, per_host=per_host)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{len(urls)} requests: sequential {sequential * 1000:.0f} ms, concurrent (per_host={per_host}) {elapsed * 1000:.0f} ms"
+                )
+        finally:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(TestRequestAllThroughput().test_many_resources())
@@ -0,0 +1,85 @@
+import threading
+import unittest
+
+from common.background_loader import BackgroundLoader, LoadTask
+from common.url import URL
+
+
+class FakeWindow:
+    """Stands in for the Tk window, which needs a display. Scheduled callbacks run synchronously in `run_callbacks`."""
+
+    def __init__(self):
+        self.callbacks: list = []
+
+    def after(self, ms: int, callback):
+        self.callbacks.append(callback)
+
+    def run_callbacks(self, workers: list[threading.Thread]):
+        """Wait for the worker threads, as if the delay of `after` had passed, then run the callbacks."""
+
+        for worker in workers:
+            worker.join(timeout=5)
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class TestBackgroundLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.window = FakeWindow()
+        self.done: list[tuple[str, object]] = []
+        self.errors: list[tuple[str, Exception]] = []
+        # Loads of the paths in `blocked` wait until the event is set
+        self.blocked: dict[str, threading.Event] = {}
+        self.loader = BackgroundLoader(
+            self.window,
+            self.load,
+            lambda url, result: self.done.append((url.path, result)),
+            lambda url, error: self.errors.append((url.path, error)),
+        )
+
+    def load(self, task: LoadTask):
+        event = self.blocked.get(task.url.path)
+        if event is not None:
+            event.wait(timeout=5)
+        if task.url.path.endswith("fail"):
+            raise ValueError("broken page")
+        return f"page {task.url.path}"
+
+    def workers(self) -> list[threading.Thread]:
+        return [
+            thread
+            for thread in threading.enumerate()
+            if thread.name.startswith("load ")
+        ]
+
+    def test_result_is_delivered(self):
+        self.loader.start(URL("http://example.org/a"))
+        self.window.run_callbacks(self.workers())
+
+        self.assertEqual(self.done, [("/a", "page /a")])
+        self.assertEqual(self.errors, [])
+        self.assertFalse(self.loader.is_loading)
+
+    def test_superseded_result_is_dropped(self):
+        self.blocked["/old"] = threading.Event()
+        old = self.loader.start(URL("http://example.org/old"))
+        self.loader.start(URL("http://example.org/new"))
+        self.assertTrue(old.cancelled.is_set())
+
+        # The old load finishes after the new one started, its result must not replace the new page
+        self.blocked["/old"].set()
+        self.window.run_callbacks(self.workers())
+
+        self.assertEqual(self.done, [("/new", "page /new")])
+        self.assertEqual(self.errors, [])
+
+    def test_error_goes_to_on_error(self):
+        self.loader.start(URL("http://example.org/fail"))
+        self.window.run_callbacks(self.workers())
+
+        self.assertEqual(self.done, [])
+        self.assertEqual(len(self.errors), 1)
+        url, error = self.errors[0]
+        self.assertEqual(url, "/fail")
+        self.assertIsInstance(error, ValueError)
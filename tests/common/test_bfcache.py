@@ -0,0 +1,69 @@
+import unittest
+
+from browser import default_style_sheet
+from common.bfcache import BackForwardCache, CachedPage, estimate_page_size
+from common.memory import deep_sizeof
+from css_parser.style import cascade_priority, style
+from nodes.element_index import ElementIndex
+from parser.parser import HTMLParser
+
+
+def cached_page(size: int) -> CachedPage:
+    root = HTMLParser("<p>cached</p>").parse()
+    return CachedPage(root, ElementIndex(), None, [], 0, 0, 800, size)  # type: ignore
+
+
+class TestBackForwardCache(unittest.TestCase):
+
+    def test_take_removes_page(self):
+        cache = BackForwardCache(max_bytes=100)
+        page = cached_page(10)
+        cache.put("a", page)
+
+        self.assertIs(cache.take("a"), page)
+        self.assertIsNone(cache.take("a"))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = BackForwardCache(max_bytes=100)
+        cache.put("a", cached_page(40))
+        cache.put("b", cached_page(40))
+        cache.put("a", cache.take("a"))  # type: ignore # Revisiting makes "a" the most recently used
+        cache.put("c", cached_page(40))
+
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.total_bytes, 80)
+
+    def test_oversized_page_is_not_cached(self):
+        cache = BackForwardCache(max_bytes=100)
+        cache.put("a", cached_page(40))
+        cache.put("huge", cached_page(101))
+
+        self.assertNotIn("huge", cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_size_estimate_grows_with_document(self):
+        small = HTMLParser("<p>x</p>").parse()
+        large = HTMLParser("<p>x</p>" * 100).parse()
+
+        self.assertLess(
+            estimate_page_size(small, None, []),
+            estimate_page_size(large, None, []),
+        )
+
+    def test_size_estimate_close_to_measured_size(self):
+        for html in [
+            ("<p>" + "lorem ipsum dolor sit amet " * 200 + "</p>") * 50,
+            '<li class="item"><a href="/page" title="Page">item</a></li>' * 500,
+        ]:
+            parser = HTMLParser(html)
+            root = parser.parse()
+            style(root, sorted(default_style_sheet(), key=cascade_priority))
+            measured = deep_sizeof([root, parser.element_index])
+
+            estimate = estimate_page_size(root, None, [])
+
+            self.assertLess(estimate, 1.5 * measured)
+            self.assertGreater(estimate, measured / 1.5)
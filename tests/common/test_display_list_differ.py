@@ -0,0 +1,156 @@
+import random
+import time
+import unittest
+
+from common.display_list_differ import DIFF_TAG, DisplayListDiffer
+from draw_commands.DrawRect import DrawRect
+from draw_commands.DrawText import DrawText
+from tests.fakes import FakeCanvas, FakeFont
+
+FONT = FakeFont()  # Fonts are shared through the font cache
+
+
+def painted_from_scratch(display_list: list, scroll: float, height: float) -> list:
+    """What drawing every visible command on an empty canvas shows."""
+
+    canvas = FakeCanvas()
+    for cmd in display_list:
+        if cmd.top <= scroll + height and cmd.bottom >= scroll:
+            cmd.execute(scroll, canvas)  # type: ignore
+    return canvas.painted()
+
+
+def paragraph(words: list[str], width: int, background: str | None = None) -> list:
+    """A display list of the words wrapped at the width, 10 pixels per character, on an optional background."""
+
+    cmds: list = []
+    x, y = 0, 0
+    for word in words:
+        if x + 10 * len(word) > width and x > 0:
+            x, y = 0, y + 20
+        cmds.append(DrawText(word, x, y, FONT, "black"))  # type: ignore
+        x += 10 * (len(word) + 1)
+    if background is not None:
+        cmds.insert(0, DrawRect(0, 0, width, y + 20, background))
+    return cmds
+
+
+class TestDisplayListDiffer(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = FakeCanvas()
+        self.differ = DisplayListDiffer(self.canvas)  # type: ignore
+
+    def render(self, display_list: list, scroll: float = 0, height: float = 1000):
+        self.differ.render(display_list, scroll, height)
+
+        self.assertEqual(
+            self.canvas.painted(), painted_from_scratch(display_list, scroll, height)
+        )
+
+    def test_same_display_list_changes_nothing(self):
+        words = [f"word{i}" for i in range(50)]
+        self.render(paragraph(words, 400))
+        self.assertEqual(self.differ.created, 50)
+
+        self.render(paragraph(words, 400))
+
+        self.assertEqual(self.differ.diff_size, 0)
+        self.assertEqual(self.differ.kept, 50)
+
+    def test_resize_moves_items(self):
+        words = [f"word{i}" for i in range(50)]
+        self.render(paragraph(words, 400, "yellow"))
+
+        self.render(paragraph(words, 300, "yellow"))
+
+        self.assertEqual(self.differ.created, 0)
+        self.assertEqual(self.differ.deleted, 0)
+        self.assertGreater(self.differ.moved, 0)
+        self.assertLess(self.differ.moved, 51)
+
+    def test_changed_words_are_created_and_deleted(self):
+        self.render(paragraph(["one", "two", "three"], 400))
+
+        self.render(paragraph(["one", "2", "three", "four"], 400))
+
+        # "one" is kept, "three" moves, "two" is replaced by "2" and "four" is added
+        self.assertEqual(self.differ.kept, 1)
+        self.assertEqual(
+            (self.differ.created, self.differ.moved, self.differ.deleted), (2, 1, 1)
+        )
+
+    def test_created_items_keep_paint_order(self):
+        words = ["some", "words"]
+        self.render(paragraph(words, 400))
+
+        # The new background has to be painted below the existing words
+        self.render(paragraph(words, 400, "yellow"))
+        self.assertEqual(self.differ.created, 1)
+
+        self.render(
+            [DrawRect(0, 0, 50, 50, "red")] + paragraph(words, 400, "yellow")  # type: ignore
+        )
+        self.assertEqual(self.differ.created, 1)
+
+    def test_scrolling_moves_all_items_at_once(self):
+        display_list = paragraph([f"w{i}" for i in range(200)], 100)
+        self.render(display_list, 0, 300)
+        operations = self.canvas.operations
+
+        self.render(display_list, 100, 300)
+
+        # Only the commands scrolled into or out of view
+        self.assertEqual(self.differ.moved, 0)
+        self.assertEqual(
+            self.canvas.operations - operations,
+            self.differ.created + self.differ.deleted,
+        )
+        self.assertTrue(
+            all(DIFF_TAG in item["tags"] for item in self.canvas.items.values())
+        )
+
+    def test_random_edits(self):
+        rng = random.Random(0)
+        vocabulary = ["a", "bb", "ccc", "dddd"]
+        for _ in range(50):
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(0, 60))]
+            background = rng.choice([None, "yellow"])
+            self.render(
+                paragraph(words, rng.randint(50, 400), background),
+                rng.randint(0, 100),
+                rng.randint(50, 300),
+            )
+
+
+@unittest.skip("Performance test")
+class TestDisplayListDifferPerformance(unittest.TestCase):
+    """Canvas operations of resizing a window over a long paragraph, with and without diffing."""
+
+    def test_performance(self):
+        words = [f"word{i % 50}" for i in range(20_000)]
+        widths = range(800, 600, -10)
+
+        for diffing in (False, True):
+            canvas = FakeCanvas()
+            differ = DisplayListDiffer(canvas)  # type: ignore
+            start = time.perf_counter()
+            for width in widths:
+                display_list = paragraph(words, width)
+                if diffing:
+                    differ.render(display_list, 1000, 600)
+                else:
+                    canvas.delete(*list(canvas.items))
+                    for cmd in display_list:
+                        if cmd.top <= 1600 and cmd.bottom >= 1000:
+                            cmd.execute(1000, canvas)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"diffing={diffing}: {canvas.operations / len(widths):.0f} canvas operations per frame, "
+                f"{elapsed * 1000 / len(widths):.1f} ms per frame"
+            )
+
+
+if __name__ == "__main__":
+    TestDisplayListDifferPerformance().test_performance()
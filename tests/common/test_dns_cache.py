@@ -0,0 +1,151 @@
+import socket
+import threading
+import unittest
+
+from common.dns_cache import DNSCache, connect, create_connection, interleave
+
+
+def address(family: int, host: str, port: int) -> tuple:
+    sockaddr = (host, port) if family == socket.AF_INET else (host, port, 0, 0)
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", sockaddr)
+
+
+class FakeResolver:
+    """Stands in for `socket.getaddrinfo`. Answers from a table of hosts and counts the lookups."""
+
+    def __init__(self, hosts: dict[str, list[tuple[int, str]]]):
+        self.hosts = hosts
+        self.lookups = 0
+
+    def __call__(self, host: str, port: int, type: int = 0) -> list[tuple]:
+        self.lookups += 1
+        if host not in self.hosts:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [address(family, ip, port) for family, ip in self.hosts[host]]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDNSCache(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = FakeResolver({"example.org": [(socket.AF_INET, "127.0.0.1")]})
+        self.clock = FakeClock()
+        self.cache = DNSCache(self.resolver, ttl=60, negative_ttl=5, clock=self.clock)
+
+    def test_hits_and_misses(self):
+        first = self.cache.resolve("example.org", 80)
+        second = self.cache.resolve("example.org", 80)
+        self.cache.resolve("example.org", 443)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0][4], ("127.0.0.1", 80))
+        self.assertEqual(self.resolver.lookups, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_ttl(self):
+        self.cache.resolve("example.org", 80)
+        self.clock.now = 59
+        self.cache.resolve("example.org", 80)
+        self.clock.now = 60
+        self.cache.resolve("example.org", 80)
+
+        self.assertEqual(self.resolver.lookups, 2)
+
+    def test_negative_caching(self):
+        for now in [0, 4, 5]:
+            self.clock.now = now
+            self.assertRaises(
+                socket.gaierror, lambda: self.cache.resolve("unknown.test", 80)
+            )
+
+        self.assertEqual(self.resolver.lookups, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_cached_error_is_raised_fresh(self):
+        errors = []
+        for _ in range(2):
+            try:
+                self.cache.resolve("unknown.test", 80)
+            except socket.gaierror as error:
+                errors.append(error)
+
+        # Raising the cached instance again would chain the tracebacks of all failed lookups
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEqual(errors[0].args, errors[1].args)
+        self.assertEqual(self.resolver.lookups, 1)
+
+    def test_shared_between_threads(self):
+        threads = [
+            threading.Thread(target=self.cache.resolve, args=("example.org", 80))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.hits + self.cache.misses, 20)
+
+
+class TestInterleave(unittest.TestCase):
+
+    def test_alternates_families(self):
+        v6 = [address(socket.AF_INET6, f"::{i}", 80) for i in range(1, 4)]
+        v4 = [address(socket.AF_INET, f"10.0.0.{i}", 80) for i in range(1, 3)]
+
+        self.assertEqual(interleave(v6 + v4), [v6[0], v4[0], v6[1], v4[1], v6[2]])
+        self.assertEqual(interleave(v4), v4)
+
+
+class TestConnect(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+
+        # A port on which nothing listens
+        closed = socket.socket()
+        closed.bind(("127.0.0.1", 0))
+        self.closed_port = closed.getsockname()[1]
+        closed.close()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_falls_back_to_next_address(self):
+        sock = connect(
+            [
+                address(socket.AF_INET, "127.0.0.1", self.closed_port),
+                address(socket.AF_INET, "127.0.0.1", self.port),
+            ]
+        )
+        try:
+            self.assertEqual(sock.getpeername(), ("127.0.0.1", self.port))
+            self.assertTrue(sock.getblocking())
+        finally:
+            sock.close()
+
+    def test_all_addresses_fail(self):
+        self.assertRaises(
+            ConnectionRefusedError,
+            lambda: connect([address(socket.AF_INET, "127.0.0.1", self.closed_port)]),
+        )
+
+    def test_create_connection_uses_cache(self):
+        resolver = FakeResolver({"site.test": [(socket.AF_INET, "127.0.0.1")]})
+        cache = DNSCache(resolver)
+
+        for _ in range(3):
+            create_connection("site.test", self.port, cache).close()
+
+        self.assertEqual(resolver.lookups, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
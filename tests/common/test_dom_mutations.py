@@ -0,0 +1,173 @@
+import unittest
+
+from common.dom_mutations import NO_DAMAGE, RELAYOUT, REPAINT, DOMMutations
+from css_parser.regex_css_parser import RegexCSSParser
+from css_parser.style import cascade_priority, style
+from nodes.element_index import ElementIndex
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+from parser.parser import HTMLParser
+
+CSS = """
+p { font-size: 20px; }
+.note { color: blue; }
+.warning p { font-weight: bold; }
+#main { font-style: italic; }
+.shaded { background-color: gray; }
+"""
+
+HTML = """<body>
+<div id="box"><p>first <b>bold</b></p><p>second</p></div>
+<div class="other"><p>third</p></div>
+</body>"""
+
+
+def all_nodes(node) -> list:
+    nodes = [node]
+    for child in node.children:
+        nodes.extend(all_nodes(child))
+    return nodes
+
+
+def styles(root) -> list[dict]:
+    return [dict(node.style) for node in all_nodes(root)]
+
+
+class TestDOMMutations(unittest.TestCase):
+
+    def setUp(self):
+        parser = HTMLParser(HTML)
+        self.root = parser.parse()
+        self.index = parser.element_index
+        self.rules = sorted(RegexCSSParser(CSS).parse_css_file(), key=cascade_priority)
+        style(self.root, self.rules, self.index)
+
+        self.damage_calls = 0
+        self.dom = DOMMutations(self.index, self.rules, self.on_damage)
+
+        self.box = self.index.by_id["box"][0]
+        self.first_p = self.box.children[0]
+
+    def on_damage(self):
+        self.damage_calls += 1
+
+    def assert_styles_up_to_date(self):
+        """The styles after the mutations equal the styles of styling the whole tree again."""
+
+        restyled = styles(self.root)
+        style(self.root, self.rules, self.index)
+        self.assertEqual(restyled, styles(self.root))
+
+    def test_class_used_by_descendant_selector_restyles_subtree(self):
+        self.dom.set_attribute(self.box, "class", "warning")
+
+        self.assertEqual(self.first_p.style["font-weight"], "bold")
+        self.assertEqual(self.dom.last_restyled, len(all_nodes(self.box)))
+        self.assertEqual(self.dom.take_damage(), RELAYOUT)
+        self.assert_styles_up_to_date()
+
+    def test_class_of_element_restyles_element_and_inheriting_descendants(self):
+        self.dom.set_attribute(self.first_p, "class", "note")
+
+        self.assertEqual(self.first_p.children[1].children[0].style["color"], "blue")
+        # <p>, "first", <b> and "bold"
+        self.assertEqual(self.dom.last_restyled, 4)
+        self.assert_styles_up_to_date()
+
+    def test_unused_class_restyles_nothing(self):
+        self.dom.set_attribute(self.first_p, "class", "unused")
+
+        self.assertEqual(self.dom.last_restyled, 0)
+        self.assertEqual(self.dom.take_damage(), NO_DAMAGE)
+        self.assertEqual(self.damage_calls, 0)
+        self.assertEqual(self.index.by_class["unused"], [self.first_p])
+
+    def test_id_change_updates_index(self):
+        self.dom.set_attribute(self.box, "id", "main")
+
+        self.assertNotIn("box", self.index.by_id)
+        self.assertEqual(self.index.by_id["main"], [self.box])
+        self.assertEqual(self.first_p.style["font-style"], "italic")
+        self.assert_styles_up_to_date()
+
+    def test_inline_style(self):
+        self.dom.set_inline_style(self.first_p, "color", "red")
+        self.dom.set_inline_style(self.first_p, "font-size", "10px")
+
+        self.assertEqual(
+            self.first_p.attributes["style"], "color: red; font-size: 10px"
+        )
+        self.assertEqual(self.first_p.children[0].style["color"], "red")
+        self.assert_styles_up_to_date()
+
+        self.dom.set_inline_style(self.first_p, "color", None)
+        self.dom.set_inline_style(self.first_p, "font-size", None)
+
+        self.assertNotIn("style", self.first_p.attributes)
+        self.assert_styles_up_to_date()
+
+    def test_paint_only_property_needs_repaint(self):
+        self.dom.set_attribute(self.first_p, "class", "shaded")
+
+        self.assertEqual(self.dom.last_restyled, 1)
+        self.assertEqual(self.dom.take_damage(), REPAINT)
+        self.assertEqual(self.damage_calls, 1)
+
+    def test_insert_child(self):
+        new = HTMLParser('<div class="warning"><p>new</p></div>').parse()
+        div = new.children[0].children[0]
+        div.parent = None
+
+        self.dom.insert_child(self.root.children[0], div, 0)
+
+        self.assertIs(self.root.children[0].children[0], div)
+        self.assertEqual(div.children[0].style["font-weight"], "bold")
+        self.assertEqual(self.dom.last_restyled, 3)
+        self.assertIn(div, self.index.by_class["warning"])
+        self.assertEqual(self.dom.take_damage(), RELAYOUT)
+        self.assert_styles_up_to_date()
+
+    def test_remove_child(self):
+        self.dom.set_attribute(self.first_p, "class", "note")
+        self.dom.take_damage()
+
+        self.dom.remove_child(self.box, self.first_p)
+
+        self.assertNotIn(self.first_p, self.box.children)
+        self.assertIsNone(self.first_p.parent)
+        self.assertNotIn("note", self.index.by_class)
+        self.assertEqual(self.dom.last_restyled, 0)
+        self.assertEqual(self.dom.take_damage(), RELAYOUT)
+        self.assert_styles_up_to_date()
+
+    def test_set_text(self):
+        text = self.first_p.children[0]
+        self.assertIsInstance(text, TextElement)
+
+        self.dom.set_text(text, "changed words")
+
+        self.assertEqual(text.words, ("changed", "words"))
+        self.assertEqual(self.dom.take_damage(), RELAYOUT)
+
+    def test_counters(self):
+        self.dom.set_attribute(self.box, "class", "warning")
+        self.dom.set_attribute(self.first_p, "title", "no style")
+
+        self.assertEqual(self.dom.mutations, 2)
+        self.assertEqual(self.dom.nodes_restyled, len(all_nodes(self.box)))
+        self.assertEqual(self.dom.last_restyled, 0)
+
+
+class TestElementIndexRemove(unittest.TestCase):
+
+    def test_remove(self):
+        index = ElementIndex()
+        a = TAGElement("p", None, {"class": "x y", "id": "a"})
+        b = TAGElement("p", None, {"class": "x"})
+        index.add(a)
+        index.add(b)
+
+        index.remove(a)
+
+        self.assertEqual(index.by_class, {"x": [b]})
+        self.assertEqual(index.by_id, {})
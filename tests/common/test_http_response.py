@@ -0,0 +1,182 @@
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.http_response import parse_head, read_response
+from common.url import URL
+
+
+def receive(*parts: bytes):
+    """Send the parts (with a short pause between them) over a socket pair and read the response from the other end."""
+
+    client, server = socket.socketpair()
+
+    def send():
+        for part in parts:
+            server.sendall(part)
+            time.sleep(0.01)
+        server.close()
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    try:
+        return read_response(client)
+    finally:
+        thread.join()
+        client.close()
+
+
+class TestReadResponse(unittest.TestCase):
+
+    def test_content_length(self):
+        response = receive(
+            b"HTTP/1.0 200 OK\r\nContent-Length: 11\r\nX-Test: a: b\r\n\r\nhello",
+            b" world",
+        )
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.reason, "OK")
+        self.assertEqual(response.headers["x-test"], "a: b")
+        self.assertEqual(response.body, b"hello world")
+
+    def test_headers_split_between_packets(self):
+        response = receive(b"HTTP/1.0 404 Not", b" Found\r\nA: 1\r", b"\n\r\nbody")
+
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response.reason, "Not Found")
+        self.assertEqual(response.headers, {"a": "1"})
+        self.assertEqual(response.body, b"body")
+
+    def test_read_until_close(self):
+        response = receive(b"HTTP/1.0 200 OK\r\n\r\nfirst ", b"second")
+
+        self.assertEqual(response.body, b"first second")
+
+    def test_truncated_body(self):
+        self.assertRaises(
+            ConnectionError,
+            lambda: receive(b"HTTP/1.0 200 OK\r\nContent-Length: 10\r\n\r\nshort"),
+        )
+
+    def test_status_line_without_reason(self):
+        self.assertEqual(parse_head(b"HTTP/1.1 204"), ("HTTP/1.1", 204, "", {}))
+
+
+class TestCharset(unittest.TestCase):
+
+    def test_content_type_charset(self):
+        response = receive(
+            b"HTTP/1.0 200 OK\r\nContent-Type: text/html; charset=ISO-8859-1\r\n\r\n",
+            "Grüße".encode("latin-1"),
+        )
+
+        self.assertEqual(response.charset(), "iso8859-1")
+        self.assertEqual(response.text(), "Grüße")
+
+    def test_meta_charset(self):
+        body = '<html><head><meta charset="windows-1252"></head>€</html>'
+        response = receive(b"HTTP/1.0 200 OK\r\n\r\n", body.encode("cp1252"))
+
+        self.assertEqual(response.text(), body)
+
+    def test_meta_http_equiv(self):
+        body = (
+            b'<meta http-equiv="Content-Type" content="text/html; charset=latin-1">\xe9'
+        )
+        response = receive(b"HTTP/1.0 200 OK\r\n\r\n", body)
+
+        self.assertEqual(response.charset(), "iso8859-1")
+
+    def test_default_and_unknown_charset(self):
+        for head in [b"", b"Content-Type: text/html; charset=nonsense\r\n"]:
+            response = receive(b"HTTP/1.0 200 OK\r\n" + head + b"\r\n", "ü".encode())
+
+            self.assertEqual(response.charset(), "utf-8")
+            self.assertEqual(response.text(), "ü")
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """Serves `body` for every path, with a Content-Length header unless the path is `/stream`."""
+
+    body = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if self.path != "/stream":
+            self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(body: bytes) -> ThreadingHTTPServer:
+    handler = type("Handler", (StaticHandler,), {"body": body})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestRequest(unittest.TestCase):
+
+    def test_request_local_server(self):
+        body = "<p>Grüße</p>" * 1000
+        server = start_server(body.encode("utf-8"))
+        try:
+            port = server.server_address[1]
+            for path in ["/", "/stream"]:
+                self.assertEqual(URL(f"http://127.0.0.1:{port}{path}").request(), body)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def legacy_request(url: URL) -> str:
+    """The previous implementation of `URL.request`, reading the response through a text file object."""
+
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    s.connect((url.host, url.port))
+    s.send(f"GET {url.path} HTTP/1.0\r\nHost: {url.host}\r\n\r\n".encode("utf-8"))
+
+    response = s.makefile("r", encoding="utf-8", newline="\r\n")
+    response.readline()
+    while response.readline() != "\r\n":
+        pass
+    content = response.read()
+    s.close()
+    return content
+
+
+@unittest.skip("Performance test")
+class TestRequestThroughput(unittest.TestCase):
+
+    def test_throughput(self):
+        for size_mb in [1, 16, 64]:
+            body = ("<p>Grüße aus dem Netz</p>\n" * (size_mb * 40_000)).encode("utf-8")
+            server = start_server(body)
+            port = server.server_address[1]
+            try:
+                for path in ["/", "/stream"]:
+                    url = URL(f"http://127.0.0.1:{port}{path}")
+                    for name, request in [
+                        ("makefile", legacy_request),
+                        ("bytes", URL.request),
+                    ]:
+                        start = time.perf_counter()
+                        for _ in range(5):
+                            request(url)
+                        elapsed = (time.perf_counter() - start) / 5
+                        print(
+                            f"{len(body) / 1024 / 1024:6.1f} MB {path:<8} {name:<9} {elapsed * 1000:8.1f} ms, {len(body) / 1024 / 1024 / elapsed:7.1f} MB/s"
+                        )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    TestRequestThroughput().test_throughput()
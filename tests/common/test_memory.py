@@ -0,0 +1,46 @@
+import tracemalloc
+import unittest
+
+from browser import tree_to_list
+from common.memory import MemoryProfiler, deep_sizeof, measure_tree
+from parser.parser import HTMLParser
+
+
+class TestMemoryProfiler(unittest.TestCase):
+
+    def test_shared_objects_are_counted_once(self):
+        shared = ["x" * 1000]
+
+        self.assertEqual(deep_sizeof([shared, shared]), deep_sizeof([shared]))
+        self.assertLess(deep_sizeof([shared], exclude=shared), deep_sizeof([shared]))
+
+    def test_object_counts(self):
+        root = HTMLParser("<p>one</p><p>two</p>").parse()
+
+        counts = measure_tree(tree_to_list(root, []))["objects"]
+
+        self.assertEqual(counts["TAGElement"], 4)  # html, body, p, p
+        self.assertEqual(counts["TextElement"], 2)
+
+    def test_stage_report(self):
+        profiler = MemoryProfiler(enabled=True, report_path=None)
+        self.addCleanup(tracemalloc.stop)
+        report = profiler.begin_load("file:///test.html")
+
+        with profiler.stage(report, "parse"):
+            kept = HTMLParser("<p>text</p>" * 1000).parse()
+
+        assert report is not None
+        self.assertEqual(report.stages[0]["stage"], "parse")
+        self.assertGreater(report.stages[0]["allocated_bytes"], 0)
+        self.assertTrue(report.stages[0]["top"])
+        del kept
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = MemoryProfiler()
+
+        report = profiler.begin_load("file:///test.html")
+        with profiler.stage(report, "parse"):
+            pass
+
+        self.assertIsNone(report)
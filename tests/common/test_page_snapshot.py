@@ -0,0 +1,100 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from browser import default_style_sheet, tree_to_list
+from common.page_snapshot import (
+    PageSnapshotStore,
+    read_snapshot,
+    snapshot_commands,
+    snapshot_key,
+    write_snapshot,
+)
+from css_parser.style import cascade_priority, style
+from draw_commands.DrawRect import DrawRect
+from draw_commands.DrawText import DrawText
+from nodes.tag_element import TAGElement
+from parser.parser import HTMLParser
+from tests.fakes import get_fake_font
+
+HTML = (
+    '<html><body><div id=main class="box" style="background-color: gray">'
+    "<p>Hello <b>bold</b> wörld</p><big>big</big></div></body></html>"
+)
+
+
+def describe(node) -> tuple:
+    if isinstance(node, TAGElement):
+        return (node.tag_name, node.attributes, dict(node.style))
+    return (node.text, dict(node.style))
+
+
+class TestPageSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "page.snapshot")
+
+        self.root = HTMLParser(HTML).parse()
+        style(self.root, sorted(default_style_sheet(), key=cascade_priority))
+        self.display_list = [
+            DrawRect(13, 18, 813, 40, "gray"),
+            DrawText("Hello", 13, 18, get_fake_font(12, "normal", "roman", False), "black"),  # type: ignore
+            DrawText("bold", 60.5, 18, get_fake_font(12, "bold", "italic", True), "blue"),  # type: ignore
+        ]
+
+    def test_dom_round_trip(self):
+        write_snapshot(self.path, self.root, 123.5, [])
+        snapshot = read_snapshot(self.path)
+
+        self.assertEqual(snapshot.content_height, 123.5)
+        self.assertEqual(
+            [describe(node) for node in tree_to_list(self.root, [])],
+            [describe(node) for node in tree_to_list(snapshot.root_node, [])],
+        )
+        self.assertEqual(len(snapshot.element_index.lookup(("id", "main"))), 1)
+        self.assertEqual(len(snapshot.element_index.lookup(("class", "box"))), 1)
+
+    def test_display_list_round_trip(self):
+        commands = snapshot_commands(self.display_list, lambda font: font.key)  # type: ignore
+        write_snapshot(self.path, self.root, 0, commands)
+        display_list = read_snapshot(self.path).display_list(get_fake_font)
+
+        self.assertEqual(len(display_list), 3)
+        rect, hello, bold = display_list
+        assert isinstance(rect, DrawRect) and isinstance(bold, DrawText)
+        self.assertEqual(
+            (rect.left, rect.top, rect.right, rect.bottom, rect.color),
+            (13, 18, 813, 40, "gray"),
+        )
+        self.assertEqual(
+            (bold.text, bold.left, bold.top, bold.color), ("bold", 60.5, 18, "blue")
+        )
+        self.assertEqual(bold.font.key, (12, "bold", "italic", True))  # type: ignore
+
+    def test_store(self):
+        store = PageSnapshotStore(self.directory.name)
+        key = snapshot_key([HTML], 800)
+
+        self.assertIsNone(store.load(key))
+        font_key_threads = []
+
+        def font_key(font):
+            font_key_threads.append(threading.current_thread())
+            return font.key
+
+        # Written on the writer thread, only the fonts are read on the calling thread
+        store.save(key, self.root, 10, self.display_list, font_key).result()
+        self.assertIsNotNone(store.load(key))
+        self.assertEqual(set(font_key_threads), {threading.current_thread()})
+        self.assertNotEqual(key, snapshot_key([HTML], 600))
+        self.assertNotEqual(key, snapshot_key([HTML + " "], 800))
+
+    def test_invalid_file_is_ignored(self):
+        store = PageSnapshotStore(self.directory.name)
+        for content in [b"", b"not a snapshot", b"BESN\x01\x00"]:
+            with open(store.path("broken"), "wb") as file:
+                file.write(content)
+            self.assertIsNone(store.load("broken"))
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+
+from common.perf_hud import HUD_TAG, PerfHUD, PerfStats, RollingHistogram
+from tests.fakes import FakeCanvas
+
+
+class TestRollingHistogram(unittest.TestCase):
+
+    def test_keeps_recent_samples(self):
+        histogram = RollingHistogram(size=3)
+        for value in [1, 2, 3, 4]:
+            histogram.add(value)
+
+        self.assertEqual(list(histogram.samples), [2, 3, 4])
+        self.assertEqual(histogram.total, 4)
+        self.assertEqual(histogram.last, 4)
+
+    def test_percentiles(self):
+        histogram = RollingHistogram()
+        self.assertIsNone(histogram.percentile(50))
+
+        for value in range(1, 101):
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentile(50), 50)
+        self.assertEqual(histogram.percentile(90), 90)
+        self.assertEqual(histogram.percentile(100), 100)
+        self.assertEqual(histogram.percentile(0), 1)
+
+    def test_buckets(self):
+        histogram = RollingHistogram()
+        for value in [0.5, 1, 1.5, 16, 17, 5000]:
+            histogram.add(value)
+
+        counts = histogram.buckets()
+
+        # Bounds are inclusive: 1 ms is in the first bucket, 16 ms in the "up to 16 ms" bucket
+        self.assertEqual(counts[:6], [2, 1, 0, 0, 1, 1])
+        self.assertEqual(counts[-1], 1)
+        self.assertEqual(sum(counts), 6)
+
+
+class TestPerfStats(unittest.TestCase):
+
+    def test_record_and_dump(self):
+        stats = PerfStats(history_size=10)
+        self.assertIsNone(stats.last("draw"))
+
+        for i in range(20):
+            stats.record("draw", i)
+        stats.record("layout", 12.5)
+
+        self.assertEqual(stats.last("draw"), 19)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.json")
+            stats.dump(path)
+            with open(path, encoding="utf-8") as file:
+                dumped = json.load(file)
+
+        self.assertEqual(dumped["draw"]["total"], 20)
+        self.assertEqual(dumped["draw"]["samples"], 10)
+        self.assertEqual(dumped["draw"]["max"], 19)
+        self.assertEqual(dumped["layout"]["p50"], 12.5)
+
+
+class TestPerfHUD(unittest.TestCase):
+
+    def test_toggle(self):
+        canvas = FakeCanvas()
+        hud = PerfHUD(canvas)  # type: ignore
+
+        hud.draw(["hidden"])
+        self.assertEqual(canvas.items, {})
+
+        hud.toggle()
+        hud.draw(["draw 1.0 ms", "layout 2.0 ms"])
+        hud.draw(["draw 1.5 ms", "layout 2.0 ms"])
+        # A background and one text per line, the items of the previous frame are deleted
+        self.assertEqual(
+            [item["tags"] for item in canvas.items.values()], [{HUD_TAG}] * 3
+        )
+
+        hud.toggle()
+        self.assertEqual(canvas.items, {})
@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.prefetcher import Prefetcher, ResponseCache
+from common.url import URL
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every path with its own path as body after `delay` seconds."""
+
+    delay = 0.0
+    requested: list[str] = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        time.sleep(self.delay)
+        body = f"page {self.path}".encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except ConnectionError:
+            pass  # The client gave up waiting, e.g. after a timeout
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_take_once(self):
+        cache = ResponseCache()
+        url = URL("http://example.org/a")
+        cache.put(url, url, "content")
+
+        self.assertIn(url, cache)
+        self.assertEqual(cache.take(url), (url, "content"))
+        self.assertIsNone(cache.take(url))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_max_age(self):
+        now = [0.0]
+        cache = ResponseCache(max_age=60, clock=lambda: now[0])
+        fresh, stale = URL("http://example.org/fresh"), URL("http://example.org/stale")
+        cache.put(stale, stale, "old content")
+        now[0] = 30
+        cache.put(fresh, fresh, "content")
+        now[0] = 60
+
+        self.assertNotIn(stale, cache)  # Prefetched again
+        self.assertIsNone(cache.take(stale))
+        self.assertEqual(cache.take(fresh), (fresh, "content"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_byte_budget(self):
+        urls = [URL(f"http://example.org/{i}") for i in range(4)]
+        # A 1000 character string takes a little more than 1000 bytes
+        cache = ResponseCache(max_bytes=3 * 1100)
+
+        for url in urls:
+            cache.put(url, url, "x" * 1000)
+        cache.put(URL("http://example.org/huge"), urls[0], "x" * cache.max_bytes)
+
+        self.assertEqual([url in cache for url in urls], [False, True, True, True])
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+        self.assertEqual(len(cache), 3)
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = type("Handler", (SlowHandler,), {"delay": 0.1, "requested": []})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.prefetcher = Prefetcher(ResponseCache(), max_links=2, max_workers=1)
+
+    def tearDown(self):
+        self.prefetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_take_waits_for_running_fetch(self):
+        url = URL(f"{self.origin}/a")
+        self.prefetcher.prefetch([url])
+
+        final_url, content = self.prefetcher.take(url)  # type: ignore
+
+        self.assertEqual(content, "page /a")
+        self.assertEqual(str(final_url), str(url))
+        self.assertIsNone(self.prefetcher.take(url))
+        self.assertEqual(self.handler.requested, ["/a"])
+
+    def test_only_top_links_are_prefetched(self):
+        urls = [URL(f"{self.origin}/{i}") for i in range(4)]
+        self.prefetcher.prefetch([URL("file:///tmp/local.html")] + urls)
+
+        self.assertEqual(list(self.prefetcher.requests), [str(url) for url in urls[:2]])
+
+    def test_queued_fetches_are_cancelled(self):
+        first, second, third = [URL(f"{self.origin}/{i}") for i in range(3)]
+        self.prefetcher.prefetch([first, second])
+        time.sleep(0.02)  # `first` is running, `second` is queued behind it
+        self.prefetcher.prefetch([first, third])
+
+        self.prefetcher.take(first)
+        self.prefetcher.take(third)
+
+        self.assertEqual(self.handler.requested, ["/0", "/2"])
+
+    def test_requests_time_out(self):
+        # A server that stops answering must not block a prefetch worker forever
+        with self.assertRaises(TimeoutError):
+            URL(f"{self.origin}/slow").send_request(timeout=0.02)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common.url import MAX_REDIRECTS, PERMANENT_REDIRECTS, URL
+
+
+class RedirectHandler(BaseHTTPRequestHandler):
+    """Answers paths in `redirects` with a redirect and all other paths with their own path as body."""
+
+    redirects: dict[str, tuple[int, str]] = {}
+    requested: list[str] = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        if self.path in self.redirects:
+            status, location = self.redirects[self.path]
+            self.send_response(status)
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = f"page {self.path}".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRedirects(unittest.TestCase):
+
+    def setUp(self):
+        PERMANENT_REDIRECTS.clear()
+        self.handler = type(
+            "Handler", (RedirectHandler,), {"redirects": {}, "requested": []}
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        PERMANENT_REDIRECTS.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path: str) -> URL:
+        return URL(f"{self.origin}{path}")
+
+    def test_follows_relative_locations(self):
+        self.handler.redirects = {
+            "/a/b/start": (302, "../moved"),
+            "/a/moved": (307, "/final"),
+        }
+
+        final, response = self.url("/a/b/start").fetch()
+
+        self.assertEqual(str(final), f"{self.origin}/final")
+        self.assertEqual(response.body, b"page /final")
+        self.assertEqual(self.url("/a/b/start").request(), "page /final")
+
+    def test_absolute_location(self):
+        self.handler.redirects = {"/start": (303, f"{self.origin}/other")}
+
+        self.assertEqual(self.url("/start").request(), "page /other")
+
+    def test_too_many_redirects(self):
+        self.handler.redirects = {"/loop": (302, "/loop")}
+
+        self.assertRaises(ValueError, lambda: self.url("/loop").request())
+        self.assertEqual(len(self.handler.requested), MAX_REDIRECTS + 1)
+
+    def test_permanent_redirects_are_remembered(self):
+        self.handler.redirects = {
+            "/old": (301, "/newer"),
+            "/newer": (308, "/newest"),
+            "/temporary": (302, "/newest"),
+        }
+
+        for _ in range(2):
+            self.assertEqual(self.url("/old").request(), "page /newest")
+            self.assertEqual(self.url("/temporary").request(), "page /newest")
+
+        self.assertEqual(
+            self.handler.requested,
+            ["/old", "/newer", "/newest", "/temporary", "/newest"]
+            + ["/newest", "/temporary", "/newest"],
+        )
+
+    def test_redirects_to_files_are_refused(self):
+        self.handler.redirects = {"/start": (302, "file:///etc/passwd")}
+
+        self.assertRaises(AssertionError, lambda: self.url("/start").request())
+
+    def test_async(self):
+        self.handler.redirects = {"/old": (301, "/new"), "/temp": (302, "/new")}
+
+        self.assertEqual(asyncio.run(self.url("/old").request_async()), "page /new")
+        self.assertEqual(asyncio.run(self.url("/temp").request_async()), "page /new")
+        self.assertEqual(asyncio.run(self.url("/old").request_async()), "page /new")
+
+        self.assertEqual(
+            self.handler.requested, ["/old", "/new", "/temp", "/new", "/new"]
+        )
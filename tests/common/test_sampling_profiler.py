@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from common.sampling_profiler import (
+    IDLE_STAGE,
+    SamplingProfiler,
+    current_stages,
+    pipeline_stage,
+)
+from parser.parser import HTMLParser
+
+
+def wait_in_stage(name: str, started: threading.Event, done: threading.Event):
+    with pipeline_stage(name):
+        started.set()
+        done.wait()
+
+
+class TestPipelineStage(unittest.TestCase):
+
+    def test_nested_stages(self):
+        thread_id = threading.get_ident()
+
+        with pipeline_stage("layout"):
+            with pipeline_stage("paint"):
+                self.assertEqual(current_stages[thread_id], "paint")
+            self.assertEqual(current_stages[thread_id], "layout")
+
+        self.assertNotIn(thread_id, current_stages)
+
+    def test_decorator(self):
+        @pipeline_stage("draw")
+        def draw():
+            return current_stages[threading.get_ident()]
+
+        self.assertEqual(draw(), "draw")
+        self.assertEqual(draw(), "draw")
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def test_sample_tags_stacks_with_stage(self):
+        started, done = threading.Event(), threading.Event()
+        worker = threading.Thread(target=wait_in_stage, args=("style", started, done))
+        worker.start()
+        started.wait()
+
+        profiler = SamplingProfiler()
+        try:
+            profiler.sample()
+        finally:
+            done.set()
+            worker.join()
+
+        stacks = list(profiler.stacks)
+        style_stacks = [stack for stack in stacks if stack.startswith("style;")]
+        self.assertEqual(len(style_stacks), 1)
+        frames = style_stacks[0].split(";")
+        # Outermost frame first
+        self.assertIn("threading.py:Thread._bootstrap", frames[1])
+        self.assertIn("test_sampling_profiler.py:wait_in_stage", frames)
+        # The calling thread is not sampled
+        self.assertFalse(
+            any("test_sample_tags_stacks_with_stage" in stack for stack in stacks)
+        )
+
+    def test_background_sampling(self):
+        profiler = SamplingProfiler(rate=500)
+        profiler.start()
+        with pipeline_stage("parse"):
+            deadline = time.perf_counter() + 0.3
+            while time.perf_counter() < deadline:
+                HTMLParser("<p>text</p>" * 100).parse()
+        profiler.stop()
+
+        self.assertGreater(profiler.samples, 10)
+        totals = profiler.stage_totals()
+        self.assertGreater(totals["parse"], 0)
+        self.assertTrue(
+            any("parser.py:HTMLParser" in stack for stack in profiler.stacks)
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stacks.folded")
+            profiler.write(path)
+            with open(path, encoding="utf-8") as file:
+                lines = file.read().splitlines()
+
+        self.assertEqual(len(lines), len(profiler.stacks))
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertEqual(profiler.stacks[stack], int(count))
+
+    def test_idle_threads(self):
+        done = threading.Event()
+        worker = threading.Thread(target=done.wait)
+        worker.start()
+
+        profiler = SamplingProfiler()
+        profiler.sample()
+        done.set()
+        worker.join()
+
+        self.assertIn(IDLE_STAGE, profiler.stage_totals())
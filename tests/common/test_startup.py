@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(os.path.dirname(TESTS_DIR))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+# Startup measurements of every benchmark run, one JSON object per line, to compare startup across commits.
+# Kept next to this file whatever the working directory, and ignored by git
+STARTUP_HISTORY = os.path.join(TESTS_DIR, "startup_history.jsonl")
+SLOWEST_IMPORTS = 10  # Number of imports listed by the benchmark
+
+
+def parse_importtime(output: str) -> list[tuple[str, int, int, int]]:
+    """
+    The `(module, self_us, cumulative_us, depth)` of every import in the stderr output of `python -X importtime`,
+    in the order they finished. The depth is 0 for top-level imports.
+    """
+
+    imports = []
+    for line in output.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$", line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def import_times(module: str) -> list[tuple[str, int, int, int]]:
+    """Import the module in a new interpreter (from src, like `src/main.py`) and return its `parse_importtime`."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+class TestParseImporttime(unittest.TestCase):
+
+    def test_parse(self):
+        output = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:        50 |         50 |     encodings.aliases
+import time:       300 |        350 |   encodings
+import time:      2000 |       2470 | browser
+"""
+
+        self.assertEqual(
+            parse_importtime(output),
+            [
+                ("_io", 120, 120, 1),
+                ("encodings.aliases", 50, 50, 2),
+                ("encodings", 300, 350, 1),
+                ("browser", 2000, 2470, 0),
+            ],
+        )
+
+
+@unittest.skip("Performance test")
+class TestStartupPerformance(unittest.TestCase):
+    """
+    Import time of the browser, its slowest imports and the wall clock time to the first paint of the window
+    and of the example page (needs a display). Every run is appended to STARTUP_HISTORY and compared with the last one.
+    """
+
+    def test_performance(self):
+        runs = [import_times("browser") for _ in range(5)]
+        # The fastest run has the least noise from other processes
+        imports = min(runs, key=lambda run: run[-1][2])
+        import_ms = imports[-1][2] / 1000
+        print(f"import browser: {import_ms:.1f} ms")
+
+        slowest = sorted(imports, key=lambda entry: entry[2], reverse=True)
+        slowest = [entry for entry in slowest if entry[0] != "browser"]
+        for module, _, cumulative_us, depth in slowest[:SLOWEST_IMPORTS]:
+            print(f"  {cumulative_us / 1000:>7.1f} ms {'  ' * depth}{module}")
+
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "import_ms": import_ms,
+            "slowest_imports": {
+                module: cumulative_us / 1000
+                for module, _, cumulative_us, _ in slowest[:SLOWEST_IMPORTS]
+            },
+        }
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.join(SRC_DIR, "main.py"), "--startup-benchmark"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        match = re.search(
+            r"window shown after ([\d.]+) ms, page shown after ([\d.]+) ms",
+            result.stdout,
+        )
+        if match:
+            record["window_shown_ms"] = float(match.group(1))
+            record["page_shown_ms"] = float(match.group(2))
+            # Including starting the interpreter and closing the window
+            record["wall_ms"] = wall_ms
+            print(
+                f"window shown after {match.group(1)} ms, page shown after {match.group(2)} ms, "
+                f"{wall_ms:.1f} ms until the process exited"
+            )
+        else:
+            last_line = (result.stderr.strip().splitlines() or [""])[-1]
+            print(f"First paint not measured: {last_line}")
+
+        previous = None
+        if os.path.exists(STARTUP_HISTORY):
+            with open(STARTUP_HISTORY, encoding="utf-8") as file:
+                lines = file.read().splitlines()
+            if lines:
+                previous = json.loads(lines[-1])
+
+        if previous is not None:
+            for key in ("import_ms", "window_shown_ms", "page_shown_ms"):
+                if key in record and key in previous:
+                    print(
+                        f"{key}: {previous[key]:.1f} -> {record[key]:.1f} ms "
+                        f"(commit {previous['commit']} -> {record['commit']})"
+                    )
+
+        with open(STARTUP_HISTORY, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    TestStartupPerformance().test_performance()
@@ -0,0 +1,115 @@
+import unittest
+
+from common.tiled_renderer import ITEM_BYTES, TiledRenderer
+from draw_commands.DrawRect import DrawRect
+from draw_commands.DrawText import DrawText
+from tests.fakes import FakeCanvas, FakeFont
+
+FONT = FakeFont()  # Fonts are shared through the font cache
+
+
+def stacked(canvas: FakeCanvas) -> list[str]:
+    """The texts of the text items and the colors of the rectangles, in stacking order."""
+
+    return [
+        canvas.items[item]["text"] or canvas.items[item]["fill"]
+        for item in canvas.stack
+    ]
+
+
+def page(rows: int, step: int = 100) -> list:
+    return [DrawText(f"row{i}", 0, i * step, FONT, "black") for i in range(rows)]  # type: ignore
+
+
+class TestTiledRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = FakeCanvas()
+        self.renderer = TiledRenderer(self.canvas, tile_height=200)  # type: ignore
+
+    def test_draws_only_tiles_in_view(self):
+        self.renderer.render(page(20), 0, 300)
+
+        self.assertEqual(self.canvas.texts(), {f"row{i}": i * 100 for i in range(4)})
+        self.assertEqual(self.renderer.tiles_drawn, 2)
+
+    def test_scrolling_moves_cached_tiles(self):
+        display_list = page(20)
+        self.renderer.render(display_list, 0, 300)
+        self.renderer.render(display_list, 250, 300)
+
+        self.assertEqual(self.renderer.tiles_drawn, 1)  # Only rows 4 and 5 were drawn
+        self.assertEqual(self.canvas.created, 6)
+        self.assertEqual(self.canvas.texts()["row5"], 250)
+
+        self.renderer.render(display_list, 50, 300)
+
+        self.assertEqual(self.renderer.tiles_drawn, 0)
+        self.assertEqual(self.canvas.texts()["row0"], -50)
+        self.assertEqual(self.canvas.texts()["row5"], 450)
+
+    def test_command_reaching_into_view(self):
+        tall = DrawRect(0, 150, 100, 1000, "gray")
+        self.renderer.render([tall] + page(20)[5:], 650, 300)
+
+        self.assertEqual(
+            len(self.renderer.cached), 3
+        )  # Tile 0 and the tiles 3 and 4 in view
+        self.assertIn(0, self.renderer.cached)
+
+    def test_tiles_keep_paint_order(self):
+        text = DrawText("text", 0, 250, FONT, "black")  # type: ignore
+        short = DrawRect(0, 150, 100, 180, "gray")
+        self.renderer.render([short, text], 200, 100)
+        self.assertEqual(stacked(self.canvas), ["text"])
+
+        # Tile 0 is drawn after tile 1, but its background reaches into tile 1 and is painted first
+        tall = DrawRect(0, 150, 100, 300, "white")
+        after = DrawText("after", 0, 100, FONT, "black")  # type: ignore
+        self.renderer.render([tall, text, after], 200, 100)
+
+        self.assertEqual(self.renderer.tiles_drawn, 1)
+        self.assertEqual(stacked(self.canvas), ["white", "text", "after"])
+
+        # Scrolling down draws new tiles on top without restacking
+        below = DrawText("below", 0, 450, FONT, "black")  # type: ignore
+        self.renderer.render([tall, text, after, below], 200, 300)
+        self.assertEqual(stacked(self.canvas), ["white", "text", "after", "below"])
+
+    def test_memory_budget(self):
+        display_list = page(100)
+        self.renderer.max_bytes = 4 * (ITEM_BYTES + 5)  # Two tiles of two rows
+
+        for scroll in range(0, 2000, 100):
+            self.renderer.render(display_list, scroll, 150)
+
+        self.assertLessEqual(self.renderer.cached_bytes, self.renderer.max_bytes)
+        self.assertEqual(list(self.renderer.cached), [9, 10])
+        self.assertEqual(len(self.canvas.items), 4)
+
+    def test_unchanged_tiles_are_kept(self):
+        self.renderer.render(page(20), 0, 1000)
+        items = dict(self.canvas.items)
+
+        changed = page(20)
+        changed[7] = DrawText("changed", 0, 700, FONT, "black")  # type: ignore
+        self.renderer.render(changed, 0, 1000)
+
+        self.assertEqual(self.renderer.tiles_drawn, 1)
+        self.assertEqual(len(self.canvas.items), 12)
+        self.assertNotIn("row7", self.canvas.texts())
+        self.assertEqual(
+            [item for item in items if item in self.canvas.items],
+            [item for item in items if item not in (7, 8)],
+        )
+
+    def test_clear(self):
+        self.renderer.render(page(20), 0, 300)
+        self.renderer.clear()
+
+        self.assertEqual(self.canvas.items, {})
+        self.assertEqual(self.renderer.cached_bytes, 0)
+
+        self.renderer.render(page(20), 0, 300)
+
+        self.assertEqual(self.renderer.tiles_drawn, 2)
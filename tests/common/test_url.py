@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+from common.url import URL, FileChunks
+
+
+class TestFileChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: bytes) -> str:
+        path = os.path.join(self.directory.name, "page.html")
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_multi_byte_characters_split_between_chunks(self):
+        text = "<p>Grüße, 日本語 and 🙂</p>" * 20
+        path = self.write(text.encode("utf-8"))
+
+        for chunk_size in [1, 2, 3, 7, 64, 1 << 20]:
+            chunks = list(FileChunks(path, chunk_size))
+            self.assertEqual("".join(chunks), text)
+            # A chunk may also contain the bytes of a character started in the previous chunk
+            self.assertLessEqual(
+                max(len(chunk.encode("utf-8")) for chunk in chunks), chunk_size + 3
+            )
+
+    def test_empty_file(self):
+        self.assertEqual(list(FileChunks(self.write(b""))), [])
+
+    def test_can_be_iterated_again(self):
+        chunks = URL(f"file://{self.write(b'<p>again</p>')}").request_chunks()
+
+        self.assertEqual(list(chunks), ["<p>again</p>"])
+        self.assertEqual(list(chunks), ["<p>again</p>"])
+
+    def test_invalid_utf8(self):
+        path = self.write(b"<p>\xff</p>")
+
+        self.assertRaises(UnicodeDecodeError, lambda: list(FileChunks(path)))
+
+
+class TestResolve(unittest.TestCase):
+
+    def test_file_url(self):
+        url = URL("file:///tmp/pages/index.html")
+
+        self.assertEqual(str(url.resolve("style.css")), "file:///tmp/pages/style.css")
+        self.assertEqual(str(url.resolve("/other.css")), "file:///other.css")
+
+    def test_relative_paths(self):
+        url = URL("http://example.org/a/b/page.html")
+
+        self.assertEqual(str(url.resolve("x.css")), "http://example.org:80/a/b/x.css")
+        self.assertEqual(str(url.resolve("../x.css")), "http://example.org:80/a/x.css")
+        self.assertEqual(str(url.resolve("../../x.css")), "http://example.org:80/x.css")
+        self.assertEqual(str(url.resolve("/x.css")), "http://example.org:80/x.css")
+        self.assertEqual(
+            str(url.resolve("//cdn.example.org/x.css")),
+            "http://cdn.example.org:80/x.css",
+        )
+
+
+@unittest.skip("Performance test")
+class TestFileChunksMemory(unittest.TestCase):
+
+    def test_peak_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "large.html")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("<p>Grüße aus einer sehr großen Datei</p>\n" * 2_000_000)
+
+            def read_whole_file():
+                with open(path, "r", encoding="utf-8") as file:
+                    return len(file.read())
+
+            def read_chunks():
+                return sum(len(chunk) for chunk in FileChunks(path))
+
+            for name, read in [("read()", read_whole_file), ("chunks", read_chunks)]:
+                tracemalloc.start()
+                start = time.perf_counter()
+                characters = read()
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"{name}: {characters} characters in {elapsed * 1000:.0f} ms, {peak / 1024 / 1024:.1f} MB peak"
+                )
+
+
+if __name__ == "__main__":
+    TestFileChunksMemory().test_peak_memory()
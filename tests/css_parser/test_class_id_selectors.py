@@ -0,0 +1,161 @@
+import time
+import unittest
+
+from browser import tree_to_list
+from css_parser.style import cascade_priority, style
+from css_parser.class_selector import ClassSelector
+from css_parser.compound_selector import CompoundSelector
+from css_parser.css_parser import CSSParser
+from css_parser.descendant_selector import DescendantSelector
+from css_parser.id_selector import IdSelector
+from css_parser.tag_selector import TagSelector
+from nodes.tag_element import TAGElement
+from parser.parser import HTMLParser
+
+HTML = (
+    "<html><body>"
+    "<div id=main class=content><p class=note>one</p><p>two</p></div>"
+    "<p class=note>three</p>"
+    "</body></html>"
+)
+
+
+def find(root, tag_name: str) -> list[TAGElement]:
+    return [
+        node
+        for node in tree_to_list(root, [])
+        if isinstance(node, TAGElement) and node.tag_name == tag_name
+    ]
+
+
+def build_class_heavy_page(elements: int, classes: int) -> str:
+    """Generates a flat page whose elements each carry one of `classes` class names."""
+
+    items = "".join(f"<p class=c{i % classes}>item {i}</p>" for i in range(elements))
+    return f"<html><body><div>{items}</div></body></html>"
+
+
+def build_class_heavy_stylesheet(classes: int) -> str:
+    """Generates a stylesheet with one rule per class, like utility-class frameworks."""
+
+    return "".join(f".c{i} {{ color: #{i:06x}; }}\n" for i in range(classes))
+
+
+class TestClassIdSelectorParsing(unittest.TestCase):
+
+    def test_selector_types(self):
+        rules = CSSParser(
+            ".note { color: red; } #main { color: blue; } p.note#x { color: green; } div .note { color: gray; }"
+        ).parse_css_file()
+
+        selectors = [selector for selector, _ in rules]
+        self.assertIsInstance(selectors[0], ClassSelector)
+        self.assertIsInstance(selectors[1], IdSelector)
+        self.assertIsInstance(selectors[2], CompoundSelector)
+        self.assertIsInstance(selectors[3], DescendantSelector)
+
+    def test_specificity(self):
+        self.assertEqual(TagSelector("p").priority, 1)
+        self.assertEqual(ClassSelector("note").priority, 10)
+        self.assertEqual(IdSelector("main").priority, 100)
+        self.assertEqual(
+            CompoundSelector([TagSelector("p"), ClassSelector("note")]).priority, 11
+        )
+
+    def test_invalid_selector_is_skipped(self):
+        rules = CSSParser("p. { color: red; } a { color: blue; }").parse_css_file()
+
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules[0][1], {"color": "blue"})
+
+
+class TestClassIdSelectorStyling(unittest.TestCase):
+
+    def styled(self, css: str, use_index: bool):
+        parser = HTMLParser(HTML)
+        root = parser.parse()
+        rules = sorted(CSSParser(css).parse_css_file(), key=cascade_priority)
+        style(root, rules, parser.element_index if use_index else None)
+        return root
+
+    def test_element_index(self):
+        parser = HTMLParser(HTML)
+        parser.parse()
+
+        self.assertEqual(len(parser.element_index.lookup(("class", "note"))), 2)
+        self.assertEqual(len(parser.element_index.lookup(("id", "main"))), 1)
+        self.assertEqual(parser.element_index.lookup(("class", "missing")), [])
+
+    def test_multiple_quoted_classes(self):
+        html = (
+            '<div class="note wide" id="box">both</div><div class=\'wide\'>wide</div>'
+        )
+        css = ".note { color: blue; } .wide { font-weight: bold; } .note.wide { font-style: italic; }"
+
+        parser = HTMLParser(html)
+        parser.parse()
+        self.assertEqual(len(parser.element_index.lookup(("class", "note"))), 1)
+        self.assertEqual(len(parser.element_index.lookup(("class", "wide"))), 2)
+
+        for use_index in [False, True]:
+            with self.subTest(use_index=use_index):
+                parser = HTMLParser(html)
+                root = parser.parse()
+                rules = sorted(CSSParser(css).parse_css_file(), key=cascade_priority)
+                style(root, rules, parser.element_index if use_index else None)
+                both, wide = find(root, "div")
+
+                self.assertEqual(both.style["color"], "blue")
+                self.assertEqual(both.style["font-weight"], "bold")
+                self.assertEqual(both.style["font-style"], "italic")
+                self.assertEqual(wide.style["font-weight"], "bold")
+                self.assertEqual(wide.style["font-style"], "normal")
+
+    def test_cascade(self):
+        css = "#main p { color: red; } p { color: green; } .note { color: blue; } div .note { font-weight: bold; }"
+        for use_index in [False, True]:
+            with self.subTest(use_index=use_index):
+                root = self.styled(css, use_index)
+                one, two, three = find(root, "p")
+
+                self.assertEqual(one.style["color"], "red")  # 101 beats 10
+                self.assertEqual(one.style["font-weight"], "bold")
+                self.assertEqual(two.style["color"], "red")
+                self.assertEqual(three.style["color"], "blue")
+                self.assertEqual(three.style["font-weight"], "normal")
+
+    def test_index_matches_scan(self):
+        css = ".note { color: blue; } p.note { font-style: italic; } #main { background-color: gray; } .content p { font-weight: bold; }"
+        scanned = self.styled(css, use_index=False)
+        indexed = self.styled(css, use_index=True)
+
+        for a, b in zip(tree_to_list(scanned, []), tree_to_list(indexed, [])):
+            self.assertEqual(a.style, b.style)
+
+
+@unittest.skip("Performance test")
+class TestClassSelectorPerformance(unittest.TestCase):
+
+    def test_runtime(self):
+        for elements, classes in [(1_000, 100), (5_000, 1_000), (10_000, 2_000)]:
+            html = build_class_heavy_page(elements, classes)
+            rules = sorted(
+                CSSParser(build_class_heavy_stylesheet(classes)).parse_css_file(),
+                key=cascade_priority,
+            )
+
+            for use_index in [False, True]:
+                parser = HTMLParser(html)
+                root = parser.parse()
+
+                start = time.perf_counter()
+                style(root, rules, parser.element_index if use_index else None)
+                elapsed = time.perf_counter() - start
+
+                print(
+                    f"Time: {elapsed:.4f} seconds (elements={elements}, rules={classes}, index={use_index})"
+                )
+
+
+if __name__ == "__main__":
+    TestClassSelectorPerformance().test_runtime()
@@ -0,0 +1,147 @@
+import random
+import time
+import unittest
+
+from css_parser.base_selector import BaseCSSSelector
+from css_parser.class_selector import ClassSelector
+from css_parser.compound_selector import CompoundSelector
+from css_parser.css_parser import CSSParser
+from css_parser.descendant_selector import DescendantSelector
+from css_parser.id_selector import IdSelector
+from css_parser.regex_css_parser import RegexCSSParser
+from css_parser.tag_selector import TagSelector
+
+
+def describe(selector: BaseCSSSelector) -> object:
+    """Turns a selector into a comparable value, selectors themselves don't implement `__eq__`."""
+
+    if isinstance(selector, TagSelector):
+        return (selector.tag_name, selector.priority)
+    if isinstance(selector, ClassSelector):
+        return ("." + selector.class_name, selector.priority)
+    if isinstance(selector, IdSelector):
+        return ("#" + selector.element_id, selector.priority)
+    if isinstance(selector, (DescendantSelector, CompoundSelector)):
+        return (
+            type(selector).__name__,
+            [describe(s) for s in selector.selectors],
+            selector.priority,
+        )
+    raise TypeError(f"Unknown selector {selector!r}")
+
+
+def parse(parser: CSSParser) -> tuple[list[object], int]:
+    rules = parser.parse_css_file()
+    return [(describe(selector), body) for selector, body in rules], parser.index
+
+
+def random_css(rng: random.Random, length: int) -> str:
+    """Generates random (mostly broken) CSS made of the characters the parser cares about."""
+
+    tokens = [
+        "div",
+        "p",
+        "a",
+        "color",
+        "red",
+        "#ff0000",
+        "-12.5%",
+        "font-size",
+        ":",
+        ";",
+        "{",
+        "}",
+        " ",
+        "\n",
+        "\t",
+        " ",
+        "\x1c",
+        "_",
+        "é",
+        "٣",
+        "!",
+        "/*",
+        "*/",
+        ",",
+        ".",
+        "'",
+    ]
+    return "".join(rng.choice(tokens) for _ in range(length))
+
+
+def generate_stylesheet(rules: int) -> str:
+    """Generates a large, valid stylesheet resembling a CSS framework."""
+
+    parts = []
+    for i in range(rules):
+        parts.append(
+            f"div section-{i} p {{\n"
+            f"    background-color: #{i % 0xFFFFFF:06x};\n"
+            f"    margin-left: -{i}.5px;\n"
+            f"    width: {i % 100}%;\n"
+            f"    -webkit-transition: none;\n"
+            f"}}\n\n"
+        )
+    return "".join(parts)
+
+
+class TestRegexCSSParserEquivalence(unittest.TestCase):
+
+    def test_example_stylesheets(self):
+        for css in [
+            "",
+            "p { color: red; }",
+            "div p{color:red;background-color:#ff0000}",
+            "a { color: blue; } b { font-weight: bold; }",
+            "pre { background-color: gray; }\nsmall { font-size: 90%; }",
+            "p { color: red; broken; font-size: 12px }",
+            "p { color: rgb(1, 2, 3); font-size: 12px; }",
+            "@media screen { p { color: red; } } a { color: blue; }",
+            "p { color: red",
+            "{ }",
+            "   \n\t ",
+            open("src/browser.css").read(),
+            generate_stylesheet(50),
+        ]:
+            with self.subTest(css=css[:40]):
+                self.assertEqual(parse(CSSParser(css)), parse(RegexCSSParser(css)))
+
+    def test_fuzz(self):
+        rng = random.Random(1234)
+        for _ in range(2000):
+            css = random_css(rng, rng.randint(0, 60))
+            with self.subTest(css=css):
+                self.assertEqual(parse(CSSParser(css)), parse(RegexCSSParser(css)))
+
+    def test_body(self):
+        for css in [
+            "color: red; font-size: 90%",
+            "color:red;;font-weight : bold",
+            "garbage } color: red",
+        ]:
+            with self.subTest(css=css):
+                old, new = CSSParser(css), RegexCSSParser(css)
+                self.assertEqual(old.body(), new.body())
+                self.assertEqual(old.index, new.index)
+
+
+@unittest.skip("Performance test")
+class TestRegexCSSParserPerformance(unittest.TestCase):
+
+    def test_throughput(self):
+        for rules in [100, 1_000, 5_000]:
+            css = generate_stylesheet(rules)
+            size_kb = len(css.encode("utf-8")) / 1024
+
+            for parser_class in [CSSParser, RegexCSSParser]:
+                start = time.perf_counter()
+                parser_class(css).parse_css_file()
+                elapsed = time.perf_counter() - start
+
+                print(
+                    f"{parser_class.__name__}: {size_kb / elapsed:.0f} KB/s ({size_kb:.0f} KB, {elapsed:.4f} seconds)"
+                )
+
+
+if __name__ == "__main__":
+    TestRegexCSSParserPerformance().test_throughput()
@@ -0,0 +1,121 @@
+class FakeFont:
+    """
+    Stands in for tkinter fonts, which need a Tk instance. Every character is `char_width` pixels wide and lines are
+    `ascent + descent` pixels high. `key` holds the `get_font` arguments the font stands for, see `get_fake_font`.
+    """
+
+    def __init__(
+        self,
+        char_width: int = 10,
+        ascent: int = 16,
+        descent: int = 4,
+        key: tuple = (16, "normal", "roman", False),
+    ):
+        self.char_width = char_width
+        self.ascent = ascent
+        self.descent = descent
+        self.key = key
+
+    def measure(self, text: str) -> int:
+        return self.char_width * len(text)
+
+    def metrics(self, option: str | None = None):
+        metrics = {
+            "ascent": self.ascent,
+            "descent": self.descent,
+            "linespace": self.ascent + self.descent,
+        }
+        return metrics if option is None else metrics[option]
+
+
+def get_fake_font(size: int, weight: str, slant: str, underline: bool) -> FakeFont:
+    """Stands in for `get_font`, the font remembers its arguments in `key`."""
+
+    return FakeFont(key=(size, weight, slant, underline))
+
+
+class FakeCanvas:
+    """
+    Stands in for tkinter.Canvas, which needs a display. Keeps the kind, coordinates, text, fill color, tags and
+    stacking order of every item, and counts the created, moved and deleted items in `operations`.
+    """
+
+    def __init__(self):
+        self.items: dict[int, dict] = {}
+        self.stack: list[int] = []  # Lowest item first
+        self.created = 0
+        self.operations = 0
+
+    def create(self, kind: str, coords: list[float], text: str, options: dict) -> int:
+        self.created += 1
+        self.operations += 1
+        tags = options.get("tags", ())
+        self.items[self.created] = {
+            "kind": kind,
+            "coords": coords,
+            "text": text,
+            "fill": options.get("fill", ""),
+            "tags": {tags} if isinstance(tags, str) else set(tags),
+        }
+        self.stack.append(self.created)
+        return self.created
+
+    def create_text(self, x, y, text: str = "", **options) -> int:
+        return self.create("text", [x, y], text, options)
+
+    def create_rectangle(self, x1, y1, x2, y2, **options) -> int:
+        return self.create("rect", [x1, y1, x2, y2], "", options)
+
+    def coords(self, item: int, *coords: float):
+        self.operations += 1
+        self.items[item]["coords"] = list(coords)
+
+    def addtag_withtag(self, tag: str, item: int):
+        self.items[item]["tags"].add(tag)
+
+    def tagged(self, tag_or_id) -> list[int]:
+        if isinstance(tag_or_id, int):
+            return [tag_or_id] if tag_or_id in self.items else []
+        return [item for item in self.stack if tag_or_id in self.items[item]["tags"]]
+
+    def move(self, tag: str, dx: float, dy: float):
+        for item in self.tagged(tag):
+            coords = self.items[item]["coords"]
+            for i in range(1, len(coords), 2):
+                coords[i] += dy
+
+    def tag_raise(self, item: int, above: int):
+        self.stack.remove(item)
+        self.stack.insert(self.stack.index(above) + 1, item)
+
+    def tag_lower(self, item: int, below):
+        self.stack.remove(item)
+        self.stack.insert(self.stack.index(self.tagged(below)[0]), item)
+
+    def delete(self, *tags_or_ids):
+        for tag_or_id in tags_or_ids:
+            for item in self.tagged(tag_or_id):
+                self.operations += 1
+                del self.items[item]
+                self.stack.remove(item)
+
+    def painted(self) -> list[tuple]:
+        """The kind, coordinates and text of the items, in stacking order."""
+
+        return [
+            (
+                self.items[item]["kind"],
+                self.items[item]["coords"],
+                self.items[item]["text"],
+            )
+            for item in self.stack
+        ]
+
+    def texts(self) -> dict[str, float]:
+        """The y coordinate of every text item by its text."""
+
+        return {
+            item["text"]: item["coords"][1]
+            for item in self.items.values()
+            if item["kind"] == "text"
+        }
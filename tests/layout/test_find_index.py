@@ -0,0 +1,170 @@
+import random
+import time
+import unittest
+
+from draw_commands.DrawOutline import DrawOutline
+from layout.block_layout import BlockLayout
+from layout.find_index import CURRENT_MATCH_COLOR, MATCH_COLOR, FindIndex, normalize
+from nodes.text_element import TextElement
+from tests.fakes import FakeFont
+
+FONT = FakeFont()
+
+
+def layout_words(text: str, per_line: int = 10) -> list:
+    """(x, y, word, font) of the words of the text, `per_line` words per line."""
+
+    words = []
+    for i, word in enumerate(text.split()):
+        line, column = divmod(i, per_line)
+        words.append((column * 100, line * 20, word, FONT))
+    return words
+
+
+class TestFindIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = FindIndex(
+            layout_words("The quick brown Fox jumps over the lazy dog. The fox sleeps.")
+        )
+
+    def test_search_ignores_case_and_whitespace(self):
+        self.assertEqual(len(self.index.search("the")), 3)
+        self.assertEqual(len(self.index.search("FOX")), 2)
+        self.assertEqual(len(self.index.search("  brown \n fox ")), 1)
+        self.assertEqual(self.index.search("cat"), [])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_matches_across_words_and_lines(self):
+        index = FindIndex(layout_words("one two three four", per_line=2))
+
+        [start] = index.search("two three")
+
+        self.assertEqual(index.word_at(start), 1)
+        self.assertEqual(index.word_at(start + len("two three") - 1), 2)
+        self.assertEqual(index.match_top(start), 0)
+        self.assertEqual(index.match_top(index.search("three")[0]), 20)
+
+    def test_incremental_search_narrows_previous_matches(self):
+        query = ""
+        matches = None
+        for typed in "the fox":
+            previous_query, query = query, query + typed
+            matches = self.index.search(query, previous_query, matches)
+            self.assertEqual(matches, self.index.search(query))
+
+        self.assertEqual(len(matches), 1)
+
+        # A query that does not extend the previous one is searched from scratch
+        self.assertEqual(
+            self.index.search("dog", "the fox", matches), self.index.search("dog")
+        )
+
+    def test_highlights(self):
+        matches = self.index.search("ow")  # "brown"
+
+        [outline] = self.index.highlights(matches, 2, 0, 0, 100)
+
+        self.assertIsInstance(outline, DrawOutline)
+        self.assertEqual(
+            (outline.left, outline.top, outline.right, outline.bottom),
+            (200 + 20, 0, 200 + 40, 20),
+        )
+        self.assertEqual(outline.color, CURRENT_MATCH_COLOR)
+
+        [outline] = self.index.highlights(matches, 2, None, 0, 100)
+        self.assertEqual(outline.color, MATCH_COLOR)
+
+    def test_highlights_each_word_of_a_match(self):
+        matches = self.index.search("lazy dog")
+
+        outlines = self.index.highlights(matches, len("lazy dog"), 0, 0, 100)
+
+        self.assertEqual(
+            [(o.left, o.right) for o in outlines], [(700, 740), (800, 830)]
+        )
+
+    def test_highlights_only_visible_matches(self):
+        index = FindIndex(layout_words("fox " * 100))  # 10 lines
+        matches = index.search("fox")
+
+        outlines = index.highlights(matches, 3, None, 40, 60)
+
+        self.assertEqual(len(outlines), 20)
+        self.assertTrue(all(40 <= o.top <= 60 for o in outlines))
+
+    def test_first_match_below(self):
+        index = FindIndex(layout_words("fox " * 100))  # 10 lines
+        matches = index.search("fox")
+
+        self.assertEqual(index.first_match_below(matches, 0), 0)
+        self.assertEqual(index.first_match_below(matches, 35), 20)
+        self.assertEqual(index.first_match_below(matches[:5], 35), None)
+        self.assertEqual(index.first_match_below(matches, 1000), None)
+
+    def test_from_layout(self):
+        node = TextElement("Hello world", None)  # type: ignore
+        document = BlockLayout(node, 800, None, None)  # type: ignore
+        document.display_list = []
+        child = BlockLayout(node, 800, document, None)  # type: ignore
+        child.display_list = [
+            (0, 0, "Hello", FONT, "black", node),
+            (60, 0, "world", FONT, "black", node),
+        ]
+        document.children = [child]
+
+        index = FindIndex.from_layout(document)
+
+        self.assertEqual(index.text, "hello world")
+        self.assertEqual(index.starts, [0, 6])
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Straße\t Fox "), "strasse fox")
+
+
+@unittest.skip("Performance test")
+class TestFindIndexPerformance(unittest.TestCase):
+    """Latency of find-in-page on a page with 100,000 words, per keystroke while typing a query."""
+
+    WORDS = 100_000
+
+    def test_performance(self):
+        rng = random.Random(0)
+        vocabulary = [
+            "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(n))
+            for n in range(2, 10)
+            for _ in range(200)
+        ]
+        text = " ".join(rng.choice(vocabulary) for _ in range(self.WORDS))
+
+        start = time.perf_counter()
+        index = FindIndex(layout_words(text))
+        build = time.perf_counter() - start
+        print(f"Build index of {self.WORDS} words: {build * 1000:.1f} ms")
+
+        target = rng.choice([word for word in vocabulary if len(word) >= 6])
+        for incremental in (False, True):
+            query = ""
+            matches = None
+            latencies = []
+            for typed in target:
+                previous_query, query = query, query + typed
+                start = time.perf_counter()
+                if incremental:
+                    matches = index.search(query, previous_query, matches)
+                else:
+                    matches = index.search(query)
+                # Highlights of one screen, as drawn after every keystroke
+                index.highlights(matches, len(query), 0, 0, 600)
+                latencies.append(time.perf_counter() - start)
+
+            mode = "incremental" if incremental else "full"
+            print(
+                f"Type {target!r} ({mode}): "
+                + ", ".join(f"{latency * 1000:.2f}" for latency in latencies)
+                + f" ms per keystroke, {len(matches)} matches"
+            )
+
+
+if __name__ == "__main__":
+    TestFindIndexPerformance().test_performance()
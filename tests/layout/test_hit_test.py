@@ -0,0 +1,88 @@
+import unittest
+
+from common.url import URL
+from layout.block_layout import BlockLayout
+from layout.hit_test import find_link, hit_test, link_target, visible_links
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+from parser.parser import HTMLParser
+from tests.fakes import FakeFont
+
+
+def text_nodes(node) -> list[TextElement]:
+    if isinstance(node, TextElement):
+        return [node]
+    return [text for child in node.children for text in text_nodes(child)]
+
+
+def block(node, y: float, height: float, words) -> BlockLayout:
+    """A laid out block with the given words, as (x, y, text node) tuples."""
+
+    layout = BlockLayout(node, 800, None, None)  # type: ignore
+    layout.x, layout.y, layout.height = 0, y, height
+    layout.display_list = [
+        (x, word_y, node.text.split()[0], FakeFont(), "black", node)
+        for x, word_y, node in words
+    ]
+    return layout
+
+
+class TestHitTest(unittest.TestCase):
+
+    def setUp(self):
+        root = HTMLParser(
+            '<p>Go <a href="one.html">one</a></p><p><a href="two.html"><b>two</b></a> and <a>none</a></p>'
+        ).parse()
+        go, one, two, and_, none = text_nodes(root)
+
+        self.document = block(root, 0, 1000, [])
+        self.document.children = [
+            block(go.parent, 0, 20, [(0, 0, go), (40, 0, one)]),
+            block(
+                two.parent, 500, 20, [(0, 500, two), (50, 500, and_), (100, 500, none)]
+            ),
+        ]
+        self.nodes = go, one, two, and_, none
+
+    def test_hit_test(self):
+        go, one, two, and_, none = self.nodes
+
+        self.assertIs(hit_test(self.document, 5, 10), go)
+        self.assertIs(hit_test(self.document, 69, 19), one)
+        self.assertIs(hit_test(self.document, 10, 505), two)
+        self.assertIsNone(hit_test(self.document, 25, 10))  # Between the words
+        self.assertIsNone(hit_test(self.document, 5, 300))
+
+    def test_find_link(self):
+        go, one, two, and_, none = self.nodes
+
+        self.assertEqual(find_link(one), "one.html")
+        self.assertEqual(find_link(two), "two.html")  # Through the <b> element
+        self.assertIsNone(find_link(go))
+        self.assertIsNone(find_link(none))  # <a> without href
+        self.assertIsNone(find_link(None))
+
+    def test_visible_links(self):
+        self.assertEqual(
+            visible_links(self.document, 0, 600, []), ["one.html", "two.html"]
+        )
+        self.assertEqual(visible_links(self.document, 100, 600, []), ["two.html"])
+        self.assertEqual(visible_links(self.document, 600, 1000, []), [])
+
+    def test_link_target(self):
+        base = URL("http://example.org/dir/page.html")
+
+        self.assertEqual(
+            str(link_target(base, "other.html")), "http://example.org:80/dir/other.html"
+        )
+        self.assertEqual(
+            str(link_target(base, "https://example.com/")), "https://example.com:443/"
+        )
+        # Fragments point into the current page, the other links can't be loaded
+        for href in [
+            "#top",
+            "mailto:someone@example.org",
+            "javascript:void(0)",
+            "ftp://example.org/",
+        ]:
+            self.assertIsNone(link_target(base, href), href)
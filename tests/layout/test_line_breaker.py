@@ -0,0 +1,159 @@
+import random
+import time
+import unittest
+
+from layout.block_layout import BlockLayout
+from layout.line_breaker import break_lines, numpy, vectorized
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+from parser.parser import HTMLParser
+from tests.fakes import FakeFont
+
+np = numpy()
+
+
+FONTS = {
+    "normal": FakeFont(char_width=9, ascent=15, descent=4),
+    "bold": FakeFont(char_width=11, ascent=17, descent=5),
+}
+
+
+class Parent:
+    x = 13
+    y = 7.5
+    width = 0
+
+
+class WordByWordLayout(BlockLayout):
+    def text_font(self, text_node):
+        return FONTS[text_node.style["font-weight"]], "black"
+
+    def recursive(self, node):
+        if isinstance(node, TextElement):
+            for word in node.words:
+                self.word(word, node)
+        else:
+            super().recursive(node)
+
+
+class VectorizedLayout(WordByWordLayout):
+    def recursive(self, node):
+        if isinstance(node, TextElement):
+            self.words(node)
+        else:
+            BlockLayout.recursive(self, node)
+
+
+def paragraph(html: str) -> TAGElement:
+    """The <p> of the HTML, styled with a bold font inside <b>."""
+
+    p = HTMLParser(html).parse().children[0].children[0]
+
+    def set_style(node, weight):
+        if isinstance(node, TAGElement) and node.tag_name == "b":
+            weight = "bold"
+        node.style = {"font-weight": weight}
+        for child in node.children:
+            set_style(child, weight)
+
+    set_style(p, "normal")
+    return p  # type: ignore
+
+
+def lay_out(layout_class, node: TAGElement, width: float) -> BlockLayout:
+    parent = Parent()
+    parent.width = width
+    layout = layout_class(node, width, parent, None)
+    layout.layout()
+    return layout
+
+
+def reference_break_lines(widths, space_width, max_width, cursor_x, line_empty):
+    """Word by word, like `BlockLayout.word`."""
+
+    breaks, xs = [], []
+    for i, width in enumerate(widths):
+        if cursor_x + width > max_width and not line_empty:
+            breaks.append(i)
+            cursor_x = 0
+        xs.append(cursor_x)
+        line_empty = False
+        cursor_x += width + space_width
+    return breaks, xs
+
+
+@unittest.skipUnless(vectorized(), "NumPy is not installed")
+class TestBreakLines(unittest.TestCase):
+
+    def test_same_as_word_by_word(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            widths = [rng.randint(0, 120) for _ in range(rng.randint(1, 50))]
+            space_width = rng.randint(0, 10)
+            max_width = rng.choice([rng.randint(0, 300), rng.random() * 300])
+            line_empty = rng.random() < 0.5
+            cursor_x = 0 if line_empty else rng.randint(0, 300)
+            args = (space_width, max_width, cursor_x, line_empty)
+
+            breaks, xs = break_lines(np.array(widths, dtype=np.int64), *args)
+
+            self.assertEqual(
+                (breaks, xs.tolist()), reference_break_lines(widths, *args), args
+            )
+
+    def test_wide_words_get_their_own_line(self):
+        breaks, xs = break_lines(np.array([50, 50, 10]), 5, 40, 30, False)
+
+        self.assertEqual(breaks, [0, 1, 2])
+        self.assertEqual(xs.tolist(), [0, 0, 0])
+
+
+@unittest.skipUnless(vectorized(), "NumPy is not installed")
+class TestVectorizedLayout(unittest.TestCase):
+
+    def assert_same_layout(self, html: str, width: float):
+        node = paragraph(html)
+        expected = lay_out(WordByWordLayout, node, width)
+        actual = lay_out(VectorizedLayout, node, width)
+
+        self.assertEqual(actual.display_list, expected.display_list)
+        self.assertEqual(actual.height, expected.height)
+
+    def test_long_text(self):
+        words = " ".join(f"w{'x' * (i % 13)}" for i in range(2000))
+        for width in [0, 45, 300, 333.5, 800, 10**6]:
+            self.assert_same_layout(f"<p>{words}</p>", width)
+
+    def test_mixed_fonts_and_line_breaks(self):
+        words = " ".join(f"word{i}" for i in range(300))
+        html = f"<p>Start <b>bold {words}</b> middle {words}<br>{words} <b>end</b></p>"
+        for width in [60, 250.25, 799]:
+            self.assert_same_layout(html, width)
+
+    def test_short_text(self):
+        self.assert_same_layout("<p>a few <b>words</b> that fit</p>", 800)
+        self.assert_same_layout("<p>a few <b>words</b> that wrap</p>", 50)
+
+
+@unittest.skip("Performance test")
+class TestLineBreakerPerformance(unittest.TestCase):
+    """Layout time of paragraphs with tens of thousands of words, word by word and vectorized."""
+
+    def test_performance(self):
+        rng = random.Random(0)
+        vocabulary = ["a", "an", "the", "lorem", "ipsum", "dolor", "consectetur"]
+        for count in (1_000, 10_000, 100_000):
+            node = paragraph(
+                "<p>" + " ".join(rng.choice(vocabulary) for _ in range(count)) + "</p>"
+            )
+            node.children[0].words  # Split once, like a cached text node
+
+            for layout_class in (WordByWordLayout, VectorizedLayout):
+                start = time.perf_counter()
+                lay_out(layout_class, node, 800)
+                elapsed = time.perf_counter() - start
+                print(f"{layout_class.__name__} {count} words: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    TestLineBreakerPerformance().test_performance()
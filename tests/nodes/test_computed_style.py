@@ -0,0 +1,146 @@
+import tracemalloc
+import unittest
+
+from browser import default_style_sheet
+from css_parser.css_parser import CSSParser
+from css_parser.style import cascade_priority, style
+from nodes.computed_style import (
+    INHERITED_PROPERTIES,
+    ROOT_INHERITED_STYLE,
+    ComputedStyle,
+)
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+from parser.parser import HTMLParser
+
+
+def legacy_style(node: HTMLElement, rules):
+    """The previous implementation of `style()`, which copied the inherited properties into a new dict for every node."""
+
+    node.style = {}
+
+    for prop, default_value in INHERITED_PROPERTIES.items():
+        if node.parent:
+            node.style[prop] = node.parent.style[prop]
+        else:
+            node.style[prop] = default_value
+
+    for selector, body in rules:
+        if not selector.matches(node):
+            continue
+        for prop, value in body.items():
+            node.style[prop] = value
+
+    if isinstance(node, TAGElement) and "style" in node.attributes:
+        for prop, value in CSSParser(node.attributes["style"]).body().items():
+            node.style[prop] = value
+
+    if node.style["font-size"].endswith("%"):
+        if node.parent:
+            parent_font_size = node.parent.style["font-size"]
+        else:
+            parent_font_size = INHERITED_PROPERTIES["font-size"]
+        node_pct = float(node.style["font-size"][:-1]) / 100
+        parent_px = float(parent_font_size[:-2])
+        node.style["font-size"] = f"{node_pct * parent_px}px"
+
+    for child in node.children:
+        legacy_style(child, rules)
+
+
+def build_large_page(paragraphs: int) -> str:
+    """Generates a page with many paragraphs of mixed inline formatting."""
+
+    paragraph = "<p>Some <b>bold</b> and <i>italic</i> text with a <a>link</a> and <small>small print</small>.</p>"
+    return f"<html><body>{paragraph * paragraphs}</body></html>"
+
+
+def flatten(node: HTMLElement, nodes: list[HTMLElement]) -> list[HTMLElement]:
+    nodes.append(node)
+    for child in node.children:
+        flatten(child, nodes)
+    return nodes
+
+
+class TestComputedStyle(unittest.TestCase):
+
+    def test_inherited_values_are_interned(self):
+        self.assertIs(
+            ROOT_INHERITED_STYLE.replace("color", "red"),
+            ROOT_INHERITED_STYLE.replace("color", "red"),
+        )
+        self.assertIs(
+            ROOT_INHERITED_STYLE.replace("color", "black"), ROOT_INHERITED_STYLE
+        )
+
+    def test_copy_on_write(self):
+        parent = ComputedStyle()
+        child = ComputedStyle(parent.inherited)
+
+        child["color"] = "red"
+
+        self.assertEqual(child["color"], "red")
+        self.assertEqual(parent["color"], "black")
+        self.assertIsNone(child.own)
+
+    def test_non_inherited_properties(self):
+        computed = ComputedStyle()
+        computed["background-color"] = "gray"
+
+        self.assertEqual(computed.get("background-color"), "gray")
+        self.assertEqual(computed.get("text-decoration", "none"), "none")
+        self.assertRaises(KeyError, lambda: computed["text-decoration"])
+        self.assertEqual(
+            dict(computed), {**INHERITED_PROPERTIES, "background-color": "gray"}
+        )
+
+    def test_text_elements_share_parent_values(self):
+        root = HTMLParser("<p>one <b>two</b> three</p>").parse()
+        style(root, sorted(default_style_sheet(), key=cascade_priority))
+
+        p = root.children[0].children[0]
+        one, b, three = p.children
+
+        self.assertIs(one.style, p.style.inherited)
+        self.assertIs(three.style, one.style)
+        self.assertEqual(b.children[0].style["font-weight"], "bold")
+
+    def test_same_styles_as_legacy_implementation(self):
+        html = (
+            build_large_page(3)
+            + '<div style="background-color: gray; font-size: 50%"><big>x</big></div>'
+        )
+        rules = sorted(default_style_sheet(), key=cascade_priority)
+
+        legacy_root = HTMLParser(html).parse()
+        legacy_style(legacy_root, rules)
+        root = HTMLParser(html).parse()
+        style(root, rules)
+
+        for legacy, node in zip(flatten(legacy_root, []), flatten(root, [])):
+            self.assertEqual(legacy.style, dict(node.style))
+
+
+@unittest.skip("Performance test")
+class TestComputedStyleMemory(unittest.TestCase):
+
+    def test_memory(self):
+        rules = sorted(default_style_sheet(), key=cascade_priority)
+
+        for paragraphs in [1_000, 10_000]:
+            for name, style_function in [("dict", legacy_style), ("shared", style)]:
+                root = HTMLParser(build_large_page(paragraphs)).parse()
+                nodes = len(flatten(root, []))
+
+                tracemalloc.start()
+                style_function(root, rules)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"{name}: {current / 1024:.0f} KB retained, {peak / 1024:.0f} KB peak, {current / nodes:.1f} bytes/node (nodes={nodes})"
+                )
+
+
+if __name__ == "__main__":
+    TestComputedStyleMemory().test_memory()
@@ -0,0 +1,143 @@
+import tkinter
+import tracemalloc
+import unittest
+
+from browser import default_style_sheet, tree_to_list
+from css_parser.style import cascade_priority, style
+from layout.block_layout import BlockLayout
+from layout.document_layout import DocumentLayout
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+from parser.parser import HTMLParser
+
+
+class TestTextElementWords(unittest.TestCase):
+
+    def test_same_as_split(self):
+        for text in ["one", "  one \n two\tthree  ", " ", "", "a b c"]:
+            node = TextElement(text, TAGElement("p", None, {}))
+            self.assertEqual(list(node.words), text.split())
+
+    def test_cached_until_text_changes(self):
+        node = TextElement("some words", TAGElement("p", None, {}))
+        words = node.words
+
+        self.assertIs(node.words, words)
+
+        node.text = "other words"
+
+        self.assertEqual(node.words, ("other", "words"))
+        self.assertIs(node.words[1], words[1])  # Interned
+
+    def test_words_are_interned(self):
+        root = HTMLParser("<p>the same text</p><p>the same text</p>").parse()
+        body = root.children[0]
+        first, second = [p.children[0] for p in body.children]
+
+        for a, b in zip(first.words, second.words):
+            self.assertIs(a, b)
+
+
+class TestTextElementSpans(unittest.TestCase):
+
+    def test_span_of_shared_source(self):
+        source = "<p>first text</p><p>second</p>"
+        parent = TAGElement("p", None, {})
+        first = TextElement(source, parent, 3, 13)
+        second = TextElement(source, parent, 20, 26)
+
+        self.assertEqual(first.text, "first text")
+        self.assertEqual(first.words, ("first", "text"))
+        self.assertEqual(second.text, "second")
+        self.assertIs(first._source, second._source)
+
+    def test_whole_source_is_not_copied(self):
+        text = "whole text"
+        node = TextElement(text, TAGElement("p", None, {}))
+
+        self.assertIs(node.text, text)
+
+    def test_setting_text_replaces_span(self):
+        node = TextElement("<p>old</p>", TAGElement("p", None, {}), 3, 6)
+        node.words
+
+        node.text = "new words"
+
+        self.assertEqual(node.text, "new words")
+        self.assertEqual(node.words, ("new", "words"))
+
+
+class LegacyBlockLayout(BlockLayout):
+    """BlockLayout as before `TextElement.words`, splitting the text of every text node on every layout pass."""
+
+    def recursive(self, node):
+        if isinstance(node, TextElement):
+            for word in node.text.split():
+                self.word(word, node)
+        elif isinstance(node, TAGElement):
+            if node.tag_name == "br":
+                self.flush()
+            for child in node.children:
+                self.recursive(child)
+
+    def layout_intermediate(self):
+        previous = None
+        for child in self.node.children:
+            if isinstance(child, TAGElement) and child.tag_name == "head":
+                continue
+            next = LegacyBlockLayout(child, self.width, self, previous)
+            self.children.append(next)
+            previous = next
+
+
+class LegacyDocumentLayout(DocumentLayout):
+    def layout(self):
+        child = LegacyBlockLayout(self.node, 800, self, None)
+        self.children.append(child)
+        self.x, self.y = 13, 18
+        child.layout()
+        self.height = child.height
+
+
+@unittest.skip("Performance test")
+class TestResizeAllocations(unittest.TestCase):
+
+    def test_resize(self):
+        window = tkinter.Tk()  # Fonts need a Tk instance
+        window.withdraw()
+
+        paragraph = "<p>The quick brown fox <b>jumps over</b> the lazy dog, again and again.</p>"
+        root = HTMLParser(f"<html><body>{paragraph * 2000}</body></html>").parse()
+        style(root, sorted(default_style_sheet(), key=cascade_priority))
+
+        for name, layout_class in [
+            ("text.split()", LegacyDocumentLayout),
+            ("words", DocumentLayout),
+        ]:
+            layout_class(root, 800).layout()  # Warm up the font and word caches
+
+            # The layouts are kept, so all memory allocated for them is still traced at the end
+            documents = []
+            tracemalloc.start()
+            for width in [600, 700, 800, 900, 1000]:
+                document = layout_class(root, width)
+                document.layout()
+                documents.append(document)
+            allocated, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            words = [
+                line[2]
+                for document in documents
+                for layout in tree_to_list(document, [])
+                for line in getattr(layout, "display_list", [])
+            ]
+            print(
+                f"{name:<13} 5 resizes: {allocated / 1024:.0f} KB allocated, {len({id(word) for word in words})} word strings for {len(words)} words"
+            )
+
+        window.destroy()
+
+
+if __name__ == "__main__":
+    TestResizeAllocations().test_resize()
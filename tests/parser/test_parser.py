@@ -0,0 +1,288 @@
+import random
+import time
+import tracemalloc
+import unittest
+
+from common.url import CHUNK_SIZE
+from nodes.html_element import HTMLElement
+from nodes.tag_element import TAGElement
+from nodes.text_element import TextElement
+from parser.parser import BEFORE_HEAD, BEFORE_HTML, IN_BODY, IN_HEAD, HTMLParser
+
+HTML = """<!DOCTYPE html>
+<html><head><title>Title</title><link rel="stylesheet" href="a.css"></head>
+<body><h1 class="big">Header</h1><p>Some <b>bold</b> text<br>and a <a href="x.html">link</a>.</p>
+<div id="main"><p>nested</div> trailing text"""
+
+
+def describe(node: HTMLElement) -> tuple:
+    if isinstance(node, TAGElement):
+        return (
+            node.tag_name,
+            node.attributes,
+            [describe(child) for child in node.children],
+        )
+    return ("text", node.text)  # type: ignore
+
+
+def text_nodes(node: HTMLElement) -> list[TextElement]:
+    if isinstance(node, TextElement):
+        return [node]
+    return [text for child in node.children for text in text_nodes(child)]
+
+
+def parse_chunks(html: str, text_spans: bool) -> HTMLElement:
+    """Parse the document in chunks of CHUNK_SIZE characters, like the browser parses local files."""
+
+    parser = HTMLParser(text_spans=text_spans)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start : start + CHUNK_SIZE])
+    return parser.close()
+
+
+class TestHTMLParserAttributes(unittest.TestCase):
+
+    def test_quoted_values_may_contain_spaces(self):
+        root = HTMLParser(
+            """<div class="note wide" id=x title='a "quoted" title' hidden>text</div>"""
+        ).parse()
+        div = root.children[0].children[0]
+
+        self.assertEqual(
+            div.attributes,  # type: ignore
+            {
+                "class": "note wide",
+                "id": "x",
+                "title": 'a "quoted" title',
+                "hidden": "",
+            },
+        )
+        self.assertEqual(div.classes, ["note", "wide"])  # type: ignore
+
+    def test_attribute_syntax(self):
+        parser = HTMLParser("")
+
+        self.assertEqual(
+            parser.get_attributes('meta charset="utf-8"/'),
+            ("meta", {"charset": "utf-8"}),
+        )
+        self.assertEqual(parser.get_attributes("br /"), ("br", {}))
+        self.assertEqual(
+            parser.get_attributes('A HREF = "x.html" Href=y.html'),
+            ("a", {"href": "x.html"}),
+        )
+        self.assertEqual(
+            parser.get_attributes('p style="color: red; font-size: 10px"'),
+            ("p", {"style": "color: red; font-size: 10px"}),
+        )
+        # A missing closing quote ends the value at the end of the tag
+        self.assertEqual(
+            parser.get_attributes('div class="a b'), ("div", {"class": "a b"})
+        )
+
+
+class TestHTMLParserFeed(unittest.TestCase):
+
+    def test_same_tree_for_every_split(self):
+        expected = describe(HTMLParser(HTML).parse())
+
+        for split in range(len(HTML) + 1):
+            parser = HTMLParser()
+            parser.feed(HTML[:split])
+            parser.feed(HTML[split:])
+            self.assertEqual(describe(parser.close()), expected, f"split at {split}")
+
+    def test_single_characters(self):
+        parser = HTMLParser()
+        for char in HTML:
+            parser.feed(char)
+
+        self.assertEqual(describe(parser.close()), describe(HTMLParser(HTML).parse()))
+
+    def test_unfinished_tag_is_dropped(self):
+        parser = HTMLParser()
+        parser.feed("<p>text</p><b")
+
+        self.assertEqual(
+            describe(parser.close()),
+            describe(HTMLParser("<p>text</p>").parse()),
+        )
+
+
+class TestHTMLParserTextSpans(unittest.TestCase):
+
+    def test_same_tree_for_every_split(self):
+        expected = describe(HTMLParser(HTML).parse())
+
+        for split in range(len(HTML) + 1):
+            parser = HTMLParser(text_spans=True)
+            parser.feed(HTML[:split])
+            parser.feed(HTML[split:])
+            self.assertEqual(describe(parser.close()), expected, f"split at {split}")
+
+    def test_text_nodes_reference_source(self):
+        paragraph = " ".join(["lorem ipsum dolor sit amet"] * 20)
+        html = f"<p>{paragraph}</p>" * 10 + " trailing text"
+        root = HTMLParser(html, text_spans=True).parse()
+
+        texts = text_nodes(root)
+        # Text at the end of a chunk is copied, since it might continue in the next chunk
+        *spans, trailing = texts
+        self.assertEqual(len(spans), 10)
+        for node in spans:
+            self.assertIs(node._source, html)
+            self.assertEqual(node.text, paragraph)
+        self.assertEqual(trailing.text, " trailing text")
+
+    def test_tag_heavy_chunks_are_copied(self):
+        # The text covers only a small part of the chunk, so referencing it would keep all of the markup alive
+        root = HTMLParser(HTML, text_spans=True).parse()
+
+        for node in text_nodes(root):
+            self.assertIsNot(node._source, HTML)
+        self.assertEqual(describe(root), describe(HTMLParser(HTML).parse()))
+
+
+class LegacyHTMLParser(HTMLParser):
+    """The parser before the insertion modes, which compared the list of open tags on every token."""
+
+    def implicit_tags(self, tag_name: str | None):
+        while True:
+            open_tags = [node.tag_name for node in self.unfinished]
+
+            if open_tags == [] and tag_name != "html":
+                self.add_tag("html")
+            elif open_tags == ["html"] and tag_name not in ["head", "body", "/html"]:
+                if tag_name in self.HEAD_TAGS:
+                    self.add_tag("head")
+                else:
+                    self.add_tag("body")
+            elif open_tags == ["html", "head"] and tag_name not in ["/head"] + list(
+                self.HEAD_TAGS
+            ):
+                self.add_tag("/head")
+            else:
+                break
+
+
+def nested_html(depth: int) -> str:
+    return "<div>" * depth + "text" + "</div>" * depth
+
+
+class TestHTMLParserInsertionModes(unittest.TestCase):
+
+    DOCUMENTS = [
+        HTML,
+        "",
+        "just text",
+        "<title>Title</title>text",
+        "<html><html><p>twice</p></html>",
+        "<head><meta charset=utf-8><title>t</title></head><p>x</p>",
+        "<head><title>t</title><p>body tag in head</p>",
+        "<body><p>x</p></body>text after body</html>more",
+        "</p></html></body>closing tags first",
+        "<html></html>",
+        "<p><head><title>late head</title></head></p>",
+        "<link rel=stylesheet href=a.css><br><p>x</p>",
+        nested_html(50),
+    ]
+
+    def test_same_tree_as_legacy_parser(self):
+        for html in self.DOCUMENTS:
+            self.assertEqual(
+                describe(HTMLParser(html).parse()),
+                describe(LegacyHTMLParser(html).parse()),
+                html,
+            )
+
+    def test_random_documents(self):
+        rng = random.Random(0)
+        tags = ["html", "head", "body", "title", "meta", "p", "div", "br", "link"]
+        for _ in range(500):
+            tokens = []
+            for _ in range(rng.randint(0, 12)):
+                kind = rng.random()
+                if kind < 0.4:
+                    tokens.append(f"<{rng.choice(tags)}>")
+                elif kind < 0.8:
+                    tokens.append(f"</{rng.choice(tags)}>")
+                else:
+                    tokens.append("text")
+            html = "".join(tokens)
+
+            self.assertEqual(
+                describe(HTMLParser(html).parse()),
+                describe(LegacyHTMLParser(html).parse()),
+                html,
+            )
+
+    def test_insertion_mode(self):
+        parser = HTMLParser()
+        self.assertEqual(parser.insertion_mode, BEFORE_HTML)
+
+        parser.feed("<html>")
+        self.assertEqual(parser.insertion_mode, BEFORE_HEAD)
+        parser.feed("<title>")
+        self.assertEqual(parser.insertion_mode, IN_BODY)
+        parser.feed("</title>")
+        self.assertEqual(parser.insertion_mode, IN_HEAD)
+        parser.feed("<p>")
+        self.assertEqual(parser.insertion_mode, IN_BODY)
+        parser.feed("</p></body>")
+        self.assertEqual(parser.insertion_mode, BEFORE_HEAD)
+
+        parser.close()
+        self.assertEqual(parser.insertion_mode, BEFORE_HTML)
+
+
+@unittest.skip("Performance test")
+class TestHTMLParserPerformance(unittest.TestCase):
+    """Parse time of deeply nested documents, with and without the insertion modes."""
+
+    def test_performance(self):
+        for depth in (100, 1000, 5000):
+            html = nested_html(depth) * 10
+
+            for parser_class in (LegacyHTMLParser, HTMLParser):
+                start = time.perf_counter()
+                parser_class(html).parse()
+                elapsed = time.perf_counter() - start
+                print(f"{parser_class.__name__} depth {depth}: {elapsed * 1000:.1f} ms")
+
+    def test_text_spans(self):
+        """
+        Parse time and memory of the DOM tree (without the source) for a text-heavy and a tag-heavy document,
+        parsed in chunks like local files.
+        """
+
+        paragraph = " ".join(["lorem ipsum dolor sit amet"] * 80)
+        documents = {
+            "text-heavy": f"<p>{paragraph}</p>\n" * 3000,
+            "tag-heavy": "".join(
+                f'<li class="item"><a href="/page/{i}" title="Page {i}">item {i}</a></li>\n'
+                for i in range(100_000)
+            ),
+        }
+
+        for name, html in documents.items():
+            for text_spans in (False, True):
+                start = time.perf_counter()
+                parse_chunks(html, text_spans)
+                elapsed = time.perf_counter() - start
+
+                tracemalloc.start()
+                root = parse_chunks(html, text_spans)
+                size, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del root
+
+                print(
+                    f"{name} text_spans={text_spans}: {elapsed * 1000:.0f} ms, "
+                    f"{size / 1e6:.1f} MB retained, {peak / 1e6:.1f} MB peak "
+                    f"(source {len(html) / 1e6:.1f} MB)"
+                )
+
+
+if __name__ == "__main__":
+    TestHTMLParserPerformance().test_performance()
+    TestHTMLParserPerformance().test_text_spans()
@@ -0,0 +1,145 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from browser import apply_css_to_root_node
+from common.url import URL
+from parser.parser import HTMLParser
+from parser.preload_scanner import PreloadScanner
+
+
+class DelayedHandler(BaseHTTPRequestHandler):
+    """Serves `files` by path. Stylesheets are answered after `css_delay` seconds."""
+
+    files: dict[str, bytes] = {}
+    css_delay = 0.0
+    requested: list[str] = []
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        if self.path not in self.files:
+            self.send_error(404)
+            return
+
+        if self.path.endswith(".css"):
+            time.sleep(self.css_delay)
+
+        body = self.files[self.path]
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(files: dict[str, bytes], css_delay: float) -> ThreadingHTTPServer:
+    handler = type(
+        "Handler",
+        (DelayedHandler,),
+        {"files": files, "css_delay": css_delay, "requested": []},
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestPreloadScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.server = start_server(
+            {"/a.css": b"p { color: red; }", "/b.css": b"b { color: blue; }"}, 0.05
+        )
+        self.base = URL(f"http://127.0.0.1:{self.server.server_address[1]}/index.html")
+        self.scanner = PreloadScanner(self.base)
+
+    def tearDown(self):
+        self.scanner.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetch_starts_while_parsing(self):
+        parser = HTMLParser(on_tag=self.scanner.scan)
+        parser.feed('<html><head><link rel="stylesheet" href="a.css">')
+
+        self.assertEqual(list(self.scanner.requests), ["a.css"])
+
+        parser.feed(
+            '<link rel="icon" href="x.ico"><link rel="stylesheet" href="b.css">'
+        )
+        parser.feed("</head><body><p>text</p></body></html>")
+        parser.close()
+
+        self.assertEqual(list(self.scanner.requests), ["a.css", "b.css"])
+        self.assertEqual(self.scanner.result("a.css"), "p { color: red; }")
+        self.assertEqual(self.scanner.result("b.css"), "b { color: blue; }")
+
+    def test_each_stylesheet_is_fetched_once(self):
+        self.scanner.preload("a.css")
+        self.scanner.preload("a.css")
+        self.scanner.result("a.css")
+
+        self.assertEqual(self.server.RequestHandlerClass.requested, ["/a.css"])  # type: ignore
+
+    def test_failed_request(self):
+        self.assertRaises(Exception, lambda: self.scanner.result("gopher://x/a.css"))
+
+    def test_styles_use_preloaded_stylesheets(self):
+        parser = HTMLParser(
+            '<link rel="stylesheet" href="a.css"><p>text</p>', self.scanner.scan
+        )
+        root = parser.parse()
+        apply_css_to_root_node(
+            root, parser.element_index, self.base, preload_scanner=self.scanner
+        )
+
+        p = root.children[1].children[0]
+        self.assertEqual(p.style["color"], "red")
+        self.assertEqual(self.server.RequestHandlerClass.requested, ["/a.css"])  # type: ignore
+
+
+def load(url: URL, preload: bool):
+    """Fetch, parse and style the page like `fetch_and_style`. Without preloading, stylesheets are requested after parsing."""
+
+    scanner = PreloadScanner(url)
+    try:
+        parser = HTMLParser(url.request(), scanner.scan if preload else None)
+        root = parser.parse()
+        apply_css_to_root_node(root, parser.element_index, url, None, scanner)
+    finally:
+        scanner.close()
+
+
+@unittest.skip("Performance test")
+class TestPreloadLatency(unittest.TestCase):
+
+    def test_load_latency(self):
+        head = "".join(f'<link rel="stylesheet" href="style{i}.css">' for i in range(4))
+        page = f"<html><head>{head}</head><body>{'<p>Some <b>text</b></p>' * 20_000}</body></html>"
+        files = {f"/style{i}.css": b"p { color: gray; }" for i in range(4)}
+        files["/index.html"] = page.encode("utf-8")
+
+        for css_delay in [0.1, 0.3, 1.0]:
+            server = start_server(files, css_delay)
+            url = URL(f"http://127.0.0.1:{server.server_address[1]}/index.html")
+            try:
+                start = time.perf_counter()
+                load(url, preload=False)
+                without = time.perf_counter() - start
+
+                start = time.perf_counter()
+                load(url, preload=True)
+                scanned = time.perf_counter() - start
+
+                print(
+                    f"stylesheet delay {css_delay * 1000:.0f} ms: {without * 1000:.0f} ms without preload scanner, {scanned * 1000:.0f} ms with"
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    TestPreloadLatency().test_load_latency()